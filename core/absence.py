@@ -0,0 +1,129 @@
+# core/absence.py
+"""
+Per-day absence index (DailyAbsence) built with a sweep line.
+
+Every approved leave contributes +1 at its start date and -1 the day after
+its end date to a difference array per (course, semester), taken from the
+snapshot on the leave rather than the student's current profile. Sweeping
+the sorted marks gives runs of consecutive days with a constant change, and
+each run is applied with one range UPDATE instead of one write per day.
+"""
+import itertools
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db.models import F, Sum
+
+from .db import immediate_atomic, retry_on_busy
+from .models import ArchivedLeaveRequest, DailyAbsence, LeaveRequest
+
+REBUILD_CHUNK_SIZE = 5000
+
+
+def difference_marks(spans):
+    """{(course, semester): Counter(day -> delta)} for (key, start, end, sign) spans."""
+    marks = defaultdict(Counter)
+    for key, start, end, sign in spans:
+        marks[key][start] += sign
+        marks[key][end + timedelta(days=1)] -= sign
+    return marks
+
+
+def sweep(day_marks):
+    """Yield (first_day, last_day, value) runs with a non-zero running total."""
+    days = sorted(day_marks)
+    running = 0
+    for day, next_day in zip(days, days[1:]):
+        running += day_marks[day]
+        if running:
+            yield day, next_day - timedelta(days=1), running
+
+
+def _apply(marks):
+    for (course, semester), day_marks in marks.items():
+        for first, last, delta in sweep(day_marks):
+            days = [first + timedelta(days=n) for n in range((last - first).days + 1)]
+            DailyAbsence.objects.bulk_create(
+                [DailyAbsence(day=day, course=course, semester=semester) for day in days],
+                ignore_conflicts=True,
+            )
+            DailyAbsence.objects.filter(course=course, semester=semester, day__range=(first, last)).update(
+                count=F("count") + delta
+            )
+
+
+def record_transitions(leaves, previous_status):
+    """Update the index for leaves that entered or left the APPROVED state."""
+    if previous_status == LeaveRequest.STATUS_APPROVED:
+        changed = [(leave, -1) for leave in leaves if leave.status != LeaveRequest.STATUS_APPROVED]
+    else:
+        changed = [(leave, 1) for leave in leaves if leave.status == LeaveRequest.STATUS_APPROVED]
+    if not changed:
+        return
+    _apply(difference_marks(
+        ((leave.course, leave.semester), leave.start_date, leave.end_date, sign) for leave, sign in changed
+    ))
+
+
+@retry_on_busy
+def rebuild():
+    """
+    Recompute the whole index from approved leaves, archived ones included; returns the number of day rows.
+
+    Reads and replaces in one BEGIN IMMEDIATE transaction, so a decision
+    can't update the index between the two and be overwritten; writers wait
+    for the rebuild to commit.
+    """
+    with immediate_atomic():
+        approved = itertools.chain.from_iterable(
+            model.objects.filter(status=LeaveRequest.STATUS_APPROVED)
+            .values_list("course", "semester", "start_date", "end_date")
+            .iterator(chunk_size=REBUILD_CHUNK_SIZE)
+            for model in (LeaveRequest, ArchivedLeaveRequest)
+        )
+        # Streams the leaves once; memory is bounded by distinct start/end marks.
+        marks = difference_marks(((course, semester), start, end, 1) for course, semester, start, end in approved)
+
+        rows = [
+            DailyAbsence(day=first + timedelta(days=n), course=course, semester=semester, count=value)
+            for (course, semester), day_marks in marks.items()
+            for first, last, value in sweep(day_marks)
+            for n in range((last - first).days + 1)
+        ]
+        DailyAbsence.objects.all().delete()
+        DailyAbsence.objects.bulk_create(rows, batch_size=REBUILD_CHUNK_SIZE)
+    return len(rows)
+
+
+def _scoped(qs, course=None, semester=None):
+    if course:
+        qs = qs.filter(course=course)
+    if semester:
+        qs = qs.filter(semester=semester)
+    return qs
+
+
+def daily_counts(start, end, course=None, semester=None):
+    """[(day, absent students)] for every day in [start, end], from one query."""
+    totals = dict(
+        _scoped(DailyAbsence.objects.filter(day__range=(start, end)), course, semester)
+        .values_list("day")
+        .annotate(total=Sum("count"))
+        .order_by()
+    )
+    return [
+        (start + timedelta(days=n), totals.get(start + timedelta(days=n), 0))
+        for n in range((end - start).days + 1)
+    ]
+
+
+def absent_on(day, course=None, semester=None):
+    """Approved leaves covering ``day``, archived ones included, with the student and profile joined in."""
+    leaves = []
+    for model in (LeaveRequest, ArchivedLeaveRequest):
+        qs = model.objects.filter(
+            status=LeaveRequest.STATUS_APPROVED, end_date__gte=day, start_date__lte=day
+        ).select_related("student", "student__profile")
+        # Scoped like the counts: on the leave's snapshot, not the current profile.
+        leaves.extend(_scoped(qs, course, semester))
+    return sorted(leaves, key=lambda leave: leave.student.first_name)
@@ -0,0 +1,122 @@
+# core/academic_calendar.py
+"""
+Institution calendar: which days count as working days for leave purposes.
+
+Closures (holidays, vacations, exam blocks) are stored as date ranges and
+weekends as a weekday rule, so the table stays tiny. Each academic year is
+expanded on first use into a prefix-sum array of working days, after which
+``working_days(start, end)`` is two array lookups per academic year touched.
+
+Like the staff directory, loaded years are tied to a version token kept in
+the shared default cache; saving or deleting a closure replaces it and
+every worker reloads, so all of them count working days alike.
+"""
+import threading
+import uuid
+from array import array
+from datetime import MAXYEAR, MINYEAR, date, timedelta
+from itertools import accumulate
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import CalendarClosure
+
+VERSION_KEY = "core:academic_calendar:version"
+
+DEFAULT_YEAR_START_MONTH = 6  # June
+DEFAULT_WEEKEND_DAYS = (5, 6)  # Saturday, Sunday
+
+
+def year_start_month():
+    return getattr(settings, "ACADEMIC_YEAR_START_MONTH", DEFAULT_YEAR_START_MONTH)
+
+
+def weekend_days():
+    return frozenset(getattr(settings, "LEAVE_WEEKEND_DAYS", DEFAULT_WEEKEND_DAYS))
+
+
+def academic_year(day):
+    """The calendar year in which the academic year containing ``day`` starts."""
+    return day.year if day.month >= year_start_month() else day.year - 1
+
+
+def year_bounds(year):
+    """First and last day of academic ``year``, clipped to the dates Python can represent."""
+    month = year_start_month()
+    first = date(year, month, 1) if year >= MINYEAR else date.min
+    last = date(year + 1, month, 1) - timedelta(days=1) if year < MAXYEAR else date.max
+    return first, last
+
+
+class AcademicCalendar:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._years = {}
+
+    def _current_version(self):
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            token = uuid.uuid4().hex
+            cache.add(VERSION_KEY, token, None)
+            version = cache.get(VERSION_KEY, token)
+        return version
+
+    def invalidate(self):
+        # A random token for the same reason as StaffDirectory.invalidate.
+        cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+        self._version = None
+
+    def _build(self, year):
+        """prefix[i] = working days among the first i days of the academic year."""
+        first, last = year_bounds(year)
+        size = (last - first).days + 1
+        weekend = weekend_days()
+        working = bytearray((first + timedelta(days=n)).weekday() not in weekend for n in range(size))
+        closures = CalendarClosure.objects.filter(end_date__gte=first, start_date__lte=last).values_list(
+            "start_date", "end_date"
+        )
+        for start, end in closures:
+            lo = max((start - first).days, 0)
+            hi = min((end - first).days, size - 1)
+            working[lo:hi + 1] = bytes(hi - lo + 1)
+        return array("H", accumulate(working, initial=0))
+
+    def _prefix(self, year):
+        version = self._current_version()
+        with self._lock:
+            if self._version != version:
+                self._years = {}
+                self._version = version
+            prefix = self._years.get(year)
+        if prefix is None:
+            prefix = self._build(year)
+            with self._lock:
+                if self._version == version:
+                    self._years[year] = prefix
+        return prefix
+
+    def working_days(self, start, end):
+        """Working days in [start, end], both inclusive; 0 for an empty range."""
+        total = 0
+        while start <= end:
+            year = academic_year(start)
+            first, last = year_bounds(year)
+            stop = min(end, last)
+            prefix = self._prefix(year)
+            total += prefix[(stop - first).days + 1] - prefix[(start - first).days]
+            if stop == end:  # the day after may be past date.max
+                break
+            start = stop + timedelta(days=1)
+        return total
+
+    def is_working_day(self, day):
+        return self.working_days(day, day) == 1
+
+
+calendar = AcademicCalendar()
+
+
+def working_days(start, end):
+    return calendar.working_days(start, end)
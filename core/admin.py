@@ -1,12 +1,256 @@
 # core/admin.py
-from django.contrib import admin
-from .models import Profile, LeaveRequest
+"""
+Admin registrations, tuned for leave tables with millions of rows.
+
+Change lists never count a whole table (``EstimatedCountPaginator``) and
+load only the columns they show (``ScalableChangelistMixin.list_only``).
+Their date hierarchies are answered with index seeks
+(``IndexedDatesQuerySet``). Foreign keys to User are autocomplete widgets
+rather than selects of every account. Bulk actions work through the selection
+in chunks, using the same services as the app; they are the only way the
+admin changes a leave's review state, so the tables derived from leaves stay
+in step.
+"""
+from datetime import date
+
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections, models
+from django.db.models import Max, Min
+from django.utils.functional import cached_property
+
+from . import archive, services
+from .directory import directory
+from .models import ArchivedLeaveRequest, CalendarClosure, NotificationJob, Profile, LeaveRequest
+from .replicas import read_alias_for, reading_from
+from .search import filter_matching
+
+# Filtered change lists count at most this many rows; past it they show the
+# cap and page no further, and narrowing the filters goes deeper.
+COUNT_CAP = 10_000
+
+
+def table_row_estimate(model, using):
+    """Rows in ``model``'s table as of the last ANALYZE, or None without statistics."""
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+        if cursor.fetchone() is None:
+            return None
+        # Each index's stat starts with its row count; partial indexes hold fewer rows.
+        cursor.execute(
+            "SELECT max(CAST(stat AS INTEGER)) FROM sqlite_stat1 WHERE tbl = %s", [model._meta.db_table]
+        )
+        return cursor.fetchone()[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that never counts a whole large table: unfiltered it uses
+    SQLite's row estimate, filtered it counts up to ``COUNT_CAP`` rows.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = table_row_estimate(queryset.model, queryset.db)
+            if estimate is not None:
+                return estimate
+        return queryset[:COUNT_CAP].count()
+
+
+class IndexedDatesQuerySet(models.QuerySet):
+    """
+    ``dates()`` answered with one EXISTS seek per year, month or day between
+    the field's first and last value, instead of truncating every row, so
+    the admin's date hierarchy stays cheap on an indexed date column.
+    """
+
+    def aggregate(self, *args, **kwargs):
+        # MIN and MAX in one query make SQLite scan the whole column; as
+        # separate queries each is a seek on the column's index. The date
+        # hierarchy asks for both at once.
+        if not args and len(kwargs) > 1 and all(isinstance(agg, (Min, Max)) for agg in kwargs.values()):
+            return {name: super(IndexedDatesQuerySet, self).aggregate(**{name: agg})[name]
+                    for name, agg in kwargs.items()}
+        return super().aggregate(*args, **kwargs)
+
+    def dates(self, field_name, kind, order="ASC"):
+        bounds = self.aggregate(first=Min(field_name), last=Max(field_name))
+        if bounds["first"] is None:
+            return []
+        # The period's bounds go first: SQLite seeks with the first range it
+        # sees on the column, and a drilled-down year's BETWEEN is wider.
+        found = [
+            start for start, end in _periods(bounds["first"], bounds["last"], kind)
+            if (type(self)(self.model, using=self._db)
+                .filter(**{f"{field_name}__gte": start, f"{field_name}__lt": end}) & self).exists()
+        ]
+        return found if order == "ASC" else found[::-1]
+
+
+def _periods(first, last, kind):
+    """(start, next start) of each year, month or day from ``first`` to ``last``."""
+    if kind == "day":
+        for n in range((last - first).days + 1):
+            day = date.fromordinal(first.toordinal() + n)
+            yield day, date.fromordinal(day.toordinal() + 1)
+        return
+    months = 12 if kind == "year" else 1
+    index = first.year * 12 + (0 if kind == "year" else first.month - 1)  # months since year 0
+    while index <= last.year * 12 + last.month - 1:
+        following = index + months
+        yield date(index // 12, index % 12 + 1, 1), date(following // 12, following % 12 + 1, 1)
+        index = following
+
+
+class LeanChangeList(ChangeList):
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if self.model_admin.list_only:
+            queryset = queryset.only(*self.model_admin.list_only)
+        return queryset
+
+
+class ReplicaChangelistMixin:
+    """Serve change list pages from the read replica (writes and edit forms stay on the primary)."""
+
+    def changelist_view(self, request, extra_context=None):
+        with reading_from(read_alias_for(request)):
+            return super().changelist_view(request, extra_context)
+
+
+class ScalableChangelistMixin(ReplicaChangelistMixin):
+    """Change lists without full counts, loading only ``list_only`` and dating with index seeks."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_only = None  # fields the change list rows need; the rest are deferred
+
+    def get_changelist(self, request, **kwargs):
+        return LeanChangeList
+
+    def get_queryset(self, request):
+        queryset = IndexedDatesQuerySet(self.model)
+        ordering = self.get_ordering(request)
+        return queryset.order_by(*ordering) if ordering else queryset
+
+
+class LeaveSearchMixin:
+    """A search box over reasons and review comments answered by the full-text index, not LIKE scans."""
+    search_fields = ("reason",)  # shows the box; get_search_results replaces Django's lookup
+    search_help_text = "Words in the reason or review comments"
+
+    def get_search_results(self, request, queryset, search_term):
+        return filter_matching(queryset, search_term), False
+
+
+class ApproverFilter(admin.SimpleListFilter):
+    """Reviewers from the cached staff directory, not every User a related-field filter would list."""
+    title = "approver"
+    parameter_name = "approver"
+
+    def lookups(self, request, model_admin):
+        return [(entry.pk, entry.name.capitalize()) for entry in directory.directors() + directory.mentors()]
+
+    def queryset(self, request, queryset):
+        return queryset.filter(approver_id=self.value()) if self.value() else queryset
+
+
+LEAVE_LIST_ONLY = (
+    "id", "leave_type", "start_date", "end_date", "status", "reviewed_at",
+    "student__id", "student__username", "approver__id", "approver__username",
+)
+
 
 @admin.register(Profile)
-class ProfileAdmin(admin.ModelAdmin):
+class ProfileAdmin(ScalableChangelistMixin, admin.ModelAdmin):
     list_display = ("user", "role", "phone")
+    list_filter = ("role",)
+    list_select_related = ("user",)
+    list_only = ("id", "role", "phone", "user__id", "user__username")
+    search_fields = ("user__username",)
+    autocomplete_fields = ("user",)
 
 @admin.register(LeaveRequest)
-class LeaveRequestAdmin(admin.ModelAdmin):
-    list_display = ("student", "leave_type", "start_date", "end_date", "status")
-    list_filter = ("status", "leave_type")
+class LeaveRequestAdmin(LeaveSearchMixin, ScalableChangelistMixin, admin.ModelAdmin):
+    list_display = ("id", "student", "leave_type", "start_date", "end_date", "status", "approver")
+    list_filter = ("status", "leave_type", ApproverFilter)
+    list_select_related = ("student", "approver")
+    list_only = LEAVE_LIST_ONLY
+    date_hierarchy = "start_date"
+    ordering = ("-start_date",)  # served by the start_date indexes, filtered or not
+    # Everything the counters, rollups, absence index and notifications are
+    # derived from changes only through core.services (the actions below);
+    # the change form edits the free text alone.
+    readonly_fields = (
+        "student", "leave_type", "start_date", "end_date", "mentor", "approver", "status",
+        "reviewed_at", "course", "semester",
+    )
+    actions = ("approve_selected", "reject_selected", "archive_selected")
+
+    def has_add_permission(self, request):
+        return False  # leaves are submitted through services.submit_leave
+
+    def has_delete_permission(self, request, obj=None):
+        # A delete would skip the services too; reviewed leaves are archived instead.
+        return False
+
+    def has_archive_permission(self, request):
+        return request.user.has_perm("core.delete_leaverequest")
+
+    @admin.action(description="Approve selected pending leave requests", permissions=["change"])
+    def approve_selected(self, request, queryset):
+        self._review(request, queryset, LeaveRequest.STATUS_APPROVED)
+
+    @admin.action(description="Reject selected pending leave requests", permissions=["change"])
+    def reject_selected(self, request, queryset):
+        self._review(request, queryset, LeaveRequest.STATUS_REJECTED)
+
+    def _review(self, request, queryset, status):
+        reviewed = services.review_queryset(queryset, status)
+        self.message_user(request, f"{reviewed} pending leave requests {status.lower()}.", messages.SUCCESS)
+
+    @admin.action(description="Archive selected reviewed leave requests", permissions=["archive"])
+    def archive_selected(self, request, queryset):
+        moved, last_id = 0, 0
+        while True:
+            ids = archive.archive_batch(None, last_id, leaves=queryset)
+            if not ids:
+                break
+            moved, last_id = moved + len(ids), ids[-1]
+        self.message_user(request, f"{moved} reviewed leave requests archived; pending ones and those with an email still to "
+                               "send stay.", messages.SUCCESS)
+
+@admin.register(ArchivedLeaveRequest)
+class ArchivedLeaveRequestAdmin(LeaveSearchMixin, ScalableChangelistMixin, admin.ModelAdmin):
+    """Read-only: rows only arrive through ``manage.py archive_leaves``."""
+    list_display = ("id", "student", "leave_type", "start_date", "end_date", "status", "reviewed_at")
+    list_filter = ("status", "leave_type", ApproverFilter)
+    list_select_related = ("student",)
+    list_only = LEAVE_LIST_ONLY[:-2]
+    date_hierarchy = "start_date"
+    ordering = ("-start_date",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(CalendarClosure)
+class CalendarClosureAdmin(admin.ModelAdmin):
+    list_display = ("name", "kind", "start_date", "end_date")
+    list_filter = ("kind",)
+    date_hierarchy = "start_date"
+
+@admin.register(NotificationJob)
+class NotificationJobAdmin(admin.ModelAdmin):
+    list_display = ("kind", "recipient", "leave", "status", "attempts", "run_after", "sent_at")
+    list_filter = ("status", "kind")
+    list_select_related = ("recipient", "leave__student")
+    raw_id_fields = ("recipient", "leave")
+    readonly_fields = ("dedupe_key", "created_at", "sent_at", "last_error")
@@ -7,3 +7,10 @@ class CoreConfig(AppConfig):
 
     def ready(self):
         import core.signals  # load signals to create Profile on User create
+        from django.core.signals import request_started
+        from .directory import warm_directory
+
+        # Load the reviewer roster when the worker serves its first request;
+        # ready() itself also runs for migrate/test setup, before the tables
+        # (or the test database) exist.
+        request_started.connect(warm_directory, dispatch_uid="core.warm_directory")
@@ -0,0 +1,113 @@
+# core/archive.py
+"""
+Hot/archive split of leave history.
+
+``manage.py archive_leaves`` moves leaves reviewed before a cutoff (by
+default everything before the last ``LEAVE_ARCHIVE_KEEP_YEARS`` academic
+years) from LeaveRequest into ArchivedLeaveRequest. It works in batches, each
+an insert plus a delete in one write transaction. A run can be stopped at
+any point and simply run again. Pending leaves are never archived, nor are
+leaves with an email still to send; a later run picks those up once
+``send_notifications`` has sent the email or given up on it.
+
+The dashboards, counters and pending queues only read the hot table. The
+student and reviewer history pages and exports read the archive as well
+when asked to (``include_archive``). The absence drill-down always does, so
+it agrees with the precomputed calendar counts, which keep archived leaves.
+"""
+from datetime import date, datetime, time
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import DateTimeField, Exists, OuterRef, Value
+from django.utils import timezone
+
+from . import freshness
+from .academic_calendar import academic_year, year_bounds
+from .db import immediate_atomic, retry_on_busy
+from .models import ArchivedLeaveRequest, LeaveRequest, NotificationJob
+
+DEFAULT_KEEP_YEARS = 2
+BATCH_SIZE = 2000
+
+# Columns copied as they are; archived_at is stamped on insert.
+FIELDS = [field.attname for field in ArchivedLeaveRequest._meta.concrete_fields if field.name != "archived_at"]
+
+
+def leave_models(include_archive):
+    """The models a history read covers: the hot table, plus the archive when asked."""
+    return (LeaveRequest, ArchivedLeaveRequest) if include_archive else (LeaveRequest,)
+
+
+def default_cutoff(today=None):
+    """Start of the oldest academic year kept hot."""
+    keep = getattr(settings, "LEAVE_ARCHIVE_KEEP_YEARS", DEFAULT_KEEP_YEARS)
+    return year_bounds(academic_year(today or date.today()) - keep + 1)[0]
+
+
+def _as_datetime(day):
+    value = datetime.combine(day, time.min)
+    return timezone.make_aware(value) if settings.USE_TZ else value
+
+
+def archivable(cutoff=None, leaves=None):
+    """
+    Hot leaves reviewed before ``cutoff`` (a date; None for any time), out
+    of the ``leaves`` queryset if given, whose notification jobs are all
+    sent or failed.
+    """
+    unsent = NotificationJob.objects.filter(
+        leave_id=OuterRef("pk"), status__in=(NotificationJob.STATUS_PENDING, NotificationJob.STATUS_SENDING),
+    )
+    queryset = LeaveRequest.objects.filter(
+        ~Exists(unsent), status__in=(LeaveRequest.STATUS_APPROVED, LeaveRequest.STATUS_REJECTED),
+    )
+    if cutoff is not None:
+        queryset = queryset.filter(reviewed_at__lt=_as_datetime(cutoff))
+    if leaves is not None:
+        queryset = queryset.filter(pk__in=leaves.values("pk"))
+    return queryset
+
+
+def _copy_to_archive(batch):
+    """INSERT ... SELECT ``batch`` into the archive table, without loading the rows into Python."""
+    rows = batch.annotate(stamp=Value(timezone.now(), DateTimeField())).values_list(*FIELDS, "stamp")
+    select, params = rows.query.sql_with_params()
+    meta = ArchivedLeaveRequest._meta
+    # values_list selects the fields in order, then the annotation.
+    columns = [meta.get_field(name).column for name in (*FIELDS, "archived_at")]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(meta.db_table)} ({', '.join(map(quote, columns))}) {select}", params
+        )
+
+
+@retry_on_busy
+def archive_batch(cutoff, after_id=0, batch_size=BATCH_SIZE, leaves=None):
+    """
+    Move the next ``batch_size`` archivable leaves with pk > ``after_id``
+    (see ``archivable`` for ``cutoff`` and ``leaves``).
+
+    Returns the moved ids, in order. Walking forward by pk keeps each batch
+    a rowid range scan rather than a rescan of rows that were skipped.
+    """
+    with immediate_atomic():
+        keys = list(
+            archivable(cutoff, leaves).filter(pk__gt=after_id).order_by("pk")
+            .values_list("pk", "student_id")[:batch_size]
+        )
+        if not keys:
+            return []
+        ids = [pk for pk, _ in keys]
+        # Exactly ``ids``: the write lock is held, so nothing in the range changes.
+        batch = archivable(cutoff, leaves).filter(pk__gt=after_id, pk__lte=ids[-1])
+        _copy_to_archive(batch)
+        # Notification jobs are the only dependants, all of them sent or
+        # failed; with them gone first the leaves go in one DELETE instead of
+        # through the deletion collector.
+        NotificationJob.objects.filter(leave_id__in=ids).delete()
+        batch._raw_delete(connection.alias)
+        # Student dashboards list their latest hot leaves.
+        freshness.bump({student_id for _, student_id in keys})
+    return ids
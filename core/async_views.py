@@ -0,0 +1,93 @@
+# core/async_views.py
+"""
+Async versions of the dashboards and the review page, for ASGI deployments.
+
+Independent work (the table rows, from the fragment cache or rendered, and
+the counter totals) is awaited together with ``asyncio.gather`` instead of
+one after another. Templates are rendered
+through ``sync_to_async`` since they may still reach the database, e.g.
+``LeaveRequest.working_days`` loading a calendar year on first use.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import redirect, render
+
+from . import counters, events, services
+from .auth import async_role_required
+from .dashboards import pending_rows_fragment, student_rows_fragment
+from .freshness import async_conditional_dashboard
+from .models import LeaveCounter, LeaveRequest, Profile
+from .views import REVIEW_ACTIONS
+
+arender = sync_to_async(render)
+
+
+@async_conditional_dashboard
+@async_role_required(Profile.ROLE_STUDENT)
+async def student_dashboard(request):
+    leave_rows, stats = await asyncio.gather(
+        sync_to_async(student_rows_fragment)(request.user.pk),
+        counters.aget_stats(request.user, LeaveCounter.ROLE_STUDENT),
+    )
+    return await arender(request, "core/student_dashboard.html", {"leave_rows": leave_rows, "stats": stats})
+
+
+async def _reviewer_dashboard(request, template):
+    pending_rows, stats = await asyncio.gather(
+        sync_to_async(pending_rows_fragment)(request.user.pk),
+        counters.aget_stats(request.user, LeaveCounter.ROLE_APPROVER),
+    )
+    return await arender(request, template, {"pending_rows": pending_rows, "stats": stats})
+
+
+@async_conditional_dashboard
+@async_role_required(Profile.ROLE_MENTOR)
+async def mentor_dashboard(request):
+    return await _reviewer_dashboard(request, "core/mentor_dashboard.html")
+
+
+@async_conditional_dashboard
+@async_role_required(Profile.ROLE_DIRECTOR)
+async def director_dashboard(request):
+    return await _reviewer_dashboard(request, "core/director_dashboard.html")
+
+
+@async_role_required(Profile.ROLE_MENTOR, Profile.ROLE_DIRECTOR)
+async def review_leave(request, pk):
+    try:
+        lr = await LeaveRequest.objects.select_related("student").aget(pk=pk)
+    except LeaveRequest.DoesNotExist:
+        raise Http404("No leave request matches the given query.")
+    if lr.approver_id != request.user.pk:
+        messages.error(request, "You are not authorized to review this request.")
+        return redirect('index')
+
+    if request.method == "POST":
+        action = request.POST.get("action")
+        comments = request.POST.get("comments", "").strip()
+        if action in REVIEW_ACTIONS:
+            # The write path is transactional and signal-driven, so it stays sync.
+            await sync_to_async(services.review_leave)(lr, REVIEW_ACTIONS[action], comments)
+            messages.success(request, f"Leave {REVIEW_ACTIONS[action].lower()}.")
+        return redirect(
+            'async_mentor_dashboard' if request.role == Profile.ROLE_MENTOR else 'async_director_dashboard'
+        )
+
+    return await arender(request, "core/review_leave.html", {"lr": lr})
+
+
+@async_role_required(Profile.ROLE_MENTOR, Profile.ROLE_DIRECTOR)
+async def reviewer_events(request):
+    """Server-sent events with the reviewer's pending count and new/removed rows."""
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI an open stream would tie up a worker thread; 204 tells
+        # EventSource not to reconnect, and the dashboard stays static.
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(events.stream(request.user.pk), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,87 @@
+# core/auth.py
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.cache import cache
+from django.shortcuts import redirect
+
+from .models import Profile
+
+# Profile and User saves drop the entry at once; writes that send no signal
+# (queryset updates, raw SQL) are picked up when it ages out.
+IDENTITY_CACHE_TIMEOUT = 60
+
+
+def _identity_key(user_id):
+    return f"core:identity:{user_id}"
+
+
+def cache_identity(user):
+    """Store the user's role and display name; called at sign-in and on a cache miss."""
+    profile, _ = Profile.objects.get_or_create(user=user)
+    identity = {"role": profile.role, "name": user.first_name}
+    cache.set(_identity_key(user.pk), identity, IDENTITY_CACHE_TIMEOUT)
+    return identity
+
+
+def forget_identity(user_id):
+    cache.delete(_identity_key(user_id))
+
+
+def cached_identity(user_id):
+    """The cached identity for ``user_id`` or None; never touches the database."""
+    return cache.get(_identity_key(user_id))
+
+
+def get_identity(request):
+    """Role and display name of the signed-in user, without a Profile query once cached."""
+    identity = cached_identity(request.user.pk)
+    if identity is None:
+        identity = cache_identity(request.user)
+    return identity
+
+
+async def aget_identity(request):
+    """Async ``get_identity``; ``request.user`` must already be resolved."""
+    identity = await cache.aget(_identity_key(request.user.pk))
+    if identity is None:
+        identity = await sync_to_async(cache_identity)(request.user)
+    return identity
+
+
+def role_required(*roles):
+    """
+    Like ``login_required``, but also sends users whose role isn't in
+    ``roles`` back to the index. The role comes from the identity cache, so
+    the check costs no Profile query; ``request.role`` is set for the view.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return redirect_to_login(request.get_full_path(), settings.LOGIN_URL)
+            request.role = get_identity(request)["role"]
+            if request.role not in roles:
+                return redirect('index')
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def async_role_required(*roles):
+    """``role_required`` for async views."""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            # request.user is a lazy object backed by the session and the
+            # database, so it's resolved off the event loop once, here.
+            if not await sync_to_async(lambda: request.user.is_authenticated)():
+                return redirect_to_login(request.get_full_path(), settings.LOGIN_URL)
+            request.role = (await aget_identity(request))["role"]
+            if request.role not in roles:
+                return redirect('index')
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
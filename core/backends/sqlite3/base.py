@@ -0,0 +1,49 @@
+# core/backends/sqlite3/base.py
+"""
+SQLite backend tuned for concurrent writers.
+
+Every new connection gets WAL journaling and the other pragmas below, so
+readers no longer block the writer and a busy database is waited on instead
+of failing at once. ``OPTIONS["init_pragmas"]`` overrides or extends them.
+
+``transaction_mode`` ("IMMEDIATE") makes the next outermost ``atomic()``
+start with ``BEGIN IMMEDIATE``: the write lock is taken up front, where a
+busy database simply waits out ``busy_timeout``, rather than on the first
+write of a read-then-write transaction, where SQLite can only fail with
+"database is locked". See core.db.immediate_atomic.
+"""
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    # Safe with WAL: a power loss can drop the last commits, not corrupt the file.
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,  # ms
+    "temp_store": "MEMORY",
+    "cache_size": -20000,  # KiB
+    "mmap_size": 134217728,
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.transaction_mode = None
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop("init_pragmas", None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        pragmas = {**DEFAULT_PRAGMAS, **self.settings_dict["OPTIONS"].get("init_pragmas", {})}
+        for name, value in pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode:
+            self.cursor().execute(f"BEGIN {self.transaction_mode}")
+        else:
+            super()._start_transaction_under_autocommit()
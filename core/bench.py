@@ -0,0 +1,204 @@
+# core/bench.py
+"""
+Helpers shared by the ``bench_*`` management commands: bulk seeding of
+synthetic users/leaves and small timing utilities.
+"""
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+
+from .models import Profile, LeaveRequest
+
+BENCH_DOMAIN = "bench.suranacollege.edu.in"
+BATCH_SIZE = 2000
+# Sign-in password of the accounts created by ``manage.py seed_data``.
+SEED_PASSWORD = "Bench-pass-1"
+# Dropped from MIDDLEWARE by the drivers' --without-metrics runs.
+METRICS_MIDDLEWARE = "core.metrics.MetricsMiddleware"
+
+# Seeded reasons and review comments, so full-text search has realistic text
+# to rank: templates are picked Zipf-style, so some words are far commoner.
+SEED_REASONS = [
+    "Fever and cold, the doctor advised two days of rest",
+    "Attending my sister's wedding in {place}",
+    "Family function in {place}",
+    "Travelling home to {place} for {festival}",
+    "Medical appointment at a hospital in {place}",
+    "Representing the college at the {event} in {place}",
+    "Grandmother admitted to hospital in {place}, need to be with family",
+    "Internship interview at a company in {place}",
+    "Dental surgery and recovery",
+    "Passport verification appointment at the {place} office",
+    "Participating in the {event}",
+    "Bike accident on the way to college, minor injuries",
+    "Elder brother's engagement ceremony in {place}",
+    "Food poisoning after a trip to {place}",
+    "Driving licence test at the {place} RTO",
+]
+SEED_PLACES = ["Mysore", "Bangalore", "Chennai", "Hubli", "Mangalore", "Pune", "Hyderabad", "Tumkur", "Shimoga",
+               "Belgaum", "Davangere", "Udupi"]
+SEED_EVENTS = ["state level hackathon", "inter-college cultural fest", "university cricket tournament",
+               "national coding contest", "debate competition", "robotics workshop"]
+SEED_FESTIVALS = ["Diwali", "Ugadi", "Pongal", "Eid", "Christmas", "Dasara", "Onam"]
+SEED_COMMENTS = {
+    LeaveRequest.STATUS_APPROVED: [
+        "", "Approved", "Approved, take care", "Approved. Submit the medical certificate on return",
+        "Okay, collect the notes from your classmates", "Approved, all the best for the event",
+    ],
+    LeaveRequest.STATUS_REJECTED: [
+        "Rejected: internal exams that week", "Attendance is below 75 percent, cannot approve",
+        "Please apply again with supporting documents", "Lab submissions are due, reschedule if possible",
+    ],
+}
+
+
+@contextmanager
+def manual_created_at():
+    """Let bulk_create keep the created_at we assign instead of auto_now_add."""
+    field = LeaveRequest._meta.get_field("created_at")
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def create_users(prefix, count, role, password="!"):
+    """Bulk-create ``count`` users with profiles; ``password`` is an encoded hash."""
+    users = [
+        User(
+            username=f"{prefix}{i}@{BENCH_DOMAIN}",
+            email=f"{prefix}{i}@{BENCH_DOMAIN}",
+            first_name=f"{prefix.capitalize()}{i}",
+            password=password,
+        )
+        for i in range(count)
+    ]
+    users = User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+    Profile.objects.bulk_create(
+        [Profile(user=u, role=role, semester=(i % 4) + 1, course="MCA") for i, u in enumerate(users)],
+        batch_size=BATCH_SIZE,
+    )
+    return users
+
+
+def zipf_weights(count, exponent=1.0):
+    """Weights where the n-th item is picked ~1/n**exponent as often as the first."""
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+def seed_reason(rng):
+    template = rng.choices(SEED_REASONS, zipf_weights(len(SEED_REASONS)))[0]
+    return template.format(
+        place=rng.choice(SEED_PLACES), event=rng.choice(SEED_EVENTS), festival=rng.choice(SEED_FESTIVALS),
+    )
+
+
+def seed_leaves(students, approvers, count, weights=None, start=date(2022, 6, 1), span_days=1095, seed=0):
+    """
+    Bulk-insert ``count`` leave requests spread over ``span_days``.
+
+    ``weights`` skews how often each approver is picked; roughly a fifth of
+    the rows are left pending and the rest split between approved/rejected.
+    """
+    rng = random.Random(seed)
+    statuses = [LeaveRequest.STATUS_PENDING, LeaveRequest.STATUS_APPROVED, LeaveRequest.STATUS_REJECTED]
+    leave_types = [choice for choice, _ in LeaveRequest.LEAVE_CHOICES]
+    # The course/semester snapshot services.submit_leave would have taken.
+    profiles = {
+        user_id: (course, semester or 0)
+        for user_id, course, semester in Profile.objects.filter(role=Profile.ROLE_STUDENT)
+        .values_list("user_id", "course", "semester").iterator()
+    }
+    with manual_created_at():
+        for offset in range(0, count, BATCH_SIZE):
+            batch = []
+            for _ in range(min(BATCH_SIZE, count - offset)):
+                created = datetime.combine(start, datetime.min.time()) + timedelta(
+                    days=rng.randrange(span_days), seconds=rng.randrange(86400)
+                )
+                leave_start = created.date() + timedelta(days=rng.randrange(14))
+                status = rng.choices(statuses, (2, 6, 2))[0]
+                student = rng.choice(students)
+                course, semester = profiles.get(student.pk, ("", 0))
+                batch.append(LeaveRequest(
+                    student=student,
+                    approver=rng.choices(approvers, weights)[0],
+                    leave_type=rng.choice(leave_types),
+                    start_date=leave_start,
+                    end_date=leave_start + timedelta(days=rng.choice((0, 0, 1, 1, 2, 4))),
+                    reason=seed_reason(rng),
+                    status=status,
+                    review_comments=rng.choice(SEED_COMMENTS.get(status, [""])),
+                    created_at=created,
+                    reviewed_at=None if status == LeaveRequest.STATUS_PENDING
+                    else created + timedelta(hours=rng.randrange(1, 96)),
+                    course=course,
+                    semester=semester,
+                ))
+            LeaveRequest.objects.bulk_create(batch)
+
+
+def timed(fn, repeat=20):
+    """Run ``fn`` ``repeat`` times and return per-call latencies in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+
+@contextmanager
+def capture_statements():
+    """Collect the (sql, params) of every statement run inside the block."""
+    statements = []
+
+    def wrapper(execute, sql, params, many, context):
+        statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield statements
+
+
+def explain(sql, params=()):
+    """
+    EXPLAIN QUERY PLAN detail lines for a statement.
+
+    Params are bound rather than inlined so the planner sees the same
+    statement the ORM runs (inlined literals can pick a different plan).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(plan, table=LeaveRequest._meta.db_table):
+    """Full scans of ``table`` and temp B-tree sorts found in a query plan."""
+    return [
+        line for line in plan
+        if line.startswith(f"SCAN {table}") or "USE TEMP B-TREE" in line
+    ]
@@ -0,0 +1,107 @@
+# core/counters.py
+from collections import Counter
+
+from django.db.models import Count, F
+
+from .db import immediate_atomic, retry_on_busy
+from .models import ArchivedLeaveRequest, LeaveCounter, LeaveRequest
+
+STATUSES = [status for status, _ in LeaveRequest.STATUS_CHOICES]
+
+
+def _adjust(user_id, role, status, delta):
+    updated = LeaveCounter.objects.filter(user_id=user_id, role=role, status=status).update(
+        count=F("count") + delta
+    )
+    if not updated:
+        LeaveCounter.objects.create(user_id=user_id, role=role, status=status, count=delta)
+
+
+def record_submission(leave):
+    _adjust(leave.student_id, LeaveCounter.ROLE_STUDENT, leave.status, 1)
+    if leave.approver_id:
+        _adjust(leave.approver_id, LeaveCounter.ROLE_APPROVER, leave.status, 1)
+
+
+def record_transitions(leaves, previous_status):
+    """Move ``leaves`` from ``previous_status`` to their current status in the counters."""
+    deltas = Counter()
+    for leave in leaves:
+        if previous_status == leave.status:
+            continue
+        for user_id, role in ((leave.student_id, LeaveCounter.ROLE_STUDENT),
+                              (leave.approver_id, LeaveCounter.ROLE_APPROVER)):
+            if user_id:
+                deltas[(user_id, role, previous_status)] -= 1
+                deltas[(user_id, role, leave.status)] += 1
+    # One statement per affected counter rather than per leave, which matters
+    # for bulk reviews where many leaves share an approver.
+    for (user_id, role, status), delta in deltas.items():
+        if delta:
+            _adjust(user_id, role, status, delta)
+
+
+def _stats_query(user, role):
+    return LeaveCounter.objects.filter(user=user, role=role).values_list("status", "count")
+
+
+def get_stats(user, role):
+    """Pending/approved/rejected totals for ``user`` in ``role``, in one indexed lookup."""
+    stats = dict.fromkeys((status.lower() for status in STATUSES), 0)
+    for status, count in _stats_query(user, role):
+        stats[status.lower()] = count
+    return stats
+
+
+async def aget_stats(user, role):
+    """Async ``get_stats`` for the views in core.async_views."""
+    stats = dict.fromkeys((status.lower() for status in STATUSES), 0)
+    async for status, count in _stats_query(user, role):
+        stats[status.lower()] = count
+    return stats
+
+
+def expected_counts(user_ids):
+    """Recount {(user_id, role, status): n} for ``user_ids`` from LeaveRequest and the archive."""
+    expected = Counter()
+    for model in (LeaveRequest, ArchivedLeaveRequest):
+        for role, column in ((LeaveCounter.ROLE_STUDENT, "student"), (LeaveCounter.ROLE_APPROVER, "approver")):
+            totals = (
+                model.objects.filter(**{f"{column}__in": user_ids})
+                .values_list(column, "status")
+                .annotate(n=Count("id"))
+                .order_by()
+            )
+            for user_id, status, n in totals:
+                expected[(user_id, role, status)] += n
+    return dict(expected)
+
+
+@retry_on_busy
+def reconcile(user_ids, repair=True):
+    """
+    Compare the stored counters for ``user_ids`` with a fresh recount.
+
+    Returns the drifted keys as {key: (stored, expected)}; with ``repair`` the
+    stored rows are corrected in the same transaction as the recount. That
+    transaction begins IMMEDIATE so no submission or review can move a
+    counter between the recount and the repair.
+    """
+    with immediate_atomic():
+        expected = expected_counts(user_ids)
+        stored = {
+            (user_id, role, status): count
+            for user_id, role, status, count in LeaveCounter.objects.filter(user_id__in=user_ids)
+            .values_list("user_id", "role", "status", "count")
+        }
+        drift = {
+            key: (stored.get(key, 0), expected.get(key, 0))
+            for key in stored.keys() | expected.keys()
+            if stored.get(key, 0) != expected.get(key, 0)
+        }
+        if repair:
+            for (user_id, role, status), (_, count) in drift.items():
+                LeaveCounter.objects.update_or_create(
+                    user_id=user_id, role=role, status=status, defaults={"count": count}
+                )
+    return drift
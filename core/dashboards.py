@@ -0,0 +1,148 @@
+# core/dashboards.py
+from datetime import datetime
+
+from django.db.models import Count, Q
+from django.template.loader import render_to_string
+
+from .models import LeaveRequest, LeaveCounter
+from . import counters, freshness
+from .archive import leave_models
+
+# Columns the reviewer dashboard tables actually render; everything else on
+# LeaveRequest/User is deferred so wide rows don't get pulled into memory.
+REVIEWER_ROW_FIELDS = (
+    "id",
+    "leave_type",
+    "start_date",
+    "end_date",
+    "reason",
+    "status",
+    "review_comments",
+    "created_at",
+    "reviewed_at",
+    "approver_id",
+    "student__id",
+    "student__first_name",
+)
+
+# Rows per page on the lazily loaded Approved/Rejected tabs.
+HISTORY_PAGE_SIZE = 25
+# Latest leaves on the student dashboard; older ones load a page at a time.
+STUDENT_PAGE_SIZE = 10
+
+
+def reviewer_stats(user):
+    """Pending/approved/rejected totals for an approver in a single query."""
+    return LeaveRequest.objects.filter(approver=user).aggregate(
+        pending=Count("id", filter=Q(status=LeaveRequest.STATUS_PENDING)),
+        approved=Count("id", filter=Q(status=LeaveRequest.STATUS_APPROVED)),
+        rejected=Count("id", filter=Q(status=LeaveRequest.STATUS_REJECTED)),
+    )
+
+
+def reviewer_leaves(user, status, model=LeaveRequest):
+    """Leaves in ``status`` assigned to ``user``, with the student joined in."""
+    if status == LeaveRequest.STATUS_PENDING:
+        order = ("-created_at",)
+    else:
+        order = ("-reviewed_at", "-id")
+    return (
+        model.objects.filter(approver=user, status=status)
+        .select_related("student")
+        .only(*REVIEWER_ROW_FIELDS)
+        .order_by(*order)
+    )
+
+
+def encode_cursor(leave, field="reviewed_at"):
+    return f"{getattr(leave, field).isoformat()}_{leave.pk}"
+
+
+def decode_cursor(value):
+    """Inverse of ``encode_cursor``; raises ValueError on a malformed cursor."""
+    value, _, pk = value.rpartition("_")
+    return datetime.fromisoformat(value), int(pk)
+
+
+def keyset_page(querysets, field, cursor=None, page_size=HISTORY_PAGE_SIZE):
+    """
+    One page of rows, newest first, keyed on (``field``, id).
+
+    Seeking past the cursor instead of using OFFSET keeps every page an index
+    range scan, however deep into the history the user has scrolled. With
+    several querysets (hot table and archive) each contributes at most a page
+    and the results are merged. Returns ``(rows, next_cursor)``;
+    ``next_cursor`` is None on the last page.
+    """
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        # Spelled as a single range on ``field`` rather than an OR of two
+        # ranges, which SQLite would answer with a MULTI-INDEX OR plus a sort.
+        querysets = [
+            qs.filter(**{f"{field}__lte": value}).exclude(**{field: value, "id__gte": pk}) for qs in querysets
+        ]
+    rows = [row for qs in querysets for row in qs[:page_size + 1]]
+    if len(querysets) > 1:
+        rows = sorted(rows, key=lambda row: (getattr(row, field), row.pk), reverse=True)[:page_size + 1]
+    next_cursor = encode_cursor(rows[page_size - 1], field) if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
+
+
+def reviewer_history_page(user, status, cursor=None, page_size=HISTORY_PAGE_SIZE, include_archive=False):
+    """One page of the leaves ``user`` reviewed into ``status``, newest review first."""
+    querysets = [
+        reviewer_leaves(user, status, model).filter(reviewed_at__isnull=False)
+        for model in leave_models(include_archive)
+    ]
+    return keyset_page(querysets, "reviewed_at", cursor, page_size)
+
+
+def student_history_page(user, cursor=None, page_size=STUDENT_PAGE_SIZE, include_archive=False):
+    """One page of ``user``'s own leaves, newest submission first."""
+    querysets = [
+        model.objects.filter(student=user).order_by("-created_at", "-id")
+        for model in leave_models(include_archive)
+    ]
+    return keyset_page(querysets, "created_at", cursor, page_size)
+
+
+def history_context(page, cursor, include_archive, field, offset=0):
+    """Template context for a ``keyset_page`` and its "Load more"/archive links."""
+    rows, next_cursor = page
+    return {
+        "leaves": rows,
+        "offset": offset,  # rows shown above this page
+        "shown": offset + len(rows),
+        "next_cursor": next_cursor,
+        "first_page": cursor is None,
+        "archive": include_archive,
+        # Once the hot rows run out, the archive is read from where they ended.
+        "archive_cursor": encode_cursor(rows[-1], field) if rows else cursor,
+    }
+
+
+def pending_rows(leaves):
+    return render_to_string("core/pending_rows.html", {"leaves": leaves})
+
+
+def pending_rows_fragment(user_id):
+    """The reviewer's pending table rows, rendered at most once per leave data version."""
+    return freshness.fragment(user_id, "pending_rows", lambda: pending_rows(
+        reviewer_leaves(user_id, LeaveRequest.STATUS_PENDING)
+    ))
+
+
+def student_rows_fragment(user_id):
+    """The student's latest leaves, rendered at most once per leave data version."""
+    return freshness.fragment(user_id, "student_rows", lambda: render_to_string(
+        "core/student_leave_rows.html",
+        history_context(student_history_page(user_id), None, False, "created_at"),
+    ))
+
+
+def reviewer_dashboard_context(user):
+    # Approved/Rejected tabs are fetched on demand from reviewer_history.
+    return {
+        "pending_rows": pending_rows_fragment(user.pk),
+        "stats": counters.get_stats(user, LeaveCounter.ROLE_APPROVER),
+    }
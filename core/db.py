@@ -0,0 +1,65 @@
+# core/db.py
+"""
+Write-path helpers for running on SQLite under concurrent load.
+
+``immediate_atomic`` is ``transaction.atomic`` that takes SQLite's write lock
+when the transaction starts (see core.backends.sqlite3), and
+``retry_on_busy`` re-runs a whole write transaction, with jittered
+exponential backoff, if the lock still couldn't be had within busy_timeout.
+"""
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.db import OperationalError, transaction
+
+BUSY_ATTEMPTS = 5
+BUSY_BASE_DELAY = 0.05  # seconds, doubled per attempt
+
+BUSY_MESSAGES = ("database is locked", "database is busy")
+
+
+def is_busy_error(exc):
+    return isinstance(exc, OperationalError) and any(msg in str(exc) for msg in BUSY_MESSAGES)
+
+
+@contextmanager
+def immediate_atomic(using=None):
+    """``atomic()`` that begins with BEGIN IMMEDIATE when it's the outermost block."""
+    connection = transaction.get_connection(using)
+    if getattr(connection, "transaction_mode", False) is False or connection.in_atomic_block:
+        # Another backend, or nested inside a transaction that already began.
+        with transaction.atomic(using=using):
+            yield
+        return
+    previous = connection.transaction_mode
+    connection.transaction_mode = "IMMEDIATE"
+    try:
+        with transaction.atomic(using=using):
+            connection.transaction_mode = previous
+            yield
+    finally:
+        connection.transaction_mode = previous
+
+
+def retry_on_busy(func=None, *, attempts=BUSY_ATTEMPTS, base_delay=BUSY_BASE_DELAY, using=None):
+    """
+    Retry ``func`` when SQLite reports the database as locked.
+
+    Only the outermost call retries: inside an enclosing transaction the
+    error propagates, since that whole transaction has to be rolled back.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(attempts):
+                try:
+                    return func(*args, **kwargs)
+                except OperationalError as exc:
+                    if (not is_busy_error(exc) or attempt == attempts - 1
+                            or transaction.get_connection(using).in_atomic_block):
+                        raise
+                time.sleep(base_delay * 2 ** attempt * random.uniform(0.5, 1.5))
+        return wrapper
+    return decorator(func) if func is not None else decorator
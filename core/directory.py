@@ -0,0 +1,92 @@
+# core/directory.py
+"""
+Process-wide, read-mostly roster of reviewers (mentors and directors).
+
+The roster is loaded once per worker and reused by the leave form, the
+request page and director routing. Saves to a staff User/Profile replace a
+version token kept in the default cache; every worker compares its copy
+against that token and reloads on mismatch. The cache is shared by all
+worker processes (see ``CACHES`` in settings), so a change saved in one
+reaches the others on their next lookup.
+"""
+import threading
+import uuid
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from .models import Profile
+
+VERSION_KEY = "core:staff_directory:version"
+
+StaffEntry = namedtuple("StaffEntry", "pk name email role")
+
+
+class StaffDirectory:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = ()
+
+    def _current_version(self):
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            token = uuid.uuid4().hex
+            cache.add(VERSION_KEY, token, None)
+            version = cache.get(VERSION_KEY, token)
+        return version
+
+    def invalidate(self):
+        # A new random token rather than incr(), which the file cache does as
+        # a read and a write: two workers bumping at once could both write
+        # the same number, and one change would go unnoticed.
+        cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+        # Local invalidation doesn't rely on the cache entry surviving.
+        self._version = None
+
+    def load(self):
+        version = self._current_version()
+        rows = (
+            Profile.objects.filter(
+                role__in=(Profile.ROLE_MENTOR, Profile.ROLE_DIRECTOR),
+                accepts_requests=True,
+            )
+            .order_by("user_id")
+            .values_list("user_id", "user__first_name", "user__email", "role")
+        )
+        entries = tuple(StaffEntry(*row) for row in rows)
+        with self._lock:
+            self._entries = entries
+            self._version = version
+        return entries
+
+    def entries(self):
+        if self._version != self._current_version():
+            return self.load()
+        return self._entries
+
+    def mentors(self):
+        return [e for e in self.entries() if e.role == Profile.ROLE_MENTOR]
+
+    def directors(self):
+        return [e for e in self.entries() if e.role == Profile.ROLE_DIRECTOR]
+
+    def get(self, pk):
+        for entry in self.entries():
+            if entry.pk == pk:
+                return entry
+        return None
+
+    def __contains__(self, pk):
+        return self.get(pk) is not None
+
+
+directory = StaffDirectory()
+
+
+def warm_directory(sender, **kwargs):
+    """One-shot ``request_started`` receiver that loads the roster for this worker."""
+    from django.core.signals import request_started
+
+    request_started.disconnect(warm_directory, dispatch_uid="core.warm_directory")
+    directory.load()
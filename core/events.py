@@ -0,0 +1,252 @@
+# core/events.py
+"""
+Live pending-queue updates for the reviewer dashboards, as server-sent events.
+
+``broker`` is an in-process pub/sub keyed by approver id. Each open
+``reviewer_events`` stream (an async view, ASGI only) holds one small
+asyncio.Queue and sits idle apart from a keep-alive comment every
+``EVENTS_KEEPALIVE_SECONDS``. The submit and review signal receivers publish
+to it after commit, and only when that approver has a stream open in this
+process, so WSGI workers pay nothing.
+
+Behind Django's ASGI handler every open request keeps a thread of its own
+(its ThreadSensitiveContext), so leave_project/asgi.py serves the stream
+path with ``EventStreamRouter`` instead. The router authenticates the
+session on a pooled thread and then streams straight from the event loop.
+The Django view serves the same stream when the router isn't in front, e.g.
+under the test client.
+
+Submissions handled by another process (e.g. WSGI workers next to the ASGI
+server) never reach this broker. As the local fallback, one watcher task
+per process looks for new pending leaves every ``EVENTS_POLL_SECONDS`` and
+publishes those for approvers with a stream open here. That costs two
+primary-key queries per interval however many streams are open. Events
+carry the absolute pending count and rows keyed by leave id, so receiving
+the same one twice is harmless.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from importlib import import_module
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import transaction
+from django.db.models import Max
+from django.http import HttpRequest
+from django.urls import reverse
+
+from . import counters
+from .auth import cached_identity, cache_identity
+from .dashboards import pending_rows
+from .models import LeaveCounter, LeaveRequest, Profile
+
+DEFAULT_KEEPALIVE_SECONDS = 15
+DEFAULT_POLL_SECONDS = 5
+# Streams end after this long and the browser reconnects, so a stream whose
+# client vanished without the server noticing can't live forever.
+DEFAULT_MAX_STREAM_SECONDS = 300
+RETRY_MS = 3000
+QUEUE_SIZE = 100
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def pending_counts(user_ids):
+    counts = dict.fromkeys(user_ids, 0)
+    counts.update(LeaveCounter.objects.filter(
+        user_id__in=user_ids, role=LeaveCounter.ROLE_APPROVER, status=LeaveRequest.STATUS_PENDING,
+    ).values_list("user_id", "count"))
+    return counts
+
+
+def _offer(queue, event):
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        # A stalled client; counts are absolute, so the next event catches it up.
+        pass
+
+
+class Broker:
+    def __init__(self):
+        self._subscribers = defaultdict(set)  # approver id -> {(loop, queue)}
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def subscribe(self, user_id):
+        """Register a stream for ``user_id``; must be called on the stream's event loop."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[user_id].add((loop, queue))
+        if self._watcher is None or self._watcher.done() or self._watcher.get_loop() is not loop:
+            self._watcher = loop.create_task(self._watch())
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            streams = self._subscribers.get(user_id, set())
+            streams.difference_update({entry for entry in streams if entry[1] is queue})
+            if not streams:
+                self._subscribers.pop(user_id, None)
+
+    def listening(self, user_id=None):
+        """Approver ids with a stream open here, or whether ``user_id`` has one."""
+        if user_id is not None:
+            return user_id in self._subscribers
+        with self._lock:
+            return set(self._subscribers)
+
+    def publish(self, user_id, event):
+        """Deliver ``event`` to every stream of ``user_id``; safe to call from any thread."""
+        with self._lock:
+            streams = list(self._subscribers.get(user_id, ()))
+        for loop, queue in streams:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:  # that stream's loop has closed
+                self.unsubscribe(user_id, queue)
+
+    async def _watch(self):
+        last_id = await LeaveRequest.objects.aaggregate(last=Max("pk"))
+        last_id = last_id["last"] or 0
+        while self._subscribers:
+            await asyncio.sleep(_setting("EVENTS_POLL_SECONDS", DEFAULT_POLL_SECONDS))
+            last_id = await sync_to_async(publish_new_pending)(last_id, self.listening())
+
+
+broker = Broker()
+
+
+def publish_submission(leave):
+    broker.publish(leave.approver_id, {
+        "pending": pending_counts([leave.approver_id])[leave.approver_id],
+        "rows": pending_rows([leave]),
+    })
+
+
+def publish_reviews(leaves, previous_status):
+    removed = defaultdict(list)
+    for leave in leaves:
+        if previous_status == LeaveRequest.STATUS_PENDING and leave.status != previous_status:
+            removed[leave.approver_id].append(leave.pk)
+    counts = pending_counts(list(removed))
+    for approver_id, ids in removed.items():
+        broker.publish(approver_id, {"pending": counts[approver_id], "removed": ids})
+
+
+def on_submission(leave):
+    if leave.approver_id and broker.listening(leave.approver_id):
+        transaction.on_commit(lambda: publish_submission(leave))
+
+
+def on_reviews(leaves, previous_status):
+    if any(broker.listening(leave.approver_id) for leave in leaves):
+        transaction.on_commit(lambda: publish_reviews(leaves, previous_status))
+
+
+def publish_new_pending(after_id, approver_ids):
+    """Publish pending leaves with pk > ``after_id`` for ``approver_ids``; returns the new high-water mark."""
+    # Writes are serialised by SQLite's write lock, so ids commit in order and
+    # nothing can appear later below the mark.
+    last_id = LeaveRequest.objects.aggregate(last=Max("pk"))["last"] or 0
+    if last_id <= after_id or not approver_ids:
+        return last_id
+    new = defaultdict(list)
+    for leave in (LeaveRequest.objects.filter(pk__gt=after_id, pk__lte=last_id, approver_id__in=approver_ids,
+                                              status=LeaveRequest.STATUS_PENDING)
+                  .select_related("student").order_by("pk")):
+        new[leave.approver_id].append(leave)
+    counts = pending_counts(list(new))
+    for approver_id, leaves in new.items():
+        broker.publish(approver_id, {"pending": counts[approver_id], "rows": pending_rows(leaves)})
+    return last_id
+
+
+def _frame(event):
+    return f"event: pending\ndata: {json.dumps(event)}\n\n"
+
+
+async def stream(user_id):
+    """Server-sent events for ``user_id``'s pending queue, starting with the current count."""
+    queue = broker.subscribe(user_id)
+    loop = asyncio.get_running_loop()
+    keepalive = _setting("EVENTS_KEEPALIVE_SECONDS", DEFAULT_KEEPALIVE_SECONDS)
+    deadline = loop.time() + _setting("EVENTS_MAX_STREAM_SECONDS", DEFAULT_MAX_STREAM_SECONDS)
+    try:
+        stats = await counters.aget_stats(user_id, LeaveCounter.ROLE_APPROVER)
+        yield f"retry: {RETRY_MS}\n" + _frame({"pending": stats["pending"]})
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                event = await asyncio.wait_for(queue.get(), min(keepalive, remaining))
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield _frame(event)
+    finally:
+        broker.unsubscribe(user_id, queue)
+
+
+def _session_reviewer(session_key):
+    """The mentor/director signed in with ``session_key``, or None."""
+    request = HttpRequest()
+    request.session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+    user = get_user(request)
+    if not user.is_authenticated:
+        return None
+    identity = cached_identity(user.pk) or cache_identity(user)
+    return user if identity["role"] in (Profile.ROLE_MENTOR, Profile.ROLE_DIRECTOR) else None
+
+
+class EventStreamRouter:
+    """ASGI app that serves ``reviewer_events`` itself and passes everything else to ``app``."""
+
+    def __init__(self, app):
+        self.app = app
+        self.path = None
+
+    async def __call__(self, scope, receive, send):
+        if self.path is None:
+            self.path = reverse("reviewer_events")
+        if scope["type"] != "http" or scope["path"] != self.path:
+            return await self.app(scope, receive, send)
+
+        cookies = SimpleCookie()
+        for name, value in scope.get("headers", ()):
+            if name == b"cookie":
+                cookies.load(value.decode("latin-1"))
+        session = cookies.get(settings.SESSION_COOKIE_NAME)
+        # thread_sensitive=False: a pooled thread, given back once the session is read.
+        user = session and await sync_to_async(_session_reviewer, thread_sensitive=False)(session.value)
+        if not user:
+            # EventSource gives up on anything but 200; the dashboard stays static.
+            await send({"type": "http.response.start", "status": 403, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/event-stream"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),
+        ]})
+        pump = asyncio.ensure_future(self._pump(stream(user.pk), send))
+        hangup = asyncio.ensure_future(self._disconnected(receive))
+        _, pending = await asyncio.wait({pump, hangup}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _pump(self, events, send):
+        async for chunk in events:
+            await send({"type": "http.response.body", "body": chunk.encode(), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _disconnected(self, receive):
+        while (await receive())["type"] != "http.disconnect":
+            pass
@@ -2,8 +2,13 @@
 from django import forms
 from django.contrib.auth.models import User
 from .models import Profile, LeaveRequest
+from .directory import directory
+from .academic_calendar import working_days
+from .routing import DIRECTOR_THRESHOLD_DAYS, needs_director
+from .services import check_overlaps
 from django.core.exceptions import ValidationError
 import re
+from datetime import date, timedelta
 
 class StudentRegistrationForm(forms.Form):
     full_name = forms.CharField(max_length=150, label="Full Name")
@@ -68,6 +73,8 @@ class ProfileForm(forms.ModelForm):
         }
 
 class LeaveRequestForm(forms.ModelForm):
+    MAX_DAYS = 366  # longest leave a student can request; bounds the calendar years a check loads
+
     class Meta:
         model = LeaveRequest
         fields = ['leave_type', 'start_date', 'end_date', 'reason', 'mentor']
@@ -77,24 +84,14 @@ class LeaveRequestForm(forms.ModelForm):
             'reason': forms.Textarea(attrs={'rows': 4}),
         }
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, student=None, **kwargs):
         super().__init__(*args, **kwargs)
-        # Restrict mentor dropdown ONLY to mentors you created
-        allowed_mentors = [
-            "bharathi.mca@suranacollege.edu.in",
-            "chandan.mca@suranacollege.edu.in",
-            "hemaprabha.mca@suranacollege.edu.in",
-            "sujay.mca@suranacollege.edu.in",
-            "bhavana.mca@suranacollege.edu.in",
-            "manikantan.mca@suranacollege.edu.in",
-            "naveen.mca@suranacollege.edu.in",
-            "priyanka.mca@suranacollege.edu.in"
-        ]
-        self.fields['mentor'].queryset = User.objects.filter(
-            profile__role=Profile.ROLE_MENTOR,
-            email__in=allowed_mentors
-        )
-        self.fields['mentor'].label_from_instance = lambda obj: obj.first_name.capitalize()
+        self.student = student
+        # Choices come from the in-memory staff directory; the queryset is
+        # only hit to resolve the submitted mentor on POST.
+        mentors = directory.mentors()
+        self.fields['mentor'].queryset = User.objects.filter(pk__in=[m.pk for m in mentors])
+        self.fields['mentor'].choices = [("", "Any available mentor")] + [(m.pk, m.name.capitalize()) for m in mentors]
 
 
     def clean_reason(self):
@@ -109,14 +106,85 @@ class LeaveRequestForm(forms.ModelForm):
         end = cleaned_data.get("end_date")
         mentor = cleaned_data.get("mentor")
 
-        if start and end:
-            duration_days = (end - start).days + 1
+        if start and end and start > end:
+            raise ValidationError("End date cannot be before the start date.")
+
+        if start and end and (end - start).days >= self.MAX_DAYS:
+            raise ValidationError(f"A leave can span at most {self.MAX_DAYS} days.")
+
+        if start and end and not working_days(start, end):
+            raise ValidationError("The selected dates are all holidays or weekends.")
+
+        # Short leaves without a mentor are routed to the mentor pool by core.routing.
+        if start and end and mentor and needs_director(start, end):
+            raise ValidationError(
+                f"For leave > {DIRECTOR_THRESHOLD_DAYS} working days, mentor should not be selected (goes to director)."
+            )
 
-            if duration_days <= 2:
-                if not mentor:
-                    raise ValidationError("For leave ≤ 2 days, you must select a mentor.")
-            else:
-                if mentor:
-                    raise ValidationError("For leave > 2 days, mentor should not be selected (goes to director).")
+        if start and end and self.student is not None:
+            # services.submit_leave checks again under the write lock.
+            check_overlaps(self.student, start, end)
 
         return cleaned_data
+
+
+class LeaveExportForm(forms.Form):
+    format = forms.ChoiceField(choices=[("csv", "CSV"), ("jsonl", "JSON Lines")], required=False)
+    start = forms.DateField(required=False)
+    end = forms.DateField(required=False)
+    status = forms.ChoiceField(choices=[("", "Any")] + LeaveRequest.STATUS_CHOICES, required=False)
+    approver = forms.IntegerField(required=False, min_value=1)
+    archive = forms.BooleanField(required=False)  # also export archived leaves
+
+    def clean(self):
+        cleaned = super().clean()
+        start, end = cleaned.get("start"), cleaned.get("end")
+        if start and end and start > end:
+            raise ValidationError("Start date must be on or before the end date.")
+        return cleaned
+
+
+class AbsenceCalendarForm(forms.Form):
+    MAX_DAYS = 200  # a semester plus change
+
+    start = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    end = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    course = forms.CharField(max_length=10, required=False)
+    semester = forms.IntegerField(required=False, min_value=1)
+
+    def clean(self):
+        cleaned = super().clean()
+        today = date.today()
+        start = cleaned.get("start") or today.replace(day=1)
+        end = cleaned.get("end") or (start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        if start > end:
+            raise ValidationError("Start date must be on or before the end date.")
+        if (end - start).days >= self.MAX_DAYS:
+            raise ValidationError(f"Pick a range of at most {self.MAX_DAYS} days.")
+        cleaned["start"], cleaned["end"] = start, end
+        return cleaned
+
+
+class LeaveSearchForm(forms.Form):
+    q = forms.CharField(max_length=200, required=False, label="Words",
+                        widget=forms.TextInput(attrs={'placeholder': 'Words in the reason or comments'}))
+    status = forms.ChoiceField(choices=[("", "Any status")] + LeaveRequest.STATUS_CHOICES, required=False)
+    approver = forms.TypedChoiceField(coerce=int, empty_value=None, required=False)
+    course = forms.CharField(max_length=10, required=False)
+    semester = forms.IntegerField(required=False, min_value=1)
+    start = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    end = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    page = forms.IntegerField(required=False, min_value=1)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['approver'].choices = [("", "Any approver")] + [
+            (entry.pk, entry.name.capitalize()) for entry in directory.directors() + directory.mentors()
+        ]
+
+    def clean(self):
+        cleaned = super().clean()
+        start, end = cleaned.get("start"), cleaned.get("end")
+        if start and end and start > end:
+            raise ValidationError("Start date must be on or before the end date.")
+        return cleaned
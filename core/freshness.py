@@ -0,0 +1,188 @@
+# core/freshness.py
+"""
+Conditional dashboards: ETags and fragment caching keyed on a per-user
+"leave data version".
+
+Every user has a version token in the default cache. After a transaction
+that submits or reviews a leave commits, the token of the leave's student
+and of its approver is replaced with a fresh one. Tokens are random rather
+than counters, so a token that was evicted and regenerated can never match
+an old one.
+
+``conditional_dashboard`` derives the dashboard's ETag from the signed-in
+user id in the session, the cached identity, the leave and calendar versions
+and the session key, so checking ``If-None-Match`` costs the session read
+and cache reads only: no user, profile or leave query and no template. A
+page with flash messages waiting is always rendered, and without an ETag,
+since the messages are shown once and no version changes with them.
+
+``fragment`` caches the rendered rows of a dashboard under the same versions
+in the ``fragments`` cache. Rows of outdated versions are never read again
+and expire or are culled once ``MAX_ENTRIES`` is reached.
+
+A bump in one worker has to reach every other one, so both caches must be
+shared between processes (see ``CACHES`` in settings). With a local-memory
+backend, ``caching_enabled()`` is false: dashboards get no ETags and
+fragments are rendered every time.
+
+Whatever is cached or tagged under a version must have been read at that
+version or later. A read replica may still lag behind the bump, so
+fragments are rendered from the primary, and the conditional dashboards
+don't use ``replica_reads``.
+"""
+import hashlib
+import threading
+import uuid
+from collections import Counter
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import SESSION_KEY
+from django.contrib.messages import get_messages
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from .academic_calendar import VERSION_KEY as CALENDAR_VERSION_KEY
+from .auth import cached_identity
+from .replicas import reading_from
+
+FRAGMENT_CACHE = "fragments"
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def stats():
+    """Hit/miss counts of ETags and fragments in this process."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def caching_enabled():
+    """Whether the caches holding versions and fragments are shared by every worker."""
+    return not any(isinstance(caches[alias], LocMemCache) for alias in ("default", FRAGMENT_CACHE))
+
+
+def _version_key(user_id):
+    return f"core:leave-version:{user_id}"
+
+
+def _new_token():
+    return uuid.uuid4().hex[:16]
+
+
+def versions(user_id):
+    """(leave data version of ``user_id``, calendar version)."""
+    key = _version_key(user_id)
+    found = cache.get_many([key, CALENDAR_VERSION_KEY])
+    if key not in found:
+        cache.add(key, _new_token(), None)
+        found[key] = cache.get(key)
+    return found[key], found.get(CALENDAR_VERSION_KEY)
+
+
+def bump(user_ids):
+    """Give ``user_ids`` new versions once the current transaction commits."""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if user_ids:
+        transaction.on_commit(
+            lambda: cache.set_many({_version_key(user_id): _new_token() for user_id in user_ids}, None)
+        )
+
+
+def _etag_parts(request):
+    """What a dashboard ETag depends on besides the identity, or None if the page must be rendered."""
+    user_id = request.session.get(SESSION_KEY)
+    if user_id is None or len(get_messages(request)):
+        return None
+    # Read before the view runs: the ETag may then be older than the page
+    # it's sent with, never newer.
+    return [user_id, *versions(int(user_id)), request.session.session_key, request.get_full_path()]
+
+
+def _etag(name, parts):
+    identity = cached_identity(int(parts[0]))
+    if identity is None:
+        return None
+    parts = [name, identity["role"], identity["name"], *parts]
+    return '"%s"' % hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def _finish(response, etag):
+    if etag and response.status_code in (200, 304):
+        response.headers.setdefault("ETag", etag)
+    # Browsers revalidate on every visit, and shared caches keep out.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _not_modified(request, etag):
+    if not etag:
+        return None
+    response = get_conditional_response(request, etag=etag)
+    _count("etag_hit" if response else "etag_miss")
+    return response
+
+
+def conditional_dashboard(view):
+    """Answer a GET of ``view`` with 304 when the user's ETag still matches."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        parts = _etag_parts(request) if request.method == "GET" and caching_enabled() else None
+        etag = parts and _etag(view.__name__, parts)
+        response = _not_modified(request, etag)
+        if response is not None:
+            return _finish(response, etag)
+        response = view(request, *args, **kwargs)
+        # On a first visit the view has just cached the identity.
+        return _finish(response, etag or (parts and _etag(view.__name__, parts)))
+    return wrapper
+
+
+def async_conditional_dashboard(view):
+    """``conditional_dashboard`` for async views."""
+    name = f"async_{view.__name__}"
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        parts = None
+        if request.method == "GET" and caching_enabled():
+            # The session is read from the database.
+            parts = await sync_to_async(_etag_parts)(request)
+        etag = parts and _etag(name, parts)
+        response = _not_modified(request, etag)
+        if response is not None:
+            return _finish(response, etag)
+        response = await view(request, *args, **kwargs)
+        return _finish(response, etag or (parts and _etag(name, parts)))
+    return wrapper
+
+
+def fragment(user_id, name, render):
+    """The HTML ``render()`` returns, cached under ``user_id``'s current versions."""
+    if not caching_enabled():
+        with reading_from(None):
+            return render()
+    key = "core:fragment:{}:{}:{}:{}".format(name, user_id, *versions(user_id))
+    fragments = caches[FRAGMENT_CACHE]
+    html = fragments.get(key)
+    if html is None:
+        _count("fragment_miss")
+        with reading_from(None):
+            html = render()
+        fragments.set(key, html)
+    else:
+        _count("fragment_hit")
+    return html
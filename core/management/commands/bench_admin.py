@@ -0,0 +1,125 @@
+import json
+import statistics
+import time
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from core import bench
+from core.models import ArchivedLeaveRequest, LeaveRequest, Profile
+
+
+# The admin options before the change lists were tuned, for comparison.
+class StockLeaveRequestAdmin(admin.ModelAdmin):
+    list_display = ("student", "leave_type", "start_date", "end_date", "status")
+    list_filter = ("status", "leave_type")
+
+
+class StockArchivedLeaveRequestAdmin(admin.ModelAdmin):
+    list_display = ("id", "student", "leave_type", "start_date", "end_date", "status", "reviewed_at")
+    list_filter = ("status", "leave_type")
+    list_select_related = ("student",)
+
+
+class StockProfileAdmin(admin.ModelAdmin):
+    list_display = ("user", "role", "phone")
+
+
+STOCK = {
+    LeaveRequest: StockLeaveRequestAdmin,
+    ArchivedLeaveRequest: StockArchivedLeaveRequestAdmin,
+    Profile: StockProfileAdmin,
+}
+
+
+class Command(BaseCommand):
+    help = ("Time admin change lists and the leave change form on the seed_data tables, with the tuned "
+            "ModelAdmins against the stock options they replaced")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--json", dest="json_path")
+
+    def handle(self, *args, **opts):
+        leave = (LeaveRequest.objects.filter(student__username__endswith=f"@{bench.BENCH_DOMAIN}")
+                 .order_by("-pk").values("pk", "approver_id", "start_date").first())
+        if leave is None:
+            raise CommandError("No seed data found; run `manage.py seed_data` first.")
+        self.stdout.write(f"{LeaveRequest.objects.count()} hot leaves, "
+                          f"{ArchivedLeaveRequest.objects.count()} archived, {Profile.objects.count()} profiles")
+
+        # (name, model, params or "change" for the change form, whether the stock admin supports it)
+        scenarios = [
+            ("changelist", LeaveRequest, {}, True),
+            ("changelist page 200", LeaveRequest, {"p": 200}, True),
+            ("status filter", LeaveRequest, {"status__exact": LeaveRequest.STATUS_PENDING}, True),
+            ("status + type filters", LeaveRequest,
+             {"status__exact": LeaveRequest.STATUS_REJECTED, "leave_type__exact": LeaveRequest.LEAVE_OTHER}, True),
+            ("approver filter", LeaveRequest, {"approver__id__exact": leave["approver_id"]}, True),
+            ("year", LeaveRequest, {"start_date__year": leave["start_date"].year}, True),
+            ("search", LeaveRequest, {"q": "wedding hospital"}, False),
+            ("change form", LeaveRequest, "change", True),
+            ("profiles", Profile, {}, True),
+        ]
+        if ArchivedLeaveRequest.objects.exists():
+            scenarios.append(("archive changelist", ArchivedLeaveRequest, {}, True))
+
+        results = {}
+        with override_settings(DEBUG=False), transaction.atomic():
+            user = User.objects.create_superuser("bench-admin", "bench-admin@suranacollege.edu.in", None)
+            for name, model, params, stock_ok in scenarios:
+                results[name] = {}
+                variants = {"tuned": admin.site._registry[model]}
+                if stock_ok:
+                    variants["stock"] = STOCK[model](model, admin.site)
+                for variant, model_admin in variants.items():
+                    results[name][variant] = self.measure(model_admin, user, params, leave["pk"], opts["repeat"])
+                self.report(name, results[name])
+            transaction.set_rollback(True)
+
+        if opts["json_path"]:
+            with open(opts["json_path"], "w") as fh:
+                json.dump(results, fh, indent=2)
+
+    def request(self, user, model, params):
+        opts = model._meta
+        request = RequestFactory().get(reverse(f"admin:{opts.app_label}_{opts.model_name}_changelist"),
+                                       params if isinstance(params, dict) else {})
+        request.user = user
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        return request
+
+    def measure(self, model_admin, user, params, leave_pk, repeat):
+        samples, queries = [], []
+        for _ in range(repeat + 1):  # the first run warms caches and is dropped
+            request = self.request(user, model_admin.model, params)
+            with CaptureQueriesContext(connection) as ctx:
+                t0 = time.perf_counter()
+                if params == "change":
+                    response = model_admin.change_view(request, str(leave_pk))
+                else:
+                    response = model_admin.changelist_view(request)
+                response.render()
+                samples.append((time.perf_counter() - t0) * 1000)
+            queries.append(len(ctx.captured_queries))
+            if response.status_code != 200:
+                raise CommandError(f"{model_admin} answered {response.status_code} for {params}")
+        samples, queries = samples[1:], queries[1:]
+        return {**bench.summarize(samples), "queries": round(statistics.mean(queries), 1),
+                "kb": round(len(response.content) / 1024, 1)}
+
+    def report(self, name, result):
+        tuned, stock = result["tuned"], result.get("stock")
+        line = f"{name:24} tuned p50={tuned['p50_ms']:9.2f}ms q={tuned['queries']:5.1f} {tuned['kb']:7.1f}KB"
+        if stock:
+            line += (f" | stock p50={stock['p50_ms']:9.2f}ms q={stock['queries']:5.1f} {stock['kb']:7.1f}KB"
+                     f" | x{stock['p50_ms'] / max(tuned['p50_ms'], 0.001):.1f}")
+        self.stdout.write(line)
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core import bench, counters
+from core.models import Profile
+
+
+class Command(BaseCommand):
+    help = ("Compare reviewer dashboard p50/p99 latency and throughput: sync views through the WSGI "
+            "handler vs sync and async views through the ASGI handler, at several concurrency levels")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated in-flight request counts")
+        parser.add_argument("--requests", type=int, default=400, help="Requests per mode and concurrency level")
+        parser.add_argument("--leaves", type=int, default=20000)
+        parser.add_argument("--json", dest="json_path")
+        parser.add_argument("--without-metrics", action="store_true",
+                            help="Drop the metrics middleware; compare with a run that keeps it to measure "
+                                 "its overhead under each handler")
+
+    def handle(self, *args, **opts):
+        levels = [int(level) for level in opts["concurrency"].split(",")]
+        # Requests run on several threads/connections, so the seeded rows are
+        # committed (unlike the other benchmarks) and deleted afterwards.
+        self.cleanup()
+        results = []
+        try:
+            mentor = self.seed(opts["leaves"])
+            modes = [
+                ("wsgi", self.run_wsgi, reverse("mentor_dashboard")),
+                ("asgi-sync-view", self.run_asgi, reverse("mentor_dashboard")),
+                ("asgi-async-view", self.run_asgi, reverse("async_mentor_dashboard")),
+            ]
+            middleware = settings.MIDDLEWARE
+            if opts["without_metrics"]:
+                middleware = [m for m in middleware if m != bench.METRICS_MIDDLEWARE]
+            with override_settings(DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                                   MIDDLEWARE=middleware):
+                cookies = self.login(mentor)
+                for level in levels:
+                    for mode, run, path in modes:
+                        samples, elapsed = run(path, cookies, level, opts["requests"])
+                        results.append({
+                            "mode": mode,
+                            "metrics": not opts["without_metrics"],
+                            "concurrency": level,
+                            "requests": len(samples),
+                            "req_per_s": round(len(samples) / elapsed, 1),
+                            **bench.summarize(samples),
+                        })
+                        r = results[-1]
+                        self.stdout.write(
+                            f"{mode:16} c={level:<3} p50={r['p50_ms']:8.2f}ms p99={r['p99_ms']:8.2f}ms "
+                            f"{r['req_per_s']:8.1f} req/s"
+                        )
+        finally:
+            self.cleanup()
+        if opts["json_path"]:
+            with open(opts["json_path"], "w") as fh:
+                json.dump(results, fh, indent=2)
+
+    def seed(self, leaves):
+        students = bench.create_users("student", 500, Profile.ROLE_STUDENT)
+        mentors = bench.create_users("mentor", 50, Profile.ROLE_MENTOR)
+        bench.seed_leaves(students, mentors, leaves)
+        # seed_leaves bypasses the signals, so bring this mentor's counters in line.
+        counters.reconcile([mentors[0].pk])
+        return mentors[0]
+
+    def cleanup(self):
+        User.objects.filter(username__endswith=f"@{bench.BENCH_DOMAIN}").delete()
+
+    def login(self, user):
+        client = Client()
+        client.force_login(user)
+        return {key: morsel.value for key, morsel in client.cookies.items()}
+
+    def run_wsgi(self, path, cookies, concurrency, total):
+        local = threading.local()
+
+        def one(_):
+            if not hasattr(local, "client"):
+                local.client = Client()
+                local.client.cookies.load(cookies)
+            t0 = time.perf_counter()
+            response = local.client.get(path)
+            assert response.status_code == 200, response.status_code
+            return (time.perf_counter() - t0) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(one, range(total)))
+        return samples, time.perf_counter() - started
+
+    def run_asgi(self, path, cookies, concurrency, total):
+        client = AsyncClient()
+        client.cookies.load(cookies)
+
+        async def main():
+            gate = asyncio.Semaphore(concurrency)
+
+            async def one():
+                async with gate:
+                    t0 = time.perf_counter()
+                    response = await client.get(path)
+                    assert response.status_code == 200, response.status_code
+                    return (time.perf_counter() - t0) * 1000
+
+            return await asyncio.gather(*(one() for _ in range(total)))
+
+        started = time.perf_counter()
+        samples = asyncio.run(main())
+        return samples, time.perf_counter() - started
@@ -0,0 +1,132 @@
+import json
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from core import bench, freshness, services
+from core.models import LeaveRequest, Profile
+
+DASHBOARDS = {
+    Profile.ROLE_STUDENT: ("student", "student_dashboard"),
+    Profile.ROLE_MENTOR: ("mentor", "mentor_dashboard"),
+    Profile.ROLE_DIRECTOR: ("director", "director_dashboard"),
+}
+# Each mode replays the same visits and writes:
+# render       every page and its rows rendered from the database (the cost before ETags/fragments)
+# fragments    browsers send no If-None-Match, rows come from the fragment cache when unchanged
+# conditional  browsers revalidate with the ETag of their last visit
+MODES = ("render", "fragments", "conditional")
+
+
+class Command(BaseCommand):
+    help = ("Replay dashboard visits by the seed_data accounts, interleaved with leave submissions and reviews, "
+            "with and without ETags and fragment caching; reports latency, queries, 304 and fragment hit rates")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20, help="Seeded accounts per role to sign in as")
+        parser.add_argument("--visits", type=int, default=600)
+        parser.add_argument("--write-every", type=int, default=10,
+                            help="Submit or review a leave after every N visits")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", dest="json_path")
+
+    def handle(self, *args, **opts):
+        users = {role: self.seeded(prefix, opts["users"]) for role, (prefix, _) in DASHBOARDS.items()}
+        rng = random.Random(opts["seed"])
+        everyone = [user for role in DASHBOARDS for user in users[role]]
+        # Busy accounts come back far more often than the rest.
+        visits = rng.choices(everyone, bench.zipf_weights(len(everyone)), k=opts["visits"])
+        roles = {user.pk: role for role, members in users.items() for user in members}
+
+        results = {}
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            for mode in MODES:
+                # Writes are rolled back after each mode, so all three see the same data.
+                with transaction.atomic():
+                    results[mode] = self.run(mode, visits, roles, users, opts)
+                    transaction.set_rollback(True)
+                self.report(mode, results[mode], results["render"])
+
+        if opts["json_path"]:
+            with open(opts["json_path"], "w") as fh:
+                json.dump({"visits": opts["visits"], "write_every": opts["write_every"], "modes": results},
+                          fh, indent=2)
+
+    def seeded(self, prefix, count):
+        users = list(User.objects.filter(
+            username__in=[f"{prefix}{i}@{bench.BENCH_DOMAIN}" for i in range(count)]
+        ).order_by("pk"))
+        if not users:
+            raise CommandError("No seed data found; run `manage.py seed_data` first.")
+        return users
+
+    def run(self, mode, visits, roles, users, opts):
+        caches[freshness.FRAGMENT_CACHE].clear()
+        freshness.reset_stats()
+        rng = random.Random(opts["seed"])
+        clients, etags = {}, {}
+        samples, queries, not_modified = [], [], 0
+        for n, user in enumerate(visits):
+            if n and n % opts["write_every"] == 0:
+                self.write(rng, users, n)
+            if user.pk not in clients:
+                clients[user.pk] = Client()
+                clients[user.pk].force_login(user)
+            if mode == "render":
+                caches[freshness.FRAGMENT_CACHE].clear()
+            headers = {"If-None-Match": etags[user.pk]} if mode == "conditional" and user.pk in etags else {}
+            with CaptureQueriesContext(connection) as ctx:
+                t0 = time.perf_counter()
+                response = clients[user.pk].get(reverse(DASHBOARDS[roles[user.pk]][1]), headers=headers)
+                samples.append((time.perf_counter() - t0) * 1000)
+            queries.append(len(ctx.captured_queries))
+            if response.status_code not in (200, 304):
+                raise CommandError(f"{user.username} got {response.status_code}")
+            not_modified += response.status_code == 304
+            etags[user.pk] = response.get("ETag")
+
+        stats = freshness.stats()
+        fragments = stats.get("fragment_hit", 0) + stats.get("fragment_miss", 0)
+        return {
+            **bench.summarize(samples),
+            "mean_ms": round(statistics.mean(samples), 3),
+            "queries_per_request": round(statistics.mean(queries), 2),
+            "not_modified_rate": round(not_modified / len(visits), 3),
+            "fragment_hit_rate": round(stats.get("fragment_hit", 0) / fragments, 3) if fragments else 0.0,
+        }
+
+    def write(self, rng, users, n):
+        """Submit a leave or review a pending one, committing its callbacks so versions move."""
+        with TestCase.captureOnCommitCallbacks(execute=True):
+            approver = rng.choice(users[Profile.ROLE_MENTOR] + users[Profile.ROLE_DIRECTOR])
+            pending = (LeaveRequest.objects.filter(approver=approver, status=LeaveRequest.STATUS_PENDING)
+                       .order_by("-created_at").first())
+            if pending and rng.random() < 0.5:
+                services.review_leave(pending, LeaveRequest.STATUS_APPROVED, "Benchmark")
+                return
+            # Future weeks, clear of the seeded history.
+            start = date(2031, 1, 6) + timedelta(weeks=n)
+            services.submit_leave(LeaveRequest(
+                student=rng.choice(users[Profile.ROLE_STUDENT]), approver=approver,
+                leave_type=LeaveRequest.LEAVE_PERSONAL, start_date=start, end_date=start,
+                reason="Benchmark leave request",
+            ))
+
+    def report(self, mode, r, baseline):
+        gain = baseline["mean_ms"] / max(r["mean_ms"], 0.001)
+        self.stdout.write(
+            f"{mode:12} p50={r['p50_ms']:8.2f}ms p95={r['p95_ms']:8.2f}ms p99={r['p99_ms']:8.2f}ms "
+            f"mean={r['mean_ms']:8.2f}ms q/req={r['queries_per_request']:5.2f} "
+            f"304={r['not_modified_rate']:6.1%} fragment hits={r['fragment_hit_rate']:6.1%} "
+            f"x{gain:.1f} vs render"
+        )
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+import resource
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core import bench, events
+from core.models import Profile
+
+# Distinct from the seed_data accounts, which share BENCH_DOMAIN.
+PREFIX = "eventsmentor"
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:  # not Linux; the peak is the best available
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Command(BaseCommand):
+    help = ("Hold many idle reviewer event streams open against the ASGI application in this process and "
+            "report memory per stream, idle CPU and publish-to-browser latency")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--streams", type=int, default=2000)
+        parser.add_argument("--mentors", type=int, default=200, help="Streams are spread across this many reviewers")
+        parser.add_argument("--events", type=int, default=200, help="Events published during the fan-out phase")
+        parser.add_argument("--idle", type=float, default=20, help="Seconds to measure idle CPU for")
+        parser.add_argument("--keepalive", type=float, default=15)
+        parser.add_argument("--django-handler", action="store_true",
+                            help="Open the streams through Django's ASGI handler instead of leave_project.asgi, "
+                                 "for comparison")
+        parser.add_argument("--json", dest="json_path")
+
+    def handle(self, *args, **opts):
+        # Streams authenticate through real sessions on other threads, so the
+        # reviewers are committed (like bench_asgi) and removed afterwards.
+        self.cleanup()
+        self.session_keys = []
+        try:
+            mentors = bench.create_users(PREFIX, opts["mentors"], Profile.ROLE_MENTOR)
+            cookies = [self.session_cookie(mentor) for mentor in mentors]
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                                   EVENTS_KEEPALIVE_SECONDS=opts["keepalive"],
+                                   EVENTS_MAX_STREAM_SECONDS=24 * 3600):
+                result = asyncio.run(self.run(mentors, cookies, opts))
+        finally:
+            self.cleanup()
+
+        self.stdout.write(
+            f"{result['streams']} streams opened in {result['open_seconds']}s, "
+            f"{result['kb_per_stream']} KB RSS per stream, "
+            f"idle CPU {result['idle_cpu_percent']}% over {opts['idle']:.0f}s\n"
+            f"{result['events']} events -> {result['deliveries']}/{result['expected_deliveries']} deliveries: "
+            f"p50={result.get('p50_ms', 0)}ms p99={result.get('p99_ms', 0)}ms"
+        )
+        if opts["json_path"]:
+            with open(opts["json_path"], "w") as fh:
+                json.dump(result, fh, indent=2)
+
+    def session_cookie(self, user):
+        client = Client()
+        client.force_login(user)
+        morsel = client.cookies[settings.SESSION_COOKIE_NAME]
+        self.session_keys.append(morsel.value)
+        return f"{settings.SESSION_COOKIE_NAME}={morsel.value}".encode()
+
+    def cleanup(self):
+        Session.objects.filter(session_key__in=getattr(self, "session_keys", [])).delete()
+        User.objects.filter(username__startswith=PREFIX, username__endswith=f"@{bench.BENCH_DOMAIN}").delete()
+
+    async def run(self, mentors, cookies, opts):
+        from leave_project import asgi
+
+        app = asgi.django_application if opts["django_handler"] else asgi.application
+        path = reverse("reviewer_events")
+        total = opts["streams"]
+        opened = asyncio.Event()
+        state = {"open": 0, "failed": 0}
+        latencies = []
+
+        async def open_stream(cookie):
+            disconnected = asyncio.Event()
+            first = True
+
+            async def receive():
+                nonlocal first
+                if first:
+                    first = False
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                if message["type"] == "http.response.start" and message["status"] != 200:
+                    state["failed"] += 1
+                    if state["open"] + state["failed"] == total:
+                        opened.set()
+                if message["type"] != "http.response.body" or not message.get("body"):
+                    return
+                body = message["body"]
+                if body.startswith(b"retry:"):
+                    state["open"] += 1
+                    if state["open"] + state["failed"] == total:
+                        opened.set()
+                elif b'"bench"' in body:
+                    data = json.loads(body.split(b"data: ", 1)[1])
+                    latencies.append((time.perf_counter() - data["sent"]) * 1000)
+
+            scope = {
+                "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+                "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+                "query_string": b"", "root_path": "",
+                "headers": [(b"host", b"testserver"), (b"cookie", cookie)],
+                "client": ("127.0.0.1", 0), "server": ("testserver", 80),
+            }
+            await app(scope, receive, send)
+
+        rss_before = _rss_bytes()
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(open_stream(cookies[i % len(cookies)])) for i in range(total)]
+        await opened.wait()
+        open_seconds = time.perf_counter() - started
+        if state["failed"]:
+            raise CommandError(f"{state['failed']} streams were refused")
+        rss_after = _rss_bytes()
+
+        cpu = time.process_time()
+        await asyncio.sleep(opts["idle"])
+        idle_cpu = (time.process_time() - cpu) / opts["idle"] * 100
+
+        # Publish from a worker thread, as a request's on_commit hook would.
+        loop = asyncio.get_running_loop()
+        per_mentor = [len(range(i, total, len(mentors))) for i in range(len(mentors))]
+        expected = 0
+        for n in range(opts["events"]):
+            index = n % len(mentors)
+            expected += per_mentor[index]
+            event = {"pending": 0, "bench": n, "sent": time.perf_counter()}
+            await loop.run_in_executor(None, events.broker.publish, mentors[index].pk, event)
+            await asyncio.sleep(0.005)
+        deadline = time.perf_counter() + 10
+        while len(latencies) < expected and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return {
+            "streams": total,
+            "handler": "django" if opts["django_handler"] else "router",
+            "mentors": len(mentors),
+            "open_seconds": round(open_seconds, 2),
+            "kb_per_stream": round((rss_after - rss_before) / total / 1024, 1),
+            "idle_cpu_percent": round(idle_cpu, 2),
+            "events": opts["events"],
+            "expected_deliveries": expected,
+            "deliveries": len(latencies),
+            **(bench.summarize(latencies) if latencies else {}),
+        }
@@ -0,0 +1,66 @@
+import json
+import resource
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import bench, exports
+from core.models import Profile, LeaveRequest
+
+
+class Command(BaseCommand):
+    help = "Check that export memory stays flat as the number of exported rows grows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10000,100000",
+                            help="Comma-separated row counts, e.g. 10000,100000,1000000")
+        parser.add_argument("--format", choices=exports.FORMATS, default="csv")
+        parser.add_argument("--json", dest="json_path")
+
+    def handle(self, *args, **opts):
+        sizes = sorted(int(size) for size in opts["sizes"].split(","))
+        results = []
+        # Seeded rows are rolled back at the end; each size tops up the last.
+        with transaction.atomic():
+            students = bench.create_users("student", 2000, Profile.ROLE_STUDENT)
+            approvers = bench.create_users("mentor", 8, Profile.ROLE_MENTOR)
+            for size in sizes:
+                missing = size - LeaveRequest.objects.count()
+                if missing > 0:
+                    bench.seed_leaves(students, approvers, missing, seed=size)
+                results.append(self.measure(size, opts["format"]))
+                r = results[-1]
+                self.stdout.write(
+                    f"{size:>9} rows: {r['seconds']:.1f}s ({r['rows_per_s']:.0f} rows/s), "
+                    f"peak python heap {r['peak_heap_mb']:.2f} MB, max RSS {r['max_rss_mb']:.0f} MB"
+                )
+            transaction.set_rollback(True)
+
+        growth = results[-1]["peak_heap_mb"] / max(results[0]["peak_heap_mb"], 0.01)
+        style = self.style.SUCCESS if growth < 1.5 else self.style.ERROR
+        self.stdout.write(style(f"Peak heap grew {growth:.2f}x from {sizes[0]} to {sizes[-1]} rows"))
+        if opts["json_path"]:
+            with open(opts["json_path"], "w") as fh:
+                json.dump(results, fh, indent=2)
+
+    def measure(self, size, fmt):
+        qs = exports.export_queryset()
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        written = 0
+        for chunk in exports.render(exports.export_rows(qs), fmt):
+            written += len(chunk)
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            "rows": size,
+            "seconds": round(elapsed, 2),
+            "rows_per_s": round(size / elapsed, 1),
+            "bytes": written,
+            "peak_heap_mb": round(peak / 2**20, 3),
+            # ru_maxrss is KiB on Linux and only ever grows; tracked for context.
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        }
@@ -0,0 +1,76 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core import bench
+from core.dashboards import reviewer_history_page, reviewer_leaves, reviewer_stats
+from core.models import Profile, LeaveRequest
+
+
+class Command(BaseCommand):
+    help = "Seed a large LeaveRequest table and report query plans and timings for every dashboard query"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200_000)
+        parser.add_argument("--students", type=int, default=5_000)
+        parser.add_argument("--mentors", type=int, default=8)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--json", dest="json_path", help="Also write the results to this file")
+        parser.add_argument("--keep", action="store_true", help="Commit the seeded rows instead of rolling back")
+
+    def handle(self, *args, **opts):
+        with transaction.atomic():
+            t0 = time.perf_counter()
+            students = bench.create_users("student", opts["students"], Profile.ROLE_STUDENT)
+            mentors = bench.create_users("mentor", opts["mentors"], Profile.ROLE_MENTOR)
+            director = bench.create_users("director", 1, Profile.ROLE_DIRECTOR)[0]
+            # A Zipf-like skew so one reviewer carries most of the history.
+            approvers = [director] + mentors
+            weights = [1 / (rank + 1) for rank in range(len(approvers))]
+            bench.seed_leaves(students, approvers, opts["rows"], weights)
+            self.stdout.write(f"Seeded {opts['rows']} leaves in {time.perf_counter() - t0:.1f}s")
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+            results = self.run_queries(director, students[0], opts["repeat"])
+            if not opts["keep"]:
+                transaction.set_rollback(True)
+
+        failures = 0
+        for name, result in results.items():
+            style = self.style.ERROR if result["problems"] else self.style.SUCCESS
+            failures += bool(result["problems"])
+            self.stdout.write(style(f"{name}: p50={result['p50_ms']}ms p99={result['p99_ms']}ms"))
+            for line in result["plan"]:
+                self.stdout.write(f"    {line}")
+        if opts["json_path"]:
+            with open(opts["json_path"], "w") as fh:
+                json.dump(results, fh, indent=2)
+        if failures:
+            self.stdout.write(self.style.ERROR(f"{failures} queries still scan the table or sort in a temp B-tree"))
+
+    def run_queries(self, reviewer, student, repeat):
+        _, deep_cursor = reviewer_history_page(reviewer, LeaveRequest.STATUS_APPROVED, page_size=5000)
+        queries = {
+            "reviewer_stats": lambda: reviewer_stats(reviewer),
+            "reviewer_pending": lambda: list(reviewer_leaves(reviewer, LeaveRequest.STATUS_PENDING)[:200]),
+            "reviewer_history_first_page": lambda: reviewer_history_page(reviewer, LeaveRequest.STATUS_APPROVED),
+            "reviewer_history_deep_page": lambda: reviewer_history_page(
+                reviewer, LeaveRequest.STATUS_APPROVED, deep_cursor
+            ),
+            "student_latest": lambda: list(student.leaves.order_by("-created_at")[:10]),
+            "student_pending_count": lambda: student.leaves.filter(status=LeaveRequest.STATUS_PENDING).count(),
+        }
+        results = {}
+        for name, fn in queries.items():
+            with bench.capture_statements() as statements:
+                fn()
+            plan = [line for sql, params in statements for line in bench.explain(sql, params)]
+            results[name] = {
+                **bench.summarize(bench.timed(fn, repeat)),
+                "plan": plan,
+                "problems": bench.plan_problems(plan),
+            }
+        return results
@@ -0,0 +1,101 @@
+import json
+import random
+import statistics
+from collections import Counter, deque
+
+from django.core.management.base import BaseCommand
+
+from core import bench
+from core.routing import POLICIES
+
+
+class FirstApproverPolicy:
+    """The pre-routing behaviour: every director leave goes to the first director."""
+    name = "first_approver"
+    needs_counts = False
+
+    def choose(self, counts, pool, student_id):
+        return pool[0]
+
+
+class Command(BaseCommand):
+    help = "Replay a synthetic semester of submissions through each routing policy and compare queue skew and waits"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=120)
+        parser.add_argument("--students", type=int, default=600)
+        parser.add_argument("--mentors", type=int, default=8)
+        parser.add_argument("--directors", type=int, default=3)
+        parser.add_argument("--daily", type=float, default=20, help="Mean submissions per day outside exam weeks")
+        parser.add_argument("--self-select", type=float, default=0.5,
+                            help="Share of short leaves where the student picks a mentor")
+        parser.add_argument("--seed", type=int, default=7)
+        parser.add_argument("--json", dest="json_path")
+
+    def handle(self, *args, **opts):
+        scenarios = {"baseline": (FirstApproverPolicy, 1.0)}
+        for name, policy in POLICIES.items():
+            scenarios[name] = (policy, opts["self_select"])
+
+        results = {}
+        for name, (policy, self_select) in scenarios.items():
+            results[name] = self.simulate(policy, self_select, opts)
+            r = results[name]
+            self.stdout.write(
+                f"{name:18} skew mean={r['mean_skew']:6.2f} max={r['max_skew']:4d}  "
+                f"wait mean={r['mean_wait_days']:5.2f}d p95={r['p95_wait_days']:5.1f}d  "
+                f"backlog at end={r['final_backlog']}"
+            )
+        if opts["json_path"]:
+            with open(opts["json_path"], "w") as fh:
+                json.dump(results, fh, indent=2)
+
+    def simulate(self, policy_cls, self_select, opts):
+        # Same seed for every policy so they replay the identical semester.
+        rng = random.Random(opts["seed"])
+        mentors = list(range(1, opts["mentors"] + 1))
+        directors = list(range(1000, 1000 + opts["directors"]))
+        capacity = {pk: rng.randint(2, 6) for pk in mentors}
+        capacity.update({pk: rng.randint(4, 8) for pk in directors})
+        # Students favour a few mentors heavily when they get to choose.
+        popularity = [1 / (rank + 1) for rank in range(len(mentors))]
+
+        pools = {"MENTOR": (mentors, policy_cls()), "DIRECTOR": (directors, policy_cls())}
+        pool_of = {**dict.fromkeys(mentors, "MENTOR"), **dict.fromkeys(directors, "DIRECTOR")}
+        queues = {pk: deque() for pk in pool_of}
+        pending = Counter()  # stands in for the pending LeaveCounter rows
+        waits, skews = [], []
+
+        for day in range(opts["days"]):
+            exam_week = (day // 7) in (6, 14)
+            arrivals = int(rng.expovariate(1 / (opts["daily"] * (3 if exam_week else 1))))
+            for _ in range(arrivals):
+                student_id = rng.randrange(opts["students"])
+                if rng.random() < 0.3:
+                    ids, policy = pools["DIRECTOR"]
+                    approver = policy.choose(pending, ids, student_id)
+                elif rng.random() < self_select:
+                    approver = rng.choices(mentors, popularity)[0]
+                else:
+                    ids, policy = pools["MENTOR"]
+                    approver = policy.choose(pending, ids, student_id)
+                queues[approver].append(day)
+                pending[approver] += 1
+
+            for ids, _ in pools.values():
+                depths = [len(queues[pk]) for pk in ids]
+                skews.append(max(depths) - min(depths))
+
+            for pk, queue in queues.items():
+                for _ in range(min(capacity[pk], len(queue))):
+                    waits.append(day - queue.popleft())
+                    pending[pk] -= 1
+
+        return {
+            "mean_skew": round(statistics.mean(skews), 2),
+            "max_skew": max(skews),
+            "mean_wait_days": round(statistics.mean(waits), 2) if waits else 0.0,
+            "p95_wait_days": bench.percentile(waits, 95),
+            "reviewed": len(waits),
+            "final_backlog": sum(len(q) for q in queues.values()),
+        }
@@ -0,0 +1,83 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from core import bench, search
+from core.archive import leave_models
+from core.models import LeaveRequest
+
+# (words, filters) a director might look for among the seed_data leaves.
+SEARCHES = [
+    ("wedding", {}),
+    ("fever", {"status": LeaveRequest.STATUS_APPROVED}),
+    ("hospital mysore", {}),
+    ("hackathon", {"course": "MCA"}),
+    ("medical certificate", {}),
+    ("diwali", {"period": 90}),
+    ("attendance", {"status": LeaveRequest.STATUS_REJECTED}),
+    ("interview pune", {"approver": True}),
+    ("accident", {"page": 3}),
+    ("passport verification", {"period": 365}),
+]
+
+
+class Command(BaseCommand):
+    help = ("Time director leave searches through the FTS5 index against the LIKE scans they replace, on the "
+            "seed_data leaves (hot and archived)")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument("--json", dest="json_path")
+
+    def handle(self, *args, **opts):
+        latest = (LeaveRequest.objects.filter(student__username__endswith=f"@{bench.BENCH_DOMAIN}")
+                  .order_by("-start_date").values_list("start_date", "approver_id").first())
+        if latest is None:
+            raise CommandError("No leaves found; run `manage.py seed_data` first.")
+        last_day, approver = latest
+
+        results = {}
+        for text, options in SEARCHES:
+            filters = {
+                "status": options.get("status"),
+                "course": options.get("course"),
+                "approver": approver if options.get("approver") else None,
+                "start": last_day - timedelta(days=options["period"]) if "period" in options else None,
+                "end": last_day if "period" in options else None,
+            }
+            page = options.get("page", 1)
+            fts_rows, _ = search.search(text, page=page, **filters)
+            scan_rows = self.scan(text, page, **filters)
+            fts = bench.summarize(bench.timed(lambda: search.search(text, page=page, **filters), opts["repeat"]))
+            scan = bench.summarize(bench.timed(lambda: self.scan(text, page, **filters), opts["repeat"]))
+            label = " ".join([repr(text), *(f"{k}={v}" for k, v in options.items())])
+            results[label] = {"fts": fts, "scan": scan, "fts_rows": len(fts_rows), "scan_rows": len(scan_rows)}
+            self.stdout.write(
+                f"{label:42} fts p50={fts['p50_ms']:8.2f}ms p95={fts['p95_ms']:8.2f}ms | "
+                f"scan p50={scan['p50_ms']:9.2f}ms p95={scan['p95_ms']:9.2f}ms | "
+                f"x{scan['p50_ms'] / max(fts['p50_ms'], 0.001):.0f} ({len(fts_rows)}/{len(scan_rows)} rows)"
+            )
+
+        if opts["json_path"]:
+            with open(opts["json_path"], "w") as fh:
+                json.dump(results, fh, indent=2)
+
+    def scan(self, text, page, status=None, approver=None, course=None, start=None, end=None):
+        """The same page found with icontains on both tables, newest first, since LIKE can't rank."""
+        words = search.WORD_RE.findall(text.lower())
+        condition = Q()
+        for word in words:
+            condition &= Q(reason__icontains=word) | Q(review_comments__icontains=word)
+        filters = {key: value for key, value in {
+            "status": status, "approver_id": approver, "course": course,
+            "end_date__gte": start, "start_date__lte": end,
+        }.items() if value}
+        limit = page * search.PAGE_SIZE + 1
+        rows = [
+            row for model in leave_models(True)
+            for row in model.objects.filter(condition, **filters).order_by("-created_at")[:limit]
+        ]
+        rows.sort(key=lambda row: row.created_at, reverse=True)
+        return rows[(page - 1) * search.PAGE_SIZE:limit]
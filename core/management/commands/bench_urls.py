@@ -0,0 +1,248 @@
+import json
+import statistics
+import subprocess
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from core import bench, urls
+from core.models import LeaveRequest, Profile
+
+ANONYMOUS = None
+STAFF = "staff"
+
+
+class Route:
+    """One URL to drive: ``build(i)`` returns the (path, data) of the i-th request."""
+
+    def __init__(self, name, role, build, method="get", fresh_login=False):
+        self.name = name
+        self.role = role
+        self.build = build
+        self.method = method
+        self.fresh_login = fresh_login
+
+    @property
+    def label(self):
+        return f"{self.name} {self.method.upper()}"
+
+
+class Command(BaseCommand):
+    help = ("Sign in as each role and drive every route in core/urls.py in-process against the seed_data "
+            "accounts; reports p50/p95/p99 latency, queries per request and throughput")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=50, help="Requests per route")
+        parser.add_argument("--only", help="Comma-separated route names to run")
+        parser.add_argument("--json", dest="json_path", help="Write results here")
+        parser.add_argument("--compare", help="Earlier --json output to diff p50 latency against")
+        parser.add_argument("--threshold", type=float, default=20, help="p50 regression (%%) to flag in --compare")
+        parser.add_argument("--without-metrics", action="store_true",
+                            help="Drop the metrics middleware; run once without and once with --compare "
+                                 "to measure its overhead")
+
+    def handle(self, *args, **opts):
+        users = self.seeded_users()
+        routes = self.routes(users, opts["repeat"])
+        missing = {p.name for p in urls.urlpatterns} - {route.name for route in routes}
+        if missing:
+            raise CommandError(f"No benchmark defined for: {', '.join(sorted(missing))}")
+        if opts["only"]:
+            wanted = set(opts["only"].split(","))
+            routes = [route for route in routes if route.name in wanted]
+
+        middleware = settings.MIDDLEWARE
+        if opts["without_metrics"]:
+            middleware = [m for m in middleware if m != bench.METRICS_MIDDLEWARE]
+        results = {}
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                               MIDDLEWARE=middleware):
+            # Every write the driver makes (new leaves, reviews, accounts,
+            # sessions) is rolled back, so runs are repeatable on the same seed.
+            with transaction.atomic():
+                users[STAFF] = User.objects.create_user(f"staff@{bench.BENCH_DOMAIN}", is_staff=True)
+                clients = {role: self.client_for(user) for role, user in users.items()}
+                for route in routes:
+                    results[route.label] = self.drive(route, clients, users, opts["repeat"])
+                    self.report(route.label, results[route.label])
+                transaction.set_rollback(True)
+
+        output = {
+            "meta": {
+                "commit": self.git_commit(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "leaves": LeaveRequest.objects.count(),
+                "repeat": opts["repeat"],
+                "metrics": not opts["without_metrics"],
+            },
+            "routes": results,
+        }
+        if opts["compare"]:
+            self.compare(opts["compare"], results, opts["threshold"])
+        if opts["json_path"]:
+            with open(opts["json_path"], "w") as fh:
+                json.dump(output, fh, indent=2)
+
+    def seeded_users(self):
+        users = {
+            role: User.objects.filter(username=f"{prefix}0@{bench.BENCH_DOMAIN}").first()
+            for role, prefix in ((Profile.ROLE_STUDENT, "student"), (Profile.ROLE_MENTOR, "mentor"),
+                                 (Profile.ROLE_DIRECTOR, "director"))
+        }
+        if None in users.values():
+            raise CommandError("No seed data found; run `manage.py seed_data` first.")
+        return users
+
+    def client_for(self, user):
+        # Server errors are counted per route instead of aborting the run.
+        client = Client(raise_request_exception=False)
+        if user is not ANONYMOUS:
+            client.force_login(user)
+        return client
+
+    def routes(self, users, repeat):
+        student, mentor, director = (users[r] for r in (Profile.ROLE_STUDENT, Profile.ROLE_MENTOR,
+                                                        Profile.ROLE_DIRECTOR))
+        pending = list(
+            LeaveRequest.objects.filter(approver=mentor, status=LeaveRequest.STATUS_PENDING)
+            .order_by("pk").values_list("pk", flat=True)[:repeat * 12]
+        )
+        if not pending:
+            raise CommandError(f"{mentor.email} has no pending leaves to review.")
+
+        def pending_id(i):
+            return pending[i % len(pending)]
+
+        def monday(i):
+            # Future weeks, clear of the seeded history, so overlap checks pass.
+            return date(2031, 1, 6) + timedelta(weeks=i)
+
+        latest = LeaveRequest.objects.order_by("-start_date").values_list("start_date", flat=True).first()
+        day = latest or date.today()
+        S, M, D = Profile.ROLE_STUDENT, Profile.ROLE_MENTOR, Profile.ROLE_DIRECTOR
+        return [
+            Route("index", ANONYMOUS, lambda i: (reverse("index"), None)),
+            Route("main_dashboard", S, lambda i: (reverse("main_dashboard"), None)),
+            Route("student_signin", ANONYMOUS, lambda i: (reverse("student_signin"), {
+                "email": student.email, "password": bench.SEED_PASSWORD,
+            }), "post"),
+            Route("student_register", ANONYMOUS, lambda i: (reverse("student_register"), {
+                "full_name": f"Bench Register {i}",
+                "email": f"benchreg{i}.mca23@suranacollege.edu.in",
+                "mobile": "9000000000",
+                "password": bench.SEED_PASSWORD,
+                "confirm_password": bench.SEED_PASSWORD,
+            }), "post"),
+            Route("student_dashboard", S, lambda i: (reverse("student_dashboard"), None)),
+            Route("student_history", S, lambda i: (reverse("student_history"), {"archive": 1})),
+            Route("edit_profile", S, lambda i: (reverse("edit_profile"), None)),
+            Route("request_leave", S, lambda i: (reverse("request_leave"), {
+                "leave_type": LeaveRequest.LEAVE_PERSONAL,
+                "start_date": monday(i).isoformat(),
+                "end_date": monday(i).isoformat(),
+                "reason": "Benchmark leave request",
+            }), "post"),
+            Route("leave_working_days", S, lambda i: (reverse("leave_working_days"), {
+                "start": monday(i).isoformat(), "end": (monday(i) + timedelta(days=4)).isoformat(),
+            })),
+            Route("staff_signin", ANONYMOUS, lambda i: (reverse("staff_signin"), {
+                "role": Profile.ROLE_MENTOR, "email": mentor.email, "password": bench.SEED_PASSWORD,
+            }), "post"),
+            Route("mentor_dashboard", M, lambda i: (reverse("mentor_dashboard"), None)),
+            Route("director_dashboard", D, lambda i: (reverse("director_dashboard"), None)),
+            Route("reviewer_history", M, lambda i: (reverse("reviewer_history", args=["approved"]), None)),
+            Route("absence_calendar", D, lambda i: (reverse("absence_calendar"), {
+                "start": (day - timedelta(days=30)).isoformat(), "end": day.isoformat(),
+            })),
+            Route("absence_day", D, lambda i: (reverse("absence_day"), {
+                "date": (day - timedelta(days=i % 30)).isoformat(),
+            })),
+            Route("leave_analytics", D, lambda i: (reverse("leave_analytics"), {"months": 60})),
+            Route("leave_search", D, lambda i: (reverse("leave_search"), {
+                "q": ("wedding", "fever", "hospital", "hackathon")[i % 4], "page": i % 3 + 1,
+            })),
+            Route("review_leave", M, lambda i: (reverse("review_leave", args=[pending_id(i)]), None)),
+            Route("review_leave", M, lambda i: (reverse("review_leave", args=[pending_id(repeat + i)]), {
+                "action": "approve", "comments": "Benchmark",
+            }), "post"),
+            Route("bulk_review_leave", M, lambda i: (reverse("bulk_review_leave"), {
+                "action": "reject",
+                "ids": [pending_id(2 * repeat + 10 * i + n) for n in range(10)],
+            }), "post"),
+            Route("export_leaves", D, lambda i: (reverse("export_leaves"), {
+                "start": (day - timedelta(days=30)).isoformat(), "end": day.isoformat(),
+            })),
+            Route("async_student_dashboard", S, lambda i: (reverse("async_student_dashboard"), None)),
+            Route("async_mentor_dashboard", M, lambda i: (reverse("async_mentor_dashboard"), None)),
+            Route("async_director_dashboard", D, lambda i: (reverse("async_director_dashboard"), None)),
+            Route("async_review_leave", M, lambda i: (
+                reverse("async_review_leave", args=[pending_id(i)]), None,
+            )),
+            # Answers 204 through the WSGI handler; bench_events drives the stream itself.
+            Route("reviewer_events", M, lambda i: (reverse("reviewer_events"), None)),
+            Route("metrics", STAFF, lambda i: (reverse("metrics"), None)),
+            Route("logout", S, lambda i: (reverse("logout"), None), fresh_login=True),
+        ]
+
+    def drive(self, route, clients, users, repeat):
+        samples, queries, errors = [], [], 0
+        started = time.perf_counter()
+        for i in range(repeat):
+            path, data = route.build(i)
+            # Sign-in/registration pages get a new anonymous client each time.
+            if route.fresh_login or route.role is ANONYMOUS:
+                client = self.client_for(users.get(route.role))
+            else:
+                client = clients[route.role]
+            with CaptureQueriesContext(connection) as ctx:
+                t0 = time.perf_counter()
+                response = getattr(client, route.method)(path, data)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                samples.append((time.perf_counter() - t0) * 1000)
+            queries.append(len(ctx.captured_queries))
+            errors += response.status_code >= 400
+        elapsed = time.perf_counter() - started
+        return {
+            **bench.summarize(samples),
+            "queries_per_request": round(statistics.mean(queries), 1),
+            "req_per_s": round(repeat / elapsed, 1),
+            "errors": errors,
+        }
+
+    def report(self, label, r):
+        style = self.style.ERROR if r["errors"] else self.style.SUCCESS
+        self.stdout.write(style(
+            f"{label:32} p50={r['p50_ms']:8.2f}ms p95={r['p95_ms']:8.2f}ms p99={r['p99_ms']:8.2f}ms "
+            f"q/req={r['queries_per_request']:5.1f} {r['req_per_s']:7.1f} req/s"
+            + (f" errors={r['errors']}" if r["errors"] else "")
+        ))
+
+    def compare(self, path, results, threshold):
+        with open(path) as fh:
+            previous = json.load(fh)["routes"]
+        for label, r in results.items():
+            before = previous.get(label)
+            if not before:
+                continue
+            change = 100 * (r["p50_ms"] - before["p50_ms"]) / max(before["p50_ms"], 0.001)
+            style = self.style.ERROR if change > threshold else self.style.SUCCESS
+            self.stdout.write(style(
+                f"{label:32} p50 {before['p50_ms']:8.2f} -> {r['p50_ms']:8.2f}ms ({change:+.0f}%), "
+                f"q/req {before['queries_per_request']} -> {r['queries_per_request']}"
+            ))
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=settings.BASE_DIR,
+            ).stdout.strip() or None
+        except OSError:
+            return None
@@ -0,0 +1,38 @@
+import sys
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core import exports
+from core.models import LeaveRequest
+
+
+class Command(BaseCommand):
+    help = "Stream leave history with student/profile fields as CSV or JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=exports.FORMATS, default="csv")
+        parser.add_argument("--start", type=date.fromisoformat, help="Created on or after (YYYY-MM-DD)")
+        parser.add_argument("--end", type=date.fromisoformat, help="Created on or before (YYYY-MM-DD)")
+        parser.add_argument("--status", choices=[status for status, _ in LeaveRequest.STATUS_CHOICES])
+        parser.add_argument("--approver", help="Approver email")
+        parser.add_argument("--include-archive", action="store_true",
+                            help="Also export leaves moved out by archive_leaves")
+        parser.add_argument("--output", "-o", help="File to write (default: stdout)")
+
+    def handle(self, *args, **opts):
+        approver_id = None
+        if opts["approver"]:
+            approver_id = User.objects.filter(email=opts["approver"].lower()).values_list("pk", flat=True).first()
+            if approver_id is None:
+                raise CommandError(f"No user with email {opts['approver']}")
+        querysets = exports.export_querysets(opts["start"], opts["end"], opts["status"], approver_id,
+                                             opts["include_archive"])
+        out = open(opts["output"], "w", newline="", encoding="utf-8") if opts["output"] else sys.stdout
+        try:
+            for chunk in exports.render(exports.export_rows(*querysets), opts["format"]):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
@@ -0,0 +1,62 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.academic_calendar import calendar
+from core.models import CalendarClosure
+from core.rows import read_rows
+
+KINDS = {kind for kind, _ in CalendarClosure.KIND_CHOICES}
+
+
+class Command(BaseCommand):
+    help = "Import holidays, vacations and exam blocks from a CSV or JSONL file (safe to re-run)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV with a header row, or JSONL; columns: name, and either date or "
+                                         "start_date/end_date (YYYY-MM-DD), optional kind")
+        parser.add_argument("--kind", default=CalendarClosure.KIND_HOLIDAY, choices=sorted(KINDS),
+                            help="Kind for rows that don't give one")
+        parser.add_argument("--replace", action="store_true",
+                            help="Delete existing closures inside the imported date span first")
+
+    def handle(self, *args, **opts):
+        closures, invalid = [], 0
+        for line, row in enumerate(read_rows(opts["path"]), start=1):
+            closure = self.parse(row, opts["kind"])
+            if closure is None:
+                invalid += 1
+                self.stderr.write(f"Skipping invalid row {line}: {row}")
+                continue
+            closures.append(closure)
+        if not closures:
+            raise CommandError("No valid rows to import.")
+
+        with transaction.atomic():
+            deleted = 0
+            if opts["replace"]:
+                first = min(c.start_date for c in closures)
+                last = max(c.end_date for c in closures)
+                deleted, _ = CalendarClosure.objects.filter(start_date__gte=first, end_date__lte=last).delete()
+            before = CalendarClosure.objects.count()
+            CalendarClosure.objects.bulk_create(closures, ignore_conflicts=True)
+            created = CalendarClosure.objects.count() - before
+        # bulk_create doesn't send the post_save that normally does this.
+        calendar.invalidate()
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {created} closures ({len(closures) - created} already present, "
+            f"{deleted} replaced, {invalid} invalid rows)."
+        ))
+
+    def parse(self, row, default_kind):
+        name = (row.get("name") or "").strip()
+        kind = (row.get("kind") or default_kind).strip().upper()
+        try:
+            start = date.fromisoformat(str(row.get("start_date") or row.get("date") or "").strip())
+            end = date.fromisoformat(str(row.get("end_date") or "").strip()) if row.get("end_date") else start
+        except ValueError:
+            return None
+        if not name or kind not in KINDS or end < start:
+            return None
+        return CalendarClosure(name=name[:100], kind=kind, start_date=start, end_date=end)
@@ -0,0 +1,124 @@
+import json
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+
+from core import bench
+from core.models import LeaveRollup, Profile
+
+
+def _init_worker():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "leave_project.settings")
+    django.setup()
+
+
+def _run_worker(worker_id, start_at, seconds, register_share):
+    """Submit leaves (and register students) as fast as possible until the deadline."""
+    from core import services
+    from core.db import is_busy_error
+    from core.models import LeaveRequest
+
+    rng = random.Random(worker_id)
+    counts, latencies = Counter(), []
+    students = 0
+
+    def register():
+        nonlocal students
+        students += 1
+        email = f"load{worker_id}x{students}@{bench.BENCH_DOMAIN}"
+        return services.register_student(email, f"Load{worker_id}x{students}", "9000000000", None), date(2030, 1, 1)
+
+    student, next_day = None, None
+    time.sleep(max(0.0, start_at - time.time()))
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        kind = "registrations" if student is None or rng.random() < register_share else "submissions"
+        t0 = time.perf_counter()
+        try:
+            if kind == "registrations":
+                student, next_day = register()
+            else:
+                leave = LeaveRequest(
+                    student=student,
+                    leave_type=LeaveRequest.LEAVE_PERSONAL,
+                    start_date=next_day,
+                    end_date=next_day + timedelta(days=rng.choice((0, 1, 3))),
+                    reason="Synthetic load test leave request",
+                )
+                next_day = leave.end_date + timedelta(days=1)
+                services.submit_leave(leave)
+        except OperationalError as exc:
+            counts["lock_errors" if is_busy_error(exc) else "other_errors"] += 1
+            continue
+        counts[kind] += 1
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return counts, latencies
+
+
+class Command(BaseCommand):
+    help = ("Hammer the registration and leave-submission write paths from several processes and "
+            "report sustained writes/s and lock errors")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=os.cpu_count())
+        parser.add_argument("--seconds", type=float, default=15)
+        parser.add_argument("--register-share", type=float, default=0.1,
+                            help="Fraction of operations that register a new student")
+        parser.add_argument("--json", dest="json_path")
+
+    def handle(self, *args, **opts):
+        # Workers commit real rows (point LEAVE_DB_PATH at a migrated scratch
+        # copy to keep them off the main database); bench rows are removed at the end.
+        self.cleanup()
+        try:
+            bench.create_users("mentor", 8, Profile.ROLE_MENTOR)
+            bench.create_users("director", 3, Profile.ROLE_DIRECTOR)
+            start_at = time.time() + 2  # let every process finish django.setup() first
+            with ProcessPoolExecutor(max_workers=opts["processes"], initializer=_init_worker) as pool:
+                futures = [
+                    pool.submit(_run_worker, n, start_at, opts["seconds"], opts["register_share"])
+                    for n in range(opts["processes"])
+                ]
+                outcomes = [future.result() for future in futures]
+        finally:
+            self.cleanup()
+
+        counts, latencies = Counter(), []
+        for worker_counts, worker_latencies in outcomes:
+            counts.update(worker_counts)
+            latencies.extend(worker_latencies)
+        result = {
+            "processes": opts["processes"],
+            "seconds": opts["seconds"],
+            "submissions": counts["submissions"],
+            "registrations": counts["registrations"],
+            "submissions_per_s": round(counts["submissions"] / opts["seconds"], 1),
+            "writes_per_s": round((counts["submissions"] + counts["registrations"]) / opts["seconds"], 1),
+            "lock_errors": counts["lock_errors"],
+            "other_errors": counts["other_errors"],
+            **(bench.summarize(latencies) if latencies else {}),
+        }
+        style = self.style.SUCCESS if not (result["lock_errors"] or result["other_errors"]) else self.style.ERROR
+        self.stdout.write(style(
+            f"{result['processes']} processes, {result['seconds']:.0f}s: "
+            f"{result['submissions_per_s']} submissions/s, {result['writes_per_s']} writes/s, "
+            f"p50={result.get('p50_ms', 0)}ms p99={result.get('p99_ms', 0)}ms, "
+            f"{result['lock_errors']} lock errors, {result['other_errors']} other errors"
+        ))
+        if opts["json_path"]:
+            with open(opts["json_path"], "w") as fh:
+                json.dump(result, fh, indent=2)
+
+    def cleanup(self):
+        bench_users = User.objects.filter(username__endswith=f"@{bench.BENCH_DOMAIN}")
+        # Rollup rows would otherwise outlive their approver with approver=NULL.
+        LeaveRollup.objects.filter(approver__in=bench_users).delete()
+        bench_users.delete()
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core import absence
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-day absence index from approved leave requests"
+
+    def handle(self, *args, **opts):
+        rows = absence.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt absence index: {rows} day rows."))
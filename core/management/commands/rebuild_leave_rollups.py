@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the leave analytics rollups from LeaveRequest history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=rollups.REBUILD_CHUNK_SIZE,
+                            help="Leave ids aggregated per query")
+
+    def handle(self, *args, **opts):
+        started = time.perf_counter()
+        rows = rollups.rebuild(opts["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {rows} rollup rows in {time.perf_counter() - started:.1f}s."
+        ))
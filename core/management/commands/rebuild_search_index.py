@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import search
+from core.models import ArchivedLeaveRequest, LeaveRequest
+
+
+class Command(BaseCommand):
+    help = ("Index leaves missing from the full-text search index (core_leavesearch), hot and archived, in "
+            "batches of one transaction each; safe to stop and run again")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=search.BATCH_SIZE)
+        parser.add_argument("--reset", action="store_true", help="Empty the index first and reindex every leave")
+        parser.add_argument("--sleep", type=float, default=0,
+                            help="Seconds to pause between batches, leaving the write lock to the app")
+
+    def handle(self, *args, **opts):
+        if opts["reset"]:
+            search.clear_index()
+        started = time.perf_counter()
+        indexed = 0
+        for model in (LeaveRequest, ArchivedLeaveRequest):
+            last_id, batches = 0, 0
+            while True:
+                t0 = time.perf_counter()
+                last_id, n = search.index_batch(model, last_id, opts["batch_size"])
+                if last_id is None:
+                    break
+                indexed, batches = indexed + n, batches + 1
+                if n:
+                    self.stdout.write(
+                        f"{model._meta.db_table} batch {batches}: {n} leaves up to id {last_id} in "
+                        f"{time.perf_counter() - t0:.2f}s ({indexed / (time.perf_counter() - started):.0f}/s overall)"
+                    )
+                if opts["sleep"]:
+                    time.sleep(opts["sleep"])
+        t0 = time.perf_counter()
+        search.optimize_index()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {indexed} leaves in {elapsed:.1f}s ({indexed / elapsed if elapsed else 0:.0f} leaves/s), "
+            f"optimize took {time.perf_counter() - t0:.1f}s."
+        ))
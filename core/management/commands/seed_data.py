@@ -0,0 +1,81 @@
+import time
+from io import StringIO
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core import absence, bench, rollups
+from core.directory import directory
+from core.models import ArchivedLeaveRequest, LeaveRequest, NotificationJob, Profile
+
+
+class Command(BaseCommand):
+    help = ("Bulk-generate students, mentors, directors and leave requests (skewed across approvers) "
+            "for load testing; all accounts sign in with bench.SEED_PASSWORD")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=20_000)
+        parser.add_argument("--mentors", type=int, default=40)
+        parser.add_argument("--directors", type=int, default=4)
+        parser.add_argument("--leaves", type=int, default=1_000_000)
+        parser.add_argument("--skew", type=float, default=1.0,
+                            help="Zipf exponent of the approver distribution (0 = uniform)")
+        parser.add_argument("--years", type=float, default=3, help="Span of created_at history")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--reset", action="store_true", help="Delete previously seeded data first")
+
+    def handle(self, *args, **opts):
+        seeded = User.objects.filter(username__endswith=f"@{bench.BENCH_DOMAIN}")
+        if seeded.exists():
+            if not opts["reset"]:
+                raise CommandError("Seed data already present; pass --reset to replace it.")
+            self.reset(seeded)
+
+        started = time.perf_counter()
+        password = make_password(bench.SEED_PASSWORD)
+        with transaction.atomic():
+            students = bench.create_users("student", opts["students"], Profile.ROLE_STUDENT, password)
+            mentors = bench.create_users("mentor", opts["mentors"], Profile.ROLE_MENTOR, password)
+            directors = bench.create_users("director", opts["directors"], Profile.ROLE_DIRECTOR, password)
+        self.stdout.write(f"Created {len(students) + len(mentors) + len(directors)} accounts")
+
+        # Interleave directors with mentors so the heaviest queues belong to both roles.
+        approvers = [user for pair in zip(directors, mentors) for user in pair]
+        approvers += mentors[len(directors):] + directors[len(mentors):]
+        weights = bench.zipf_weights(len(approvers), opts["skew"])
+        for offset in range(0, opts["leaves"], 100_000):
+            with transaction.atomic():
+                bench.seed_leaves(
+                    students, approvers, min(100_000, opts["leaves"] - offset), weights,
+                    span_days=int(opts["years"] * 365), seed=opts["seed"] + offset,
+                )
+            self.stdout.write(f"  {offset + min(100_000, opts['leaves'] - offset)} leaves")
+
+        # seed_leaves bypasses the signals, so derived tables are rebuilt in one pass.
+        self.rebuild_derived()
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {opts['leaves']} leaves in {time.perf_counter() - started:.1f}s "
+            f"(top approver {approvers[0].email} gets {weights[0] / sum(weights):.0%})"
+        ))
+
+    def reset(self, seeded):
+        # Notification jobs are LeaveRequest's only dependants; with them gone
+        # first, the leaves go in one DELETE instead of being loaded by the
+        # deletion collector.
+        NotificationJob.objects.filter(leave__student__in=seeded).delete()
+        LeaveRequest.objects.filter(student__in=seeded)._raw_delete(connection.alias)
+        ArchivedLeaveRequest.objects.filter(student__in=seeded)._raw_delete(connection.alias)
+        seeded.delete()
+        self.stdout.write("Removed previous seed data")
+
+    def rebuild_derived(self):
+        counters_log = StringIO()
+        call_command("rebuild_leave_counters", stdout=counters_log)
+        self.stdout.write(counters_log.getvalue().splitlines()[-1])
+        self.stdout.write(f"Absence index: {absence.rebuild()} rows; rollups: {rollups.rebuild()} rows")
+        directory.invalidate()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
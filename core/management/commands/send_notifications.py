@@ -0,0 +1,44 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import notifications
+
+
+class Command(BaseCommand):
+    help = ("Send queued leave notification emails (review digests to approvers, decisions to students) "
+            "from a thread pool; runs until stopped unless --once is given")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument("--batch", type=int, default=50, help="Recipients claimed per round")
+        parser.add_argument("--poll", type=float, default=5, help="Seconds to wait when nothing is due")
+        parser.add_argument("--once", action="store_true", help="Stop when nothing is due")
+        parser.add_argument("--retention-days", type=int, default=30,
+                            help="Delete sent jobs older than this (checked hourly)")
+
+    def handle(self, *args, **opts):
+        limiter = notifications.RateLimiter(
+            getattr(settings, "NOTIFICATION_RATE_PER_MINUTE", notifications.DEFAULT_RATE_PER_MINUTE)
+        )
+        next_purge = 0
+        with ThreadPoolExecutor(max_workers=opts["threads"]) as pool:
+            while True:
+                if time.monotonic() >= next_purge:
+                    notifications.purge_sent(opts["retention_days"])
+                    next_purge = time.monotonic() + 3600
+                batches = notifications.claim(opts["batch"])
+                if not batches:
+                    if opts["once"]:
+                        break
+                    time.sleep(opts["poll"])
+                    continue
+                # Only the sending happens on the pool; claiming and recording
+                # results stay on this thread, so SQLite sees one writer here.
+                results = list(pool.map(
+                    lambda batch: notifications.deliver(*batch, limiter), batches.items()
+                ))
+                sent, failed = notifications.finish(results)
+                self.stdout.write(f"{len(batches)} recipients: {sent} jobs sent, {failed} failed")
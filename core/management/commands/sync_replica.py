@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import replicas
+
+
+class Command(BaseCommand):
+    help = "Copy the primary database into the read replica (LEAVE_DB_REPLICA_PATH), once or every --interval seconds"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=0,
+                            help="Keep syncing at this period; keep it below REPLICA_STICKY_SECONDS")
+
+    def handle(self, *args, **opts):
+        if not replicas.replica_configured():
+            raise CommandError("No replica configured; set LEAVE_DB_REPLICA_PATH.")
+        while True:
+            t0 = time.perf_counter()
+            replicas.sync_replica()
+            self.stdout.write(f"Replica synced in {(time.perf_counter() - t0) * 1000:.0f} ms")
+            if not opts["interval"]:
+                break
+            time.sleep(opts["interval"])
@@ -0,0 +1,346 @@
+# core/metrics.py
+"""
+Per-view request metrics in the Prometheus text format, served at /metrics.
+
+``MetricsMiddleware`` records, for each resolved URL name, a latency
+histogram, the number of SQL queries and the time spent in them, template
+render time and response size. Queries are timed by an execute wrapper on
+every database connection and templates by wrapping the Django template
+backend's ``render()``; both return straight away unless a request is being
+measured.
+
+The numbers are per process: with several workers, scrape each one (or sum
+them).
+
+If ``METRICS_PROFILE_THRESHOLD_MS`` is set, a background thread samples the
+stack of any sync request still running after that many milliseconds. The samples
+are written to ``METRICS_PROFILE_DIR`` as collapsed stacks, which
+flamegraph.pl and speedscope can read.
+"""
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.decorators import sync_and_async_middleware
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+UNRESOLVED = "<unresolved>"
+DEFAULT_PROFILE_INTERVAL_MS = 5
+
+_current = ContextVar("core_metrics_sample", default=None)
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        # Bucket i counts values <= bounds[i]; the last one is +Inf.
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip((*self.bounds, "+Inf"), self.counts):
+            total += count
+            yield bound, total
+
+
+class RequestSample:
+    """What one request spent its time on; filled in while it runs."""
+    __slots__ = ("queries", "db_seconds", "template_seconds", "bytes")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.bytes = 0
+
+
+class ViewStats:
+    __slots__ = ("latency", "queries", "responses", "db_seconds", "template_seconds", "bytes", "profiles")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.responses = Counter()
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.bytes = 0
+        self.profiles = 0
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view, method, status, seconds, sample, profiled=False):
+        with self._lock:
+            stats = self._views.get(view)
+            if stats is None:
+                stats = self._views[view] = ViewStats()
+            stats.latency.observe(seconds)
+            stats.queries.observe(sample.queries)
+            stats.responses[method, status] += 1
+            stats.db_seconds += sample.db_seconds
+            stats.template_seconds += sample.template_seconds
+            stats.bytes += sample.bytes
+            stats.profiles += profiled
+
+    def reset(self):
+        with self._lock:
+            self._views = {}
+
+    def render(self):
+        with self._lock:
+            views = sorted(self._views.items())
+            lines = []
+
+            def family(name, kind, help_text):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+            def histogram(name, attr):
+                for view, stats in views:
+                    hist = getattr(stats, attr)
+                    for bound, total in hist.cumulative():
+                        lines.append(f'{name}_bucket{{view="{_escape(view)}",le="{bound}"}} {total}')
+                    lines.append(f'{name}_sum{{view="{_escape(view)}"}} {hist.sum:.6f}')
+                    lines.append(f'{name}_count{{view="{_escape(view)}"}} {sum(hist.counts)}')
+
+            def counter(name, attr, fmt="{}"):
+                for view, stats in views:
+                    lines.append(f'{name}{{view="{_escape(view)}"}} {fmt.format(getattr(stats, attr))}')
+
+            family("leave_requests_total", "counter", "Responses by view, method and status code.")
+            for view, stats in views:
+                for (method, status), count in sorted(stats.responses.items()):
+                    lines.append(
+                        f'leave_requests_total{{view="{_escape(view)}",method="{method}",status="{status}"}} {count}'
+                    )
+            family("leave_request_duration_seconds", "histogram", "Time to produce the full response.")
+            histogram("leave_request_duration_seconds", "latency")
+            family("leave_request_queries", "histogram", "SQL queries per request.")
+            histogram("leave_request_queries", "queries")
+            family("leave_request_db_seconds_total", "counter", "Time spent executing SQL.")
+            counter("leave_request_db_seconds_total", "db_seconds", "{:.6f}")
+            family("leave_request_template_seconds_total", "counter", "Time spent rendering templates.")
+            counter("leave_request_template_seconds_total", "template_seconds", "{:.6f}")
+            family("leave_response_bytes_total", "counter", "Response body bytes sent.")
+            counter("leave_response_bytes_total", "bytes")
+            family("leave_slow_request_profiles_total", "counter", "Slow requests whose stacks were sampled.")
+            counter("leave_slow_request_profiles_total", "profiles")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _time_query(execute, sql, params, many, context):
+    sample = _current.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    t0 = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.queries += 1
+        sample.db_seconds += time.perf_counter() - t0
+
+
+def _instrument_connection(sender=None, connection=None, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def _instrument_templates():
+    from django.template.backends.django import Template
+
+    render = Template.render
+    if getattr(render, "timed", False):
+        return
+
+    @wraps(render)
+    def timed_render(self, context=None, request=None):
+        sample = _current.get()
+        if sample is None:
+            return render(self, context, request)
+        t0 = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            sample.template_seconds += time.perf_counter() - t0
+
+    timed_render.timed = True
+    Template.render = timed_render
+
+
+def install():
+    """Hook query and template timing in; they do nothing outside a measured request."""
+    connection_created.connect(_instrument_connection, dispatch_uid="core.metrics")
+    for connection in connections.all(initialized_only=True):
+        _instrument_connection(connection=connection)
+    _instrument_templates()
+
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """
+    A single daemon thread that samples the stacks of requests running longer
+    than ``threshold`` seconds; requests that finish in time cost a dict insert
+    and delete.
+    """
+
+    def __init__(self, threshold, interval):
+        self.threshold = threshold
+        self.interval = interval
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def begin(self):
+        self._ensure_running()
+        ident = threading.get_ident()
+        entry = self._active[ident] = [time.perf_counter() + self.threshold, None, ident]
+        return entry
+
+    def end(self, entry):
+        """The sampled stacks of this request (a Counter), or None if it finished in time."""
+        self._active.pop(entry[2], None)
+        return entry[1]
+
+    def _ensure_running(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="core-metrics-sampler", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            frames = None
+            for ident, entry in list(self._active.items()):
+                if now < entry[0]:
+                    continue
+                if frames is None:
+                    frames = sys._current_frames()
+                frame = frames.get(ident)
+                if frame is not None:
+                    if entry[1] is None:
+                        entry[1] = Counter()
+                    entry[1][_collapse(frame)] += 1
+
+
+def write_profile(view, stacks):
+    directory = getattr(settings, "METRICS_PROFILE_DIR", None) or os.path.join(settings.BASE_DIR, "profiles")
+    os.makedirs(directory, exist_ok=True)
+    name = f"{view.replace('/', '_').replace(':', '_')}-{time.time():.3f}-{os.getpid()}.folded"
+    with open(os.path.join(directory, name), "w") as fh:
+        for stack, count in stacks.most_common():
+            fh.write(f"{stack} {count}\n")
+
+
+@sync_and_async_middleware
+class MetricsMiddleware:
+    """Record latency, SQL, template time and response size for every request, keyed by URL name."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Outermost, so a sync-only wrapper would make the whole ASGI chain sync.
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        install()
+        threshold = getattr(settings, "METRICS_PROFILE_THRESHOLD_MS", None)
+        interval = getattr(settings, "METRICS_PROFILE_INTERVAL_MS", DEFAULT_PROFILE_INTERVAL_MS)
+        self.sampler = StackSampler(threshold / 1000, interval / 1000) if threshold is not None else None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        sample = RequestSample()
+        entry = self.sampler.begin() if self.sampler else None
+        started = time.perf_counter()
+        token = _current.set(sample)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._record(request, response, sample, started, entry)
+
+    async def _acall(self, request):
+        # The event loop thread runs every async request at once, so its
+        # stack says nothing about this one; async requests aren't sampled.
+        sample = RequestSample()
+        started = time.perf_counter()
+        token = _current.set(sample)  # copied into sync_to_async threads
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._record(request, response, sample, started, None)
+
+    def _record(self, request, response, sample, started, entry):
+        def finish():
+            stacks = self.sampler.end(entry) if entry else None
+            match = request.resolver_match
+            view = match.view_name if match else UNRESOLVED
+            if stacks:
+                write_profile(view, stacks)
+            registry.record(view, request.method, response.status_code, time.perf_counter() - started,
+                            sample, profiled=bool(stacks))
+
+        if response.streaming and not response.is_async:
+            # Streamed bodies (the exports) do their queries while being sent,
+            # so the request is only recorded once the stream is exhausted.
+            # Async streams are the long-lived event streams; those are
+            # recorded when their headers go out.
+            response.streaming_content = self._measure_stream(response.streaming_content, sample, finish)
+        else:
+            sample.bytes = 0 if response.streaming else len(response.content)
+            finish()
+        return response
+
+    def _measure_stream(self, content, sample, finish):
+        chunks = iter(content)
+        try:
+            while True:
+                token = _current.set(sample)
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    return
+                finally:
+                    _current.reset(token)
+                sample.bytes += len(chunk)
+                yield chunk
+        finally:
+            finish()
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_counters(apps, schema_editor):
+    LeaveRequest = apps.get_model("core", "LeaveRequest")
+    LeaveCounter = apps.get_model("core", "LeaveCounter")
+    rows = []
+    for role, column in (("STUDENT", "student"), ("APPROVER", "approver")):
+        totals = (
+            LeaveRequest.objects.filter(**{f"{column}__isnull": False})
+            .values_list(column, "status")
+            .annotate(n=models.Count("id"))
+            .order_by()
+        )
+        rows.extend(
+            LeaveCounter(user_id=user_id, role=role, status=status, count=n)
+            for user_id, status, n in totals
+        )
+    LeaveCounter.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0005_leaverequest_access_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('STUDENT', 'Student'), ('APPROVER', 'Approver')], max_length=10)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('APPROVED', 'Approved'), ('REJECTED', 'Rejected')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='leavecounter',
+            constraint=models.UniqueConstraint(fields=('user', 'role', 'status'), name='leave_counter_unique'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
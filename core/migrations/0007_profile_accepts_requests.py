@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:13
+
+from django.db import migrations, models
+
+# The mentor allowlist LeaveRequestForm used to hard-code.
+LISTED_MENTORS = [
+    "bharathi.mca@suranacollege.edu.in",
+    "chandan.mca@suranacollege.edu.in",
+    "hemaprabha.mca@suranacollege.edu.in",
+    "sujay.mca@suranacollege.edu.in",
+    "bhavana.mca@suranacollege.edu.in",
+    "manikantan.mca@suranacollege.edu.in",
+    "naveen.mca@suranacollege.edu.in",
+    "priyanka.mca@suranacollege.edu.in",
+]
+
+
+def unlist_other_mentors(apps, schema_editor):
+    Profile = apps.get_model("core", "Profile")
+    Profile.objects.filter(role="MENTOR").exclude(user__email__in=LISTED_MENTORS).update(accepts_requests=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_leavecounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='accepts_requests',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.RunPython(unlist_other_mentors, migrations.RunPython.noop),
+    ]
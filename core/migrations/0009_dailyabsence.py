@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:28
+
+from collections import Counter
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def backfill_absences(apps, schema_editor):
+    LeaveRequest = apps.get_model("core", "LeaveRequest")
+    DailyAbsence = apps.get_model("core", "DailyAbsence")
+    counts = Counter()
+    approved = LeaveRequest.objects.filter(status="APPROVED").values_list(
+        "student__profile__course", "student__profile__semester", "start_date", "end_date"
+    )
+    for course, semester, start, end in approved.iterator():
+        for n in range((end - start).days + 1):
+            counts[(start + timedelta(days=n), course or "", semester or 0)] += 1
+    DailyAbsence.objects.bulk_create(
+        [DailyAbsence(day=day, course=course, semester=semester, count=n)
+         for (day, course, semester), n in counts.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_leaverequest_student_span_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAbsence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('course', models.CharField(blank=True, max_length=10)),
+                ('semester', models.IntegerField(default=0)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(condition=models.Q(('status', 'APPROVED')), fields=['end_date', 'start_date'], name='leave_approved_span_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyabsence',
+            constraint=models.UniqueConstraint(fields=('day', 'course', 'semester'), name='daily_absence_unique'),
+        ),
+        migrations.RunPython(backfill_absences, migrations.RunPython.noop),
+    ]
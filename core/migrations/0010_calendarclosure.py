@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_dailyabsence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('kind', models.CharField(choices=[('HOLIDAY', 'Holiday'), ('VACATION', 'Vacation'), ('EXAM', 'Exam block')], default='HOLIDAY', max_length=10)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+            ],
+            options={
+                'ordering': ['start_date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='calendarclosure',
+            constraint=models.UniqueConstraint(fields=('start_date', 'end_date', 'name'), name='calendar_closure_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='calendarclosure',
+            constraint=models.CheckConstraint(check=models.Q(('end_date__gte', models.F('start_date'))), name='calendar_closure_span'),
+        ),
+    ]
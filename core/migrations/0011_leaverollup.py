@@ -0,0 +1,75 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:33
+
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_rollups(apps, schema_editor):
+    LeaveRequest = apps.get_model("core", "LeaveRequest")
+    LeaveRollup = apps.get_model("core", "LeaveRollup")
+    CalendarClosure = apps.get_model("core", "CalendarClosure")
+    weekend = set(getattr(settings, "LEAVE_WEEKEND_DAYS", (5, 6)))
+    closed = set()
+    for start, end in CalendarClosure.objects.values_list("start_date", "end_date"):
+        closed.update(start + timedelta(days=n) for n in range((end - start).days + 1))
+
+    totals = defaultdict(Counter)
+    leaves = LeaveRequest.objects.values_list(
+        "created_at", "leave_type", "student__profile__course", "student__profile__semester", "approver_id",
+        "status", "start_date", "end_date", "reviewed_at",
+    )
+    for created_at, leave_type, course, semester, approver_id, status, start, end, reviewed_at in leaves.iterator():
+        row = totals[(date(created_at.year, created_at.month, 1), leave_type, course or "", semester or 0,
+                      approver_id)]
+        row["submitted"] += 1
+        row[status.lower()] += 1
+        if reviewed_at:
+            row["reviewed"] += 1
+            row["turnaround_seconds"] += int((reviewed_at - created_at).total_seconds())
+        if status == "APPROVED":
+            days = (start + timedelta(days=n) for n in range((end - start).days + 1))
+            row["days_lost"] += sum(1 for day in days if day.weekday() not in weekend and day not in closed)
+    LeaveRollup.objects.bulk_create(
+        [LeaveRollup(month=month, leave_type=leave_type, course=course, semester=semester,
+                     approver_id=approver_id, **fields)
+         for (month, leave_type, course, semester, approver_id), fields in totals.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0010_calendarclosure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('leave_type', models.CharField(choices=[('Personal Leave', 'Personal Leave'), ('Sick Leave', 'Sick Leave'), ('Other', 'Other')], max_length=40)),
+                ('course', models.CharField(blank=True, max_length=10)),
+                ('semester', models.IntegerField(default=0)),
+                ('submitted', models.IntegerField(default=0)),
+                ('pending', models.IntegerField(default=0)),
+                ('approved', models.IntegerField(default=0)),
+                ('rejected', models.IntegerField(default=0)),
+                ('reviewed', models.IntegerField(default=0)),
+                ('turnaround_seconds', models.BigIntegerField(default=0)),
+                ('days_lost', models.IntegerField(default=0)),
+                ('approver', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='leaverollup',
+            constraint=models.UniqueConstraint(fields=('month', 'leave_type', 'course', 'semester', 'approver'), name='leave_rollup_unique'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0012_notificationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedLeaveRequest',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('leave_type', models.CharField(choices=[('Personal Leave', 'Personal Leave'), ('Sick Leave', 'Sick Leave'), ('Other', 'Other')], max_length=40)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('reason', models.TextField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('APPROVED', 'Approved'), ('REJECTED', 'Rejected')], max_length=20)),
+                ('review_comments', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('approver', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('mentor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_leaves', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['approver', 'status', 'reviewed_at'], name='archive_approver_status_idx'), models.Index(fields=['student', 'created_at'], name='archive_student_created_idx'), models.Index(condition=models.Q(('status', 'APPROVED')), fields=['end_date', 'start_date'], name='archive_approved_span_idx')],
+            },
+        ),
+    ]
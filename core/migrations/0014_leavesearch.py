@@ -0,0 +1,71 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:02
+
+from django.db import migrations
+
+# core_leavesearch: an FTS5 index of leave reasons and review comments, keyed
+# by leave id (its rowid) across the hot and archive tables. The triggers keep
+# it current; leaves that predate them are indexed by
+# `manage.py rebuild_search_index`, in batches, rather than here.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE core_leavesearch USING fts5(
+        reason, review_comments, tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+    """,
+    # Matches in the reason count twice as much as matches in the comments.
+    "INSERT INTO core_leavesearch(core_leavesearch, rank) VALUES ('rank', 'bm25(2.0, 1.0)')",
+    """
+    CREATE TRIGGER core_leavesearch_insert AFTER INSERT ON core_leaverequest BEGIN
+        INSERT OR REPLACE INTO core_leavesearch(rowid, reason, review_comments)
+        VALUES (new.id, new.reason, new.review_comments);
+    END
+    """,
+    """
+    CREATE TRIGGER core_leavesearch_update AFTER UPDATE OF reason, review_comments ON core_leaverequest
+    WHEN old.reason IS NOT new.reason OR old.review_comments IS NOT new.review_comments BEGIN
+        INSERT OR REPLACE INTO core_leavesearch(rowid, reason, review_comments)
+        VALUES (new.id, new.reason, new.review_comments);
+    END
+    """,
+    # archive_leaves copies a leave into the archive before deleting it from
+    # the hot table: its entry is already there and must stay.
+    """
+    CREATE TRIGGER core_leavesearch_delete AFTER DELETE ON core_leaverequest BEGIN
+        DELETE FROM core_leavesearch WHERE rowid = old.id
+            AND NOT EXISTS (SELECT 1 FROM core_archivedleaverequest WHERE id = old.id);
+    END
+    """,
+    """
+    CREATE TRIGGER core_leavesearch_archive_insert AFTER INSERT ON core_archivedleaverequest
+    WHEN NOT EXISTS (SELECT 1 FROM core_leavesearch WHERE rowid = new.id) BEGIN
+        INSERT INTO core_leavesearch(rowid, reason, review_comments)
+        VALUES (new.id, new.reason, new.review_comments);
+    END
+    """,
+    """
+    CREATE TRIGGER core_leavesearch_archive_delete AFTER DELETE ON core_archivedleaverequest BEGIN
+        DELETE FROM core_leavesearch WHERE rowid = old.id
+            AND NOT EXISTS (SELECT 1 FROM core_leaverequest WHERE id = old.id);
+    END
+    """,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER core_leavesearch_archive_delete",
+    "DROP TRIGGER core_leavesearch_archive_insert",
+    "DROP TRIGGER core_leavesearch_delete",
+    "DROP TRIGGER core_leavesearch_update",
+    "DROP TRIGGER core_leavesearch_insert",
+    "DROP TABLE core_leavesearch",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_archivedleaverequest'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SQL, DROP_SQL),
+    ]
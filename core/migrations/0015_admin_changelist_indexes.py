@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_leavesearch'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedleaverequest',
+            index=models.Index(fields=['start_date', 'id'], name='archive_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedleaverequest',
+            index=models.Index(fields=['status', 'start_date', 'id'], name='archive_status_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedleaverequest',
+            index=models.Index(fields=['approver', 'start_date', 'id'], name='archive_approver_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['start_date'], name='leave_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['status', 'start_date'], name='leave_status_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['approver', 'start_date'], name='leave_approver_start_idx'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+TABLES = ("core_leaverequest", "core_archivedleaverequest")
+
+# ADD COLUMN with a constant default is a schema-only change in SQLite. An
+# AddField would copy each table into a new one instead, which takes minutes
+# on a large table and drops the search index triggers (migration 0014).
+ADD_SQL = [
+    sql
+    for table in TABLES
+    for sql in (
+        f"ALTER TABLE {table} ADD COLUMN course varchar(10) NOT NULL DEFAULT ''",
+        f"ALTER TABLE {table} ADD COLUMN semester integer NOT NULL DEFAULT 0",
+    )
+]
+DROP_SQL = [
+    sql
+    for table in TABLES
+    for sql in (f"ALTER TABLE {table} DROP COLUMN course", f"ALTER TABLE {table} DROP COLUMN semester")
+]
+
+# Leaves submitted before the snapshot existed take the student's current profile.
+BACKFILL_SQL = [
+    f"""
+    UPDATE {table} SET
+        course = COALESCE((SELECT course FROM core_profile WHERE user_id = {table}.student_id), ''),
+        semester = COALESCE((SELECT semester FROM core_profile WHERE user_id = {table}.student_id), 0)
+    """
+    for table in TABLES
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_admin_changelist_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunSQL(ADD_SQL, DROP_SQL)],
+            state_operations=[
+                migrations.AddField(
+                    model_name='archivedleaverequest',
+                    name='course',
+                    field=models.CharField(blank=True, max_length=10),
+                ),
+                migrations.AddField(
+                    model_name='archivedleaverequest',
+                    name='semester',
+                    field=models.IntegerField(default=0),
+                ),
+                migrations.AddField(
+                    model_name='leaverequest',
+                    name='course',
+                    field=models.CharField(blank=True, max_length=10),
+                ),
+                migrations.AddField(
+                    model_name='leaverequest',
+                    name='semester',
+                    field=models.IntegerField(default=0),
+                ),
+            ],
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
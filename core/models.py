@@ -21,6 +21,8 @@ class Profile(models.Model):
     year = models.CharField(max_length=10, blank=True)
     course = models.CharField(max_length=10, blank=True)
     specialization = models.CharField(max_length=50, blank=True)
+    # Staff only: whether students can pick/be routed to this reviewer.
+    accepts_requests = models.BooleanField(default=True)
 
     def __str__(self):
         return f"{self.user.username} ({self.role})"
@@ -56,11 +58,281 @@ class LeaveRequest(models.Model):
     review_comments = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     reviewed_at = models.DateTimeField(null=True, blank=True)
+    # The student's course/semester when the leave was submitted. Rollups and
+    # the absence index are keyed on these, so a later profile edit can't move
+    # a leave's later transitions into a different bucket.
+    course = models.CharField(max_length=10, blank=True)
+    semester = models.IntegerField(default=0)  # 0 when the profile has none
+
+    class Meta:
+        indexes = [
+            # Reviewer pending queue: approver=?, status=PENDING order by created_at.
+            models.Index(
+                fields=["approver", "created_at"],
+                condition=models.Q(status="PENDING"),
+                name="leave_pending_approver_idx",
+            ),
+            # Reviewer stats and Approved/Rejected history keyed on (reviewed_at, id).
+            models.Index(fields=["approver", "status", "reviewed_at"], name="leave_approver_status_rev_idx"),
+            # Student dashboard: latest leaves, and per-status counts.
+            models.Index(fields=["student", "created_at"], name="leave_student_created_idx"),
+            models.Index(fields=["student", "status"], name="leave_student_status_idx"),
+            # Overlap check on submission: leading with end_date means the seek
+            # only visits leaves that end on/after the new start date, not the
+            # student's whole history.
+            models.Index(fields=["student", "end_date", "start_date"], name="leave_student_span_idx"),
+            # "Who is absent on day X" drill-down over approved leaves.
+            models.Index(
+                fields=["end_date", "start_date"],
+                condition=models.Q(status="APPROVED"),
+                name="leave_approved_span_idx",
+            ),
+            # Admin change lists, ordered by -start_date (rowid breaks ties):
+            # the date hierarchy's MIN/MAX and EXISTS seeks, and pages that
+            # stay index-ordered under the status and approver filters.
+            models.Index(fields=["start_date"], name="leave_start_idx"),
+            models.Index(fields=["status", "start_date"], name="leave_status_start_idx"),
+            models.Index(fields=["approver", "start_date"], name="leave_approver_start_idx"),
+        ]
+
+    @classmethod
+    def overlapping(cls, student, start_date, end_date):
+        """Pending/approved leaves of ``student`` that intersect [start_date, end_date]."""
+        return cls.objects.filter(
+            student=student,
+            end_date__gte=start_date,
+            start_date__lte=end_date,
+            status__in=(cls.STATUS_PENDING, cls.STATUS_APPROVED),
+        ).order_by("start_date")
 
     @property
     def num_days(self):
         return (self.end_date - self.start_date).days + 1
 
+    @property
+    def working_days(self):
+        """Days in the leave that are neither weekends nor calendar closures."""
+        from .academic_calendar import working_days
+
+        return working_days(self.start_date, self.end_date)
+
     def __str__(self):
         return f"Leave {self.pk} by {self.student.username} ({self.status})"
- 
\ No newline at end of file
+
+
+class ArchivedLeaveRequest(models.Model):
+    """
+    A reviewed LeaveRequest moved out of the hot table by ``manage.py archive_leaves``.
+
+    Rows keep their original id, so history pages and exports can merge both
+    tables in a single id or (reviewed_at, id) order. Leave counters, rollups
+    and the absence index still include archived leaves.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_leaves")
+    leave_type = models.CharField(max_length=40, choices=LeaveRequest.LEAVE_CHOICES)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    reason = models.TextField()
+    mentor = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    approver = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    status = models.CharField(max_length=20, choices=LeaveRequest.STATUS_CHOICES)
+    review_comments = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+    course = models.CharField(max_length=10, blank=True)
+    semester = models.IntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Same access paths as the hot table's history, student and absence indexes.
+            models.Index(fields=["approver", "status", "reviewed_at"], name="archive_approver_status_idx"),
+            models.Index(fields=["student", "created_at"], name="archive_student_created_idx"),
+            models.Index(
+                fields=["end_date", "start_date"],
+                condition=models.Q(status="APPROVED"),
+                name="archive_approved_span_idx",
+            ),
+            # The id isn't the rowid here, so it's spelled out for the tie-break.
+            models.Index(fields=["start_date", "id"], name="archive_start_idx"),
+            models.Index(fields=["status", "start_date", "id"], name="archive_status_start_idx"),
+            models.Index(fields=["approver", "start_date", "id"], name="archive_approver_start_idx"),
+        ]
+
+    working_days = LeaveRequest.working_days
+    num_days = LeaveRequest.num_days
+
+    def __str__(self):
+        return f"Archived leave {self.pk} ({self.status})"
+
+
+class LeaveCounter(models.Model):
+    """
+    Denormalised leave totals per (user, role in the request, status).
+
+    Kept in step with LeaveRequest by core.counters inside the same
+    transaction as the leave write; ``manage.py rebuild_leave_counters``
+    recomputes them from scratch if they ever drift.
+    """
+    ROLE_STUDENT = "STUDENT"
+    ROLE_APPROVER = "APPROVER"
+    ROLE_CHOICES = [
+        (ROLE_STUDENT, "Student"),
+        (ROLE_APPROVER, "Approver"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="leave_counters")
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    status = models.CharField(max_length=20, choices=LeaveRequest.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "role", "status"], name="leave_counter_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.role} {self.status}: {self.count}"
+
+
+class DailyAbsence(models.Model):
+    """
+    Number of students on approved leave per day, split by course/semester.
+
+    Maintained incrementally by core.absence when leaves are approved or an
+    approval is reversed; ``manage.py rebuild_absence_index`` recomputes it.
+    """
+    day = models.DateField()
+    course = models.CharField(max_length=10, blank=True)
+    semester = models.IntegerField(default=0)  # 0 when the profile has none
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "course", "semester"], name="daily_absence_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.course} sem {self.semester}: {self.count}"
+
+
+class LeaveRollup(models.Model):
+    """
+    Leave totals per (submission month, leave type, course, semester, approver).
+
+    Maintained by core.rollups from the submit/review paths so analytics never
+    scan LeaveRequest; ``manage.py rebuild_leave_rollups`` recomputes them.
+    """
+    month = models.DateField()  # first day of the month the leave was submitted
+    leave_type = models.CharField(max_length=40, choices=LeaveRequest.LEAVE_CHOICES)
+    course = models.CharField(max_length=10, blank=True)
+    semester = models.IntegerField(default=0)  # 0 when the profile has none
+    approver = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    submitted = models.IntegerField(default=0)
+    pending = models.IntegerField(default=0)
+    approved = models.IntegerField(default=0)
+    rejected = models.IntegerField(default=0)
+    # Decided leaves and the sum of their reviewed_at - created_at.
+    reviewed = models.IntegerField(default=0)
+    turnaround_seconds = models.BigIntegerField(default=0)
+    # Working days covered by approved leaves.
+    days_lost = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["month", "leave_type", "course", "semester", "approver"], name="leave_rollup_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.leave_type} {self.course} sem {self.semester}: {self.submitted}"
+
+
+class CalendarClosure(models.Model):
+    """
+    A range of days the institution is closed (holiday, vacation, exam block).
+
+    Weekends are a rule in settings rather than rows here; core.academic_calendar
+    combines both into per-year working-day prefix sums.
+    """
+    KIND_HOLIDAY = "HOLIDAY"
+    KIND_VACATION = "VACATION"
+    KIND_EXAM = "EXAM"
+    KIND_CHOICES = [
+        (KIND_HOLIDAY, "Holiday"),
+        (KIND_VACATION, "Vacation"),
+        (KIND_EXAM, "Exam block"),
+    ]
+
+    name = models.CharField(max_length=100)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default=KIND_HOLIDAY)
+    start_date = models.DateField()
+    end_date = models.DateField()
+
+    class Meta:
+        ordering = ["start_date"]
+        constraints = [
+            models.UniqueConstraint(fields=["start_date", "end_date", "name"], name="calendar_closure_unique"),
+            models.CheckConstraint(check=models.Q(end_date__gte=models.F("start_date")),
+                                   name="calendar_closure_span"),
+        ]
+
+    def __str__(self):
+        if self.start_date == self.end_date:
+            return f"{self.name} ({self.start_date})"
+        return f"{self.name} ({self.start_date} to {self.end_date})"
+
+
+class NotificationJob(models.Model):
+    """
+    An email owed to a user about one leave.
+
+    Rows are written by core.notifications in the same transaction as the
+    submission or review that caused them, and sent by
+    ``manage.py send_notifications``. A reviewer's submission jobs are sent
+    together as one digest.
+    """
+    KIND_SUBMITTED = "SUBMITTED"  # to the approver
+    KIND_REVIEWED = "REVIEWED"    # to the student
+    KIND_CHOICES = [
+        (KIND_SUBMITTED, "Leave submitted"),
+        (KIND_REVIEWED, "Leave reviewed"),
+    ]
+
+    STATUS_PENDING = "PENDING"
+    STATUS_SENDING = "SENDING"
+    STATUS_SENT = "SENT"
+    STATUS_FAILED = "FAILED"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENDING, "Sending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    leave = models.ForeignKey(LeaveRequest, on_delete=models.CASCADE, related_name="+")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    # One job per event, however many times it is enqueued.
+    dedupe_key = models.CharField(max_length=100, unique=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # When a PENDING job may be sent; for a SENDING job, when its worker's
+    # lease runs out and another worker may take it over.
+    run_after = models.DateTimeField()
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Due work: status IN (PENDING, SENDING) AND run_after <= now. Not a
+            # partial index, since SQLite can't match one against bound IN (?, ?).
+            models.Index(fields=["status", "run_after"], name="notification_due_idx"),
+            models.Index(fields=["recipient", "status"], name="notification_recipient_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for leave {self.leave_id} to {self.recipient_id} ({self.status})"
@@ -0,0 +1,185 @@
+# core/notifications.py
+"""
+Email notifications for leave submissions and reviews, sent off the request path.
+
+The submit/review signals only insert NotificationJob rows, in the same
+transaction as the leave change, so a rolled-back change never notifies and
+a committed one always does. ``manage.py send_notifications`` drains the
+queue:
+
+* ``claim`` takes every recipient with a due job and leases all of their
+  open jobs, so a reviewer's submissions go out as a single digest.
+  Submission jobs wait ``NOTIFICATION_DIGEST_SECONDS`` first, so a digest
+  can collect several of them.
+* ``deliver`` builds and sends a recipient's emails. It runs on the worker's
+  thread pool, needs no database access, and shares a rate limiter with the
+  other threads.
+* ``finish`` marks jobs sent, or schedules a retry with exponential backoff
+  until ``NOTIFICATION_MAX_ATTEMPTS`` is reached.
+
+A worker that dies mid-batch leaves its jobs SENDING. Another worker picks
+them up once their lease (``run_after``) has passed.
+"""
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .db import immediate_atomic, retry_on_busy
+from .models import LeaveRequest, NotificationJob
+
+DEFAULT_DIGEST_SECONDS = 600
+DEFAULT_RATE_PER_MINUTE = 120
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 60  # doubled per failed attempt
+LEASE_SECONDS = 300
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue_submission(leave):
+    """Queue a note to the approver; it waits for the digest window to gather company."""
+    if leave.approver_id is None:
+        return
+    NotificationJob.objects.bulk_create([NotificationJob(
+        recipient_id=leave.approver_id,
+        leave=leave,
+        kind=NotificationJob.KIND_SUBMITTED,
+        dedupe_key=f"submitted:{leave.pk}:{leave.approver_id}",
+        run_after=timezone.now() + timedelta(seconds=_setting("NOTIFICATION_DIGEST_SECONDS", DEFAULT_DIGEST_SECONDS)),
+    )], ignore_conflicts=True)
+
+
+def enqueue_reviews(leaves, previous_status):
+    """Queue a decision email to the student of each leave whose status changed."""
+    now = timezone.now()
+    NotificationJob.objects.bulk_create([
+        NotificationJob(
+            recipient_id=leave.student_id,
+            leave=leave,
+            kind=NotificationJob.KIND_REVIEWED,
+            dedupe_key=f"reviewed:{leave.pk}:{leave.status}:{leave.reviewed_at:%Y%m%d%H%M%S%f}",
+            run_after=now,
+        )
+        for leave in leaves
+        if leave.status != previous_status and leave.status != LeaveRequest.STATUS_PENDING
+    ], ignore_conflicts=True)
+
+
+@retry_on_busy
+def claim(recipients=50):
+    """Lease the open jobs of up to ``recipients`` users with something due; returns {user: [jobs]}."""
+    now = timezone.now()
+    # Due: PENDING past run_after, or SENDING with an expired lease.
+    active = [NotificationJob.STATUS_PENDING, NotificationJob.STATUS_SENDING]
+    with immediate_atomic():
+        due = list(
+            NotificationJob.objects.filter(status__in=active, run_after__lte=now)
+            .order_by("run_after").values_list("recipient_id", flat=True)[:recipients * 10]
+        )
+        due = list(dict.fromkeys(due))[:recipients]
+        # Not-yet-due first attempts ride along in the digest; retries keep their backoff.
+        jobs = list(
+            NotificationJob.objects.filter(status__in=active, recipient_id__in=due)
+            .filter(Q(run_after__lte=now) | Q(status=NotificationJob.STATUS_PENDING, attempts=0))
+            .select_related("recipient", "leave__student", "leave__approver")
+            .order_by("recipient_id", "created_at")
+        )
+        NotificationJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=NotificationJob.STATUS_SENDING, run_after=now + timedelta(seconds=LEASE_SECONDS),
+        )
+    batches = defaultdict(list)
+    for job in jobs:
+        batches[job.recipient].append(job)
+    return dict(batches)
+
+
+class RateLimiter:
+    """Token bucket shared by the sending threads: at most ``per_minute`` messages a minute."""
+
+    def __init__(self, per_minute):
+        self.interval = 60 / per_minute
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def build_messages(recipient, jobs):
+    submitted = [job.leave for job in jobs if job.kind == NotificationJob.KIND_SUBMITTED
+                 and job.leave.status == LeaveRequest.STATUS_PENDING and job.leave.approver_id == recipient.pk]
+    reviewed = [job.leave for job in jobs if job.kind == NotificationJob.KIND_REVIEWED]
+    messages = []
+    if submitted:
+        messages.append(EmailMessage(
+            f"{len(submitted)} leave request{'s' if len(submitted) != 1 else ''} awaiting your review",
+            render_to_string("core/emails/review_digest.txt", {"recipient": recipient, "leaves": submitted}),
+            to=[recipient.email],
+        ))
+    if reviewed:
+        messages.append(EmailMessage(
+            "Your leave request has been reviewed" if len(reviewed) == 1 else "Your leave requests have been reviewed",
+            render_to_string("core/emails/leave_decisions.txt", {"recipient": recipient, "leaves": reviewed}),
+            to=[recipient.email],
+        ))
+    return messages
+
+
+def deliver(recipient, jobs, limiter):
+    """Send one recipient's emails; returns (jobs, error message or None)."""
+    try:
+        # A job whose email can't even be built counts as a failed attempt
+        # too, so it ends up FAILED rather than left SENDING.
+        messages = build_messages(recipient, jobs) if recipient.email else []
+        if messages:
+            connection = get_connection()
+            for message in messages:
+                limiter.acquire()
+            connection.send_messages(messages)
+    except Exception as exc:  # template, SMTP and backend errors are retried
+        return jobs, f"{type(exc).__name__}: {exc}"
+    return jobs, None
+
+
+@retry_on_busy
+def finish(results):
+    """Record the outcome of ``deliver`` calls."""
+    now = timezone.now()
+    max_attempts = _setting("NOTIFICATION_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)
+    sent, failed = [], []
+    for jobs, error in results:
+        if error is None:
+            sent.extend(job.pk for job in jobs)
+            continue
+        for job in jobs:
+            job.attempts += 1
+            job.last_error = error
+            if job.attempts >= max_attempts:
+                job.status = NotificationJob.STATUS_FAILED
+            else:
+                job.status = NotificationJob.STATUS_PENDING
+                job.run_after = now + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (job.attempts - 1))
+            failed.append(job)
+    with immediate_atomic():
+        NotificationJob.objects.filter(pk__in=sent).update(status=NotificationJob.STATUS_SENT, sent_at=now)
+        NotificationJob.objects.bulk_update(failed, ["attempts", "last_error", "status", "run_after"])
+    return len(sent), len(failed)
+
+
+def purge_sent(older_than_days):
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    return NotificationJob.objects.filter(status=NotificationJob.STATUS_SENT, sent_at__lt=cutoff).delete()[0]
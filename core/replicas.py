@@ -0,0 +1,140 @@
+# core/replicas.py
+"""
+Read replica support: history pages, exports and analytics read from the
+"replica" database alias when one is configured; everything else, and every
+write, uses the primary. The dashboards stay on the primary because their
+ETags and cached rows are tied to the latest leave data version (see
+core/freshness.py).
+
+Reads only go to the replica inside ``reading_from(REPLICA)``, which views
+enter with ``@replica_reads``. After a user's successful POST,
+``ReadYourWritesMiddleware`` pins their session to the primary for
+``REPLICA_STICKY_SECONDS`` so they see their own change straight away even
+if the replica hasn't caught up yet.
+
+The replica is a copy of the primary SQLite file refreshed with SQLite's
+online backup API (``sync_replica`` / ``manage.py sync_replica``).
+"""
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.decorators import sync_and_async_middleware
+
+REPLICA = "replica"
+PIN_SESSION_KEY = "core:pin_primary_until"
+DEFAULT_STICKY_SECONDS = 15
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_read_alias = ContextVar("core_read_alias", default=None)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def sticky_seconds():
+    return getattr(settings, "REPLICA_STICKY_SECONDS", DEFAULT_STICKY_SECONDS)
+
+
+@contextmanager
+def reading_from(alias):
+    """Route ORM reads in this block (and its threads/tasks) to ``alias``; None means the default."""
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def is_pinned(request):
+    session = getattr(request, "session", None)
+    return session is not None and session.get(PIN_SESSION_KEY, 0) > time.time()
+
+
+def read_alias_for(request):
+    """REPLICA for a safe request from an unpinned session, otherwise None (the primary)."""
+    if not replica_configured() or request.method not in SAFE_METHODS or is_pinned(request):
+        return None
+    return REPLICA
+
+
+def replica_reads(view):
+    """Serve ``view``'s reads from the replica unless the session is pinned to the primary."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with reading_from(read_alias_for(request)):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema with the data, from the backup.
+        return db != REPLICA
+
+
+@sync_and_async_middleware
+class ReadYourWritesMiddleware:
+    """Pin a user's session to the primary for a while after a successful write request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Under ASGI the chain stays async, so the async views aren't run
+        # through async_to_sync on a worker thread.
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        response = self.get_response(request)
+        if self._wrote(request, response):
+            self._pin(request)
+        return response
+
+    async def _acall(self, request):
+        response = await self.get_response(request)
+        if self._wrote(request, response):
+            # The user and session may still have to be loaded from the database.
+            await sync_to_async(self._pin)(request)
+        return response
+
+    def _wrote(self, request, response):
+        return replica_configured() and request.method not in SAFE_METHODS and response.status_code < 400
+
+    def _pin(self, request):
+        if hasattr(request, "session") and request.user.is_authenticated:
+            request.session[PIN_SESSION_KEY] = time.time() + sticky_seconds()
+
+
+def _sqlite_target(name):
+    name = str(name)
+    return sqlite3.connect(name, uri=name.startswith("file:"))
+
+
+def sync_replica(pages=-1):
+    """Copy the primary database into the replica with SQLite's online backup API."""
+    primary = connections[DEFAULT_DB_ALIAS]
+    primary.ensure_connection()
+    target = _sqlite_target(settings.DATABASES[REPLICA]["NAME"])
+    try:
+        primary.connection.backup(target, pages=pages)
+    finally:
+        target.close()
@@ -0,0 +1,197 @@
+# core/rollups.py
+"""
+Leave analytics rollups (LeaveRollup), kept current from the submit/review paths.
+
+Each leave contributes to one row keyed by the month it was submitted, its
+type, the student's course/semester at submission (the leave's own snapshot)
+and its approver. Submissions and
+decisions apply small per-row deltas in the leave's transaction, and the
+analytics page sums the handful of rollup rows instead of grouping every
+LeaveRequest.
+"""
+from collections import Counter, defaultdict
+from datetime import date
+
+from django.db.models import Count, DateField, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .academic_calendar import working_days
+from .db import immediate_atomic, retry_on_busy
+from .models import ArchivedLeaveRequest, LeaveRequest, LeaveRollup
+
+REBUILD_CHUNK_SIZE = 5000
+
+KEY_FIELDS = ("month", "leave_type", "course", "semester", "approver_id")
+STATUS_FIELDS = {
+    LeaveRequest.STATUS_PENDING: "pending",
+    LeaveRequest.STATUS_APPROVED: "approved",
+    LeaveRequest.STATUS_REJECTED: "rejected",
+}
+
+DIMENSIONS = {
+    "leave_type": "leave_type",
+    "course": "course",
+    "semester": "semester",
+    "approver": "approver__first_name",
+}
+
+
+def month_of(value):
+    return date(value.year, value.month, 1)
+
+
+def _seconds(start, end):
+    return int((end - start).total_seconds())
+
+
+def _keys(leaves):
+    return {
+        leave.pk: (month_of(leave.created_at), leave.leave_type, leave.course, leave.semester, leave.approver_id)
+        for leave in leaves
+    }
+
+
+def _apply(deltas):
+    for key, fields in deltas.items():
+        fields = {name: value for name, value in fields.items() if value}
+        if not fields:
+            continue
+        lookup = dict(zip(KEY_FIELDS, key))
+        updated = LeaveRollup.objects.filter(**lookup).update(
+            **{name: F(name) + value for name, value in fields.items()}
+        )
+        if not updated:
+            LeaveRollup.objects.create(**lookup, **fields)
+
+
+def record_submission(leave):
+    key = _keys([leave])[leave.pk]
+    _apply({key: {"submitted": 1, STATUS_FIELDS[leave.status]: 1}})
+
+
+def record_transitions(leaves, previous_status, previous_reviewed_at=None):
+    """Move ``leaves`` out of ``previous_status`` (decided at ``previous_reviewed_at``, if ever)."""
+    keys = _keys(leaves)
+    deltas = defaultdict(Counter)
+    for leave in leaves:
+        delta = deltas[keys[leave.pk]]
+        if leave.status != previous_status:
+            delta[STATUS_FIELDS[previous_status]] -= 1
+            delta[STATUS_FIELDS[leave.status]] += 1
+        # Turnaround tracks the latest decision, matching a rebuild from reviewed_at.
+        delta["turnaround_seconds"] += _seconds(leave.created_at, leave.reviewed_at)
+        if previous_reviewed_at is None:
+            delta["reviewed"] += 1
+        else:
+            delta["turnaround_seconds"] -= _seconds(leave.created_at, previous_reviewed_at)
+        approved = leave.status == LeaveRequest.STATUS_APPROVED
+        if approved != (previous_status == LeaveRequest.STATUS_APPROVED):
+            sign = 1 if approved else -1
+            delta["days_lost"] += sign * working_days(leave.start_date, leave.end_date)
+    _apply(deltas)
+
+
+def _chunk_totals(chunk, spans):
+    """Aggregate one pk range in SQL, plus working days for its approved leaves."""
+    totals = defaultdict(Counter)
+    by_key = (
+        chunk.annotate(month=TruncMonth("created_at", output_field=DateField()))
+        .values("month", "leave_type", "course", "semester", "approver_id")
+        .order_by()
+    )
+    rows = by_key.annotate(
+        submitted=Count("id"),
+        pending=Count("id", filter=Q(status=LeaveRequest.STATUS_PENDING)),
+        approved=Count("id", filter=Q(status=LeaveRequest.STATUS_APPROVED)),
+        rejected=Count("id", filter=Q(status=LeaveRequest.STATUS_REJECTED)),
+        reviewed=Count("reviewed_at"),
+        turnaround=Sum(F("reviewed_at") - F("created_at")),
+    )
+    for row in rows:
+        key = (row["month"], row["leave_type"], row["course"], row["semester"], row["approver_id"])
+        totals[key].update({
+            "submitted": row["submitted"],
+            "pending": row["pending"],
+            "approved": row["approved"],
+            "rejected": row["rejected"],
+            "reviewed": row["reviewed"],
+            "turnaround_seconds": int(row["turnaround"].total_seconds()) if row["turnaround"] else 0,
+        })
+    # Approved leaves sharing a key and a date span lose the same days; count
+    # each span once per chunk and look its working days up once per rebuild.
+    approved = (
+        by_key.filter(status=LeaveRequest.STATUS_APPROVED)
+        .values("month", "leave_type", "course", "semester", "approver_id", "start_date", "end_date")
+        .annotate(leaves=Count("id"))
+    )
+    for row in approved:
+        key = (row["month"], row["leave_type"], row["course"], row["semester"], row["approver_id"])
+        span = (row["start_date"], row["end_date"])
+        if span not in spans:
+            spans[span] = working_days(*span)
+        totals[key]["days_lost"] += row["leaves"] * spans[span]
+    return totals
+
+
+@retry_on_busy
+def rebuild(chunk_size=REBUILD_CHUNK_SIZE):
+    """
+    Recompute every rollup from LeaveRequest and its archive in pk-range chunks; returns the row count.
+
+    The read and the replace share one BEGIN IMMEDIATE transaction, so no
+    submission or decision can apply a delta the rebuild would then
+    overwrite. That holds the write lock for the whole rebuild: writers wait
+    (and retry on busy) until it commits, so run it off-peak.
+    """
+    totals = defaultdict(Counter)
+    spans = {}
+    with immediate_atomic():
+        for model in (LeaveRequest, ArchivedLeaveRequest):
+            bounds = model.objects.order_by("pk").values_list("pk", flat=True)
+            first, last = bounds.first(), bounds.last()
+            if first is None:
+                continue
+            for lo in range(first, last + 1, chunk_size):
+                chunk = model.objects.filter(pk__gte=lo, pk__lt=lo + chunk_size)
+                for key, fields in _chunk_totals(chunk, spans).items():
+                    totals[key].update(fields)
+        rows = [LeaveRollup(**dict(zip(KEY_FIELDS, key)), **fields) for key, fields in totals.items()]
+        LeaveRollup.objects.all().delete()
+        LeaveRollup.objects.bulk_create(rows, batch_size=REBUILD_CHUNK_SIZE)
+    return len(rows)
+
+
+def trends(since, dimension):
+    """Monthly totals from ``since`` split by one of DIMENSIONS, with derived rates."""
+    column = DIMENSIONS[dimension]
+    rows = (
+        LeaveRollup.objects.filter(month__gte=month_of(since))
+        .values("month", column)
+        .annotate(
+            submitted=Sum("submitted"),
+            pending=Sum("pending"),
+            approved=Sum("approved"),
+            rejected=Sum("rejected"),
+            reviewed=Sum("reviewed"),
+            turnaround_seconds=Sum("turnaround_seconds"),
+            days_lost=Sum("days_lost"),
+        )
+        .order_by("-month", column)
+    )
+    result = []
+    for row in rows:
+        decided = row["approved"] + row["rejected"]
+        result.append({
+            "month": row["month"],
+            "group": row[column] if row[column] not in (None, "", 0) else "-",
+            "submitted": row["submitted"],
+            "pending": row["pending"],
+            "approved": row["approved"],
+            "rejected": row["rejected"],
+            "approval_rate": round(100 * row["approved"] / decided, 1) if decided else None,
+            "avg_turnaround_hours": (
+                round(row["turnaround_seconds"] / row["reviewed"] / 3600, 1) if row["reviewed"] else None
+            ),
+            "days_lost": row["days_lost"],
+        })
+    return result
@@ -0,0 +1,135 @@
+# core/routing.py
+"""
+Approver routing for new leave requests.
+
+Leaves covering more than ``DIRECTOR_THRESHOLD_DAYS`` working days (see
+core.academic_calendar) go to the director pool; shorter
+ones go to the mentor the student picked or, if they left it open, to the
+mentor pool. Within a pool the configured policy picks the approver.
+``services.submit_leave`` routes inside its write transaction, so the
+pending counts ``least_pending`` reads from LeaveCounter (one indexed query
+for the pool) are the same in every worker and can't change before the leave
+is saved.
+
+Policies are configured per pool with ``settings.LEAVE_ROUTING_POLICIES``,
+e.g. ``{"DIRECTOR": "least_pending", "MENTOR": "round_robin"}``.
+"""
+import itertools
+import threading
+
+from django.conf import settings
+
+from .academic_calendar import working_days
+from .directory import directory
+from .models import LeaveCounter, LeaveRequest, Profile
+
+DIRECTOR_THRESHOLD_DAYS = 2
+
+DEFAULT_POLICIES = {
+    Profile.ROLE_DIRECTOR: "least_pending",
+    Profile.ROLE_MENTOR: "least_pending",
+}
+
+
+def needs_director(start_date, end_date):
+    return working_days(start_date, end_date) > DIRECTOR_THRESHOLD_DAYS
+
+
+def pending_counts(pool):
+    """Pending leaves per approver in ``pool``; approvers without a counter row have none."""
+    counts = dict.fromkeys(pool, 0)
+    counts.update(
+        LeaveCounter.objects.filter(
+            role=LeaveCounter.ROLE_APPROVER, status=LeaveRequest.STATUS_PENDING, user_id__in=pool,
+        ).values_list("user_id", "count")
+    )
+    return counts
+
+
+class LeastPendingPolicy:
+    name = "least_pending"
+    needs_counts = True
+
+    def choose(self, counts, pool, student_id):
+        # min() keeps the first of equally loaded approvers, in roster order.
+        return min(pool, key=counts.__getitem__) if pool else None
+
+
+class RoundRobinPolicy:
+    name = "round_robin"
+    needs_counts = False
+
+    def __init__(self):
+        self._next = itertools.count()
+
+    def choose(self, counts, pool, student_id):
+        return pool[next(self._next) % len(pool)] if pool else None
+
+
+class StickyByStudentPolicy:
+    """Same approver for a student's requests while the pool is unchanged."""
+    name = "sticky_by_student"
+    needs_counts = False
+
+    def choose(self, counts, pool, student_id):
+        return pool[student_id % len(pool)] if pool else None
+
+
+POLICIES = {
+    policy.name: policy
+    for policy in (LeastPendingPolicy, RoundRobinPolicy, StickyByStudentPolicy)
+}
+
+
+class ApproverRouter:
+    """Per-process router holding the member ids and policy of each reviewer pool."""
+
+    def __init__(self, policies=None):
+        self._lock = threading.Lock()
+        self._policies = policies
+        self._pools = None
+
+    def _configured_policies(self):
+        if self._policies is not None:
+            return self._policies
+        return {**DEFAULT_POLICIES, **getattr(settings, "LEAVE_ROUTING_POLICIES", {})}
+
+    def _pools_for(self, entries):
+        """(pool member ids, policy) per role, rebuilt when the roster changes."""
+        with self._lock:
+            if self._pools is not None and self._pools[0] is entries:
+                return self._pools[1]
+            pools = {
+                role: ([e.pk for e in entries if e.role == role], POLICIES[name]())
+                for role, name in self._configured_policies().items()
+            }
+            self._pools = (entries, pools)
+            return pools
+
+    def pools(self):
+        return self._pools_for(directory.entries())
+
+    def assign(self, leave):
+        """
+        Set ``leave.approver_id`` (and clear ``mentor`` for director leaves).
+        Call it inside the transaction that saves the leave.
+        """
+        if needs_director(leave.start_date, leave.end_date):
+            leave.mentor = None
+            role = Profile.ROLE_DIRECTOR
+        elif leave.mentor_id:
+            leave.approver_id = leave.mentor_id
+            return leave
+        else:
+            role = Profile.ROLE_MENTOR
+        ids, policy = self.pools()[role]
+        counts = pending_counts(ids) if policy.needs_counts else None
+        leave.approver_id = policy.choose(counts, ids, leave.student_id)
+        return leave
+
+    def reset(self):
+        with self._lock:
+            self._pools = None
+
+
+router = ApproverRouter()
@@ -0,0 +1,18 @@
+# core/rows.py
+"""
+Row reader shared by the file-import management commands
+(``provision_accounts``, ``import_holidays``).
+"""
+import csv
+import json
+
+
+def read_rows(path):
+    """Yield rows as dicts from a .csv (with a header row) or .jsonl file without loading it whole."""
+    with open(path, newline="", encoding="utf-8") as fh:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(fh)
@@ -0,0 +1,196 @@
+# core/search.py
+"""
+Full-text search over leave reasons and review comments.
+
+Migration 0014 creates ``core_leavesearch``. It is an SQLite FTS5 table
+whose rowid is the leave id, and it holds its own copy of ``reason`` and
+``review_comments``. Triggers on LeaveRequest and ArchivedLeaveRequest keep
+it current, and a leave keeps its entry when ``archive_leaves`` moves it.
+Leaves written before the migration are indexed, in batches, by
+``manage.py rebuild_search_index``.
+
+Words are stemmed (porter), so "exams" finds "exam". Results are ranked by
+bm25, with reason matches weighted twice as much as comment matches. Each
+match is looked up by primary key in the hot and archive tables to apply the
+filters, so a search costs in proportion to its matches, not to the number
+of leaves. A common word can match a fifth of all leaves, though, so only the
+newest ``RANK_WINDOW`` matches that pass the filters are ranked. Leave ids
+grow with time, and FTS5 walks its matches in id order and stops at the
+window, so the cost of a search is bounded.
+"""
+import re
+
+from django.db import connections, router
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .db import immediate_atomic, retry_on_busy
+from .models import ArchivedLeaveRequest, LeaveRequest
+
+TABLE = "core_leavesearch"
+PAGE_SIZE = 20
+MAX_PAGE = 50  # ranked results are paged by OFFSET; nobody reads past this
+MAX_TERMS = 10
+# Matches ranked per search, newest first; see the module docstring.
+RANK_WINDOW = 5000
+BATCH_SIZE = 5000
+SNIPPET_TOKENS = 16
+
+WORD_RE = re.compile(r"\w+")
+# snippet() marks matches with these; the text is escaped before they become <mark>.
+_OPEN, _CLOSE = "\x02", "\x03"
+
+
+def match_expression(text):
+    """An FTS5 query matching leaves that contain every word of ``text``; '' when it has none."""
+    words = WORD_RE.findall(text.lower())[:MAX_TERMS]
+    # Quoted, each word is a plain term: no FTS5 operators or column filters from user input.
+    return " ".join(f'"{word}"' for word in words)
+
+
+def highlight(snippet):
+    return mark_safe(escape(snippet).replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>"))
+
+
+def _filters(status, approver, course, semester, start, end):
+    """SQL conditions on the matched leave and their parameters."""
+    # A leave is in exactly one of the two tables.
+    column = "COALESCE(hot.{0}, archived.{0})".format
+    sql, params = [], []
+    if status:
+        sql.append(f"{column('status')} = %s")
+        params.append(status)
+    if approver:
+        sql.append(f"{column('approver_id')} = %s")
+        params.append(approver)
+    # On the leave's course/semester snapshot, not the student's current profile.
+    if course:
+        sql.append(f"{column('course')} = %s")
+        params.append(course)
+    if semester:
+        sql.append(f"{column('semester')} = %s")
+        params.append(semester)
+    # Leaves overlapping [start, end].
+    if start:
+        sql.append(f"{column('end_date')} >= %s")
+        params.append(start)
+    if end:
+        sql.append(f"{column('start_date')} <= %s")
+        params.append(end)
+    return sql, params
+
+
+def _ranked_ids(expression, filters, params, offset, limit):
+    """[(leave id, snippet)] for one page of matches, best first."""
+    # The FTS scan drives the query; each match costs a primary key lookup
+    # in each table. (A UNION ALL of the two tables would be materialized in
+    # full first.)
+    joined = f"""
+        FROM {TABLE}
+        LEFT JOIN {LeaveRequest._meta.db_table} AS hot ON hot.id = {TABLE}.rowid
+        LEFT JOIN {ArchivedLeaveRequest._meta.db_table} AS archived ON archived.id = {TABLE}.rowid
+        WHERE {TABLE} MATCH %s {''.join(f' AND {condition}' for condition in filters)}
+    """
+    with connections[router.db_for_read(LeaveRequest)].cursor() as cursor:
+        # Walking matches newest first (FTS5's rowid order) stops after the
+        # window, instead of scoring every leave that mentions a common word.
+        cursor.execute(
+            f"SELECT {TABLE}.rowid {joined} ORDER BY {TABLE}.rowid DESC LIMIT 1 OFFSET %s",
+            [expression, *params, RANK_WINDOW - 1],
+        )
+        oldest = cursor.fetchone()
+        window = f"AND {TABLE}.rowid >= %s" if oldest else ""
+        cursor.execute(
+            f"""
+            SELECT {TABLE}.rowid, snippet({TABLE}, -1, char(2), char(3), '…', {SNIPPET_TOKENS})
+            {joined} {window}
+            ORDER BY {TABLE}.rank
+            LIMIT %s OFFSET %s
+            """,
+            [expression, *params, *(oldest or ()), limit, offset],
+        )
+        return cursor.fetchall()
+
+
+def search(text, status=None, approver=None, course=None, semester=None, start=None, end=None, page=1,
+           page_size=PAGE_SIZE):
+    """
+    One page of leaves matching ``text``, best match first, from the hot and
+    archive tables alike.
+
+    Returns ``(leaves, has_next)``. Each leave carries ``snippet``, the
+    matching passage with the matched words in <mark>, and ``archived``.
+    """
+    expression = match_expression(text)
+    if not expression:
+        return [], False
+    page = min(max(page, 1), MAX_PAGE)
+    filters, params = _filters(status, approver, course, semester, start, end)
+    rows = _ranked_ids(expression, filters, params, (page - 1) * page_size, page_size + 1)
+    has_next = len(rows) > page_size and page < MAX_PAGE
+    rows = rows[:page_size]
+
+    snippets = dict(rows)
+    found = {}
+    for model in (LeaveRequest, ArchivedLeaveRequest):
+        missing = [pk for pk in snippets if pk not in found]
+        if missing:
+            found.update(model.objects.select_related("student__profile", "approver").in_bulk(missing))
+    leaves = []
+    for pk, snippet in rows:
+        if pk in found:  # archived or deleted between the two reads
+            leave = found[pk]
+            leave.snippet = highlight(snippet)
+            leave.archived = isinstance(leave, ArchivedLeaveRequest)
+            leaves.append(leave)
+    return leaves, has_next
+
+
+def filter_matching(queryset, text):
+    """``queryset`` narrowed to leaves matching ``text`` (unranked), e.g. for admin change lists."""
+    expression = match_expression(text)
+    if not expression:
+        return queryset
+    return queryset.filter(pk__in=RawSQL(f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s", [expression]))
+
+
+@retry_on_busy
+def index_batch(model, after_id=0, batch_size=BATCH_SIZE):
+    """
+    Index the unindexed leaves among the next ``batch_size`` rows of ``model``
+    with pk > ``after_id``, in one write transaction.
+
+    Returns ``(last pk of the batch, leaves indexed)``; the pk is None once
+    the table is exhausted. Rows already indexed are skipped, because the
+    triggers keep them current.
+    """
+    table = model._meta.db_table
+    with immediate_atomic(), connections[router.db_for_write(model)].cursor() as cursor:
+        cursor.execute(
+            f"SELECT max(id) FROM (SELECT id FROM {table} WHERE id > %s ORDER BY id LIMIT %s)",
+            [after_id, batch_size],
+        )
+        last_id = cursor.fetchone()[0]
+        if last_id is None:
+            return None, 0
+        cursor.execute(
+            f"""
+            INSERT INTO {TABLE}(rowid, reason, review_comments)
+            SELECT id, reason, review_comments FROM {table}
+            WHERE id > %s AND id <= %s AND id NOT IN (SELECT rowid FROM {TABLE} WHERE rowid > %s AND rowid <= %s)
+            """,
+            [after_id, last_id, after_id, last_id],
+        )
+        return last_id, cursor.rowcount
+
+
+def clear_index():
+    with connections[router.db_for_write(LeaveRequest)].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+
+
+def optimize_index():
+    """Merge the index's b-trees into one, which keeps queries fast after a large backfill."""
+    with connections[router.db_for_write(LeaveRequest)].cursor() as cursor:
+        cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
@@ -0,0 +1,178 @@
+# core/services.py
+"""
+Write paths for LeaveRequest. Views go through these instead of calling
+``save()`` directly so everything derived from a leave (see the receivers in
+core/signals.py) is updated in the same transaction as the leave itself.
+"""
+from collections import defaultdict
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from .db import immediate_atomic, retry_on_busy
+from .models import LeaveRequest, Profile
+from .routing import router
+from .signals import leave_submitted, leave_reviewed
+
+
+def register_student(email, full_name, phone, password):
+    # Hashing is the slow part, so it happens before the write lock is taken.
+    return _create_student(email, full_name, phone, make_password(password))
+
+
+@retry_on_busy
+def _create_student(email, full_name, phone, encoded_password):
+    with immediate_atomic():
+        user = User.objects.create(username=email, email=email, first_name=full_name, password=encoded_password)
+        profile = user.profile
+        profile.phone = phone
+        profile.role = Profile.ROLE_STUDENT
+        profile.save()
+    return user
+
+
+def check_overlaps(student, start_date, end_date):
+    """Raise ValidationError listing ``student``'s pending/approved leaves that intersect the range."""
+    conflicts = list(LeaveRequest.overlapping(student, start_date, end_date))
+    if conflicts:
+        raise ValidationError([
+            ValidationError(
+                "Overlaps your %(status)s leave #%(pk)s (%(start)s to %(end)s).",
+                code="overlap",
+                params={
+                    "status": leave.get_status_display().lower(),
+                    "pk": leave.pk,
+                    "start": leave.start_date.strftime("%b %d, %Y"),
+                    "end": leave.end_date.strftime("%b %d, %Y"),
+                },
+            )
+            for leave in conflicts
+        ])
+
+
+@retry_on_busy
+def submit_leave(leave, check_overlap=True):
+    """
+    Save a new leave; one without an approver is routed under the write lock
+    first. Raises ValidationError if it overlaps the student's pending or
+    approved leaves: the form checks too, but only this check runs under the
+    write lock, so two submissions racing past the form can't both land.
+    """
+    with immediate_atomic():
+        if check_overlap:
+            check_overlaps(leave.student_id, leave.start_date, leave.end_date)
+        if leave.approver_id is None:
+            router.assign(leave)
+        # Rollups and the absence index key the leave on this snapshot from now on.
+        profile = Profile.objects.filter(user_id=leave.student_id).values_list("course", "semester").first()
+        course, semester = profile or ("", 0)
+        leave.course, leave.semester = course or "", semester or 0
+        leave.save()
+        leave_submitted.send(sender=LeaveRequest, leave=leave)
+    return leave
+
+
+@retry_on_busy
+def review_leave(leave, status, comments=""):
+    """Record an approve/reject decision on ``leave``."""
+    with immediate_atomic():
+        previous_status, previous_reviewed_at = (
+            LeaveRequest.objects.select_for_update().values_list("status", "reviewed_at").get(pk=leave.pk)
+        )
+        leave.status = status
+        leave.review_comments = comments
+        leave.reviewed_at = timezone.now()
+        leave.save(update_fields=["status", "review_comments", "reviewed_at"])
+        leave_reviewed.send(
+            sender=LeaveRequest,
+            leaves=[leave],
+            previous_status=previous_status,
+            previous_reviewed_at=previous_reviewed_at,
+        )
+    return leave
+
+
+# Upper bound on ids per bulk review, well inside SQLite's bound-variable limit.
+BULK_REVIEW_LIMIT = 1000
+
+BULK_UPDATED = "updated"
+BULK_NOT_FOUND = "not_found"
+BULK_NOT_AUTHORIZED = "not_authorized"
+BULK_ALREADY_REVIEWED = "already_reviewed"
+
+
+@retry_on_busy
+def bulk_review_leaves(reviewer, leave_ids, status, comments=""):
+    """
+    Apply one decision to many pending leaves assigned to ``reviewer``.
+
+    Authorisation for every id is checked with a single query and the change
+    is one conditional UPDATE; returns ``{leave_id: outcome}`` using the
+    ``BULK_*`` outcomes above.
+    """
+    leave_ids = list(dict.fromkeys(leave_ids))[:BULK_REVIEW_LIMIT]
+    with immediate_atomic():
+        found = {
+            leave.pk: leave
+            for leave in LeaveRequest.objects.select_for_update().filter(pk__in=leave_ids)
+        }
+        results, leaves = {}, []
+        for pk in leave_ids:
+            leave = found.get(pk)
+            if leave is None:
+                results[pk] = BULK_NOT_FOUND
+            elif leave.approver_id != reviewer.pk:
+                results[pk] = BULK_NOT_AUTHORIZED
+            elif leave.status != LeaveRequest.STATUS_PENDING:
+                results[pk] = BULK_ALREADY_REVIEWED
+            else:
+                results[pk] = BULK_UPDATED
+                leaves.append(leave)
+        if not leaves:
+            return results
+
+        now = timezone.now()
+        LeaveRequest.objects.filter(
+            pk__in=[leave.pk for leave in leaves],
+            approver=reviewer,
+            status=LeaveRequest.STATUS_PENDING,
+        ).update(status=status, review_comments=comments, reviewed_at=now)
+        for leave in leaves:
+            leave.status = status
+            leave.review_comments = comments
+            leave.reviewed_at = now
+        leave_reviewed.send(
+            sender=LeaveRequest,
+            leaves=leaves,
+            previous_status=LeaveRequest.STATUS_PENDING,
+            previous_reviewed_at=None,
+        )
+    return results
+
+
+def review_queryset(leaves, status, comments="", chunk_size=BULK_REVIEW_LIMIT):
+    """
+    Review every pending leave in the ``leaves`` queryset on behalf of its
+    approver, e.g. for an admin action over a whole filtered change list.
+
+    Leaves are taken ``chunk_size`` at a time in pk order, and each chunk goes
+    through ``bulk_review_leaves`` once per approver. A selection of any size
+    therefore holds the write lock for one short transaction at a time.
+    Returns how many leaves were reviewed.
+    """
+    pending = leaves.filter(status=LeaveRequest.STATUS_PENDING, approver__isnull=False).order_by("pk")
+    reviewed, last_id = 0, 0
+    while True:
+        chunk = list(pending.filter(pk__gt=last_id).values_list("pk", "approver_id")[:chunk_size])
+        if not chunk:
+            return reviewed
+        last_id = chunk[-1][0]
+        by_approver = defaultdict(list)
+        for pk, approver_id in chunk:
+            by_approver[approver_id].append(pk)
+        approvers = User.objects.in_bulk(by_approver)
+        for approver_id, ids in by_approver.items():
+            results = bulk_review_leaves(approvers[approver_id], ids, status, comments)
+            reviewed += sum(outcome == BULK_UPDATED for outcome in results.values())
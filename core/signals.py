@@ -1,12 +1,109 @@
 # core/signals.py
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver, Signal
 from django.contrib.auth.models import User
-from .models import Profile
+from .models import CalendarClosure, Profile, LeaveRequest
+from . import absence, counters, events, freshness, notifications, rollups
+from .academic_calendar import calendar
+from .auth import forget_identity
+from .directory import directory
+
+# Sent by core.services inside the transaction that writes the leave(s).
+leave_submitted = Signal()  # leave
+leave_reviewed = Signal()   # leaves, previous_status, previous_reviewed_at
+
 
 @receiver(post_save, sender=User)
-def create_or_update_profile(sender, instance, created, **kwargs):
+def create_profile(sender, instance, created, update_fields=None, **kwargs):
+    # Only creation needs work here; a profile missing on an older account is
+    # created lazily by core.auth.cache_identity instead of on every save
+    # (sign-in alone saves the user to bump last_login).
     if created:
         Profile.objects.create(user=instance)
-    else:
-        Profile.objects.get_or_create(user=instance)
+    elif update_fields is None or "first_name" in update_fields:
+        forget_identity(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+def invalidate_cached_identity(sender, instance, **kwargs):
+    forget_identity(instance.user_id)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_directory_for_profile(sender, instance, **kwargs):
+    # After commit, like freshness.bump: a reload between the bump and the
+    # commit would cache the old roster under the new version.
+    if instance.role != Profile.ROLE_STUDENT or instance.user_id in directory:
+        transaction.on_commit(directory.invalidate)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_directory_for_user(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    if instance.pk in directory:
+        transaction.on_commit(directory.invalidate)
+
+
+@receiver(post_save, sender=CalendarClosure)
+@receiver(post_delete, sender=CalendarClosure)
+def invalidate_academic_calendar(sender, instance, **kwargs):
+    transaction.on_commit(calendar.invalidate)
+
+
+@receiver(leave_submitted, sender=LeaveRequest)
+def count_submitted_leave(sender, leave, **kwargs):
+    counters.record_submission(leave)
+
+
+@receiver(leave_reviewed, sender=LeaveRequest)
+def count_reviewed_leaves(sender, leaves, previous_status, **kwargs):
+    counters.record_transitions(leaves, previous_status)
+
+
+@receiver(leave_reviewed, sender=LeaveRequest)
+def index_absences(sender, leaves, previous_status, **kwargs):
+    absence.record_transitions(leaves, previous_status)
+
+
+@receiver(leave_submitted, sender=LeaveRequest)
+def roll_up_submitted_leave(sender, leave, **kwargs):
+    rollups.record_submission(leave)
+
+
+@receiver(leave_reviewed, sender=LeaveRequest)
+def roll_up_reviewed_leaves(sender, leaves, previous_status, previous_reviewed_at=None, **kwargs):
+    rollups.record_transitions(leaves, previous_status, previous_reviewed_at)
+
+
+@receiver(leave_submitted, sender=LeaveRequest)
+def notify_approver(sender, leave, **kwargs):
+    notifications.enqueue_submission(leave)
+
+
+@receiver(leave_reviewed, sender=LeaveRequest)
+def notify_students(sender, leaves, previous_status, **kwargs):
+    notifications.enqueue_reviews(leaves, previous_status)
+
+
+@receiver(leave_submitted, sender=LeaveRequest)
+def push_submitted_leave(sender, leave, **kwargs):
+    events.on_submission(leave)
+
+
+@receiver(leave_reviewed, sender=LeaveRequest)
+def push_reviewed_leaves(sender, leaves, previous_status, **kwargs):
+    events.on_reviews(leaves, previous_status)
+
+
+@receiver(leave_submitted, sender=LeaveRequest)
+def refresh_dashboards_for_submission(sender, leave, **kwargs):
+    freshness.bump([leave.student_id, leave.approver_id])
+
+
+@receiver(leave_reviewed, sender=LeaveRequest)
+def refresh_dashboards_for_reviews(sender, leaves, **kwargs):
+    freshness.bump([user_id for leave in leaves for user_id in (leave.student_id, leave.approver_id)])
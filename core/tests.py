@@ -1,3 +1,1177 @@
-from django.test import TestCase
+import json
+import multiprocessing
+import os
+from unittest import mock
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.core.handlers.asgi import ASGIHandler
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.core import mail
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.core.management import call_command
+
+from .forms import LeaveRequestForm
+from .models import (
+    ArchivedLeaveRequest, CalendarClosure, DailyAbsence, Profile, LeaveRequest, LeaveCounter, LeaveRollup,
+    NotificationJob,
+)
+from . import absence, archive, counters, events, freshness, notifications, rollups, search, services
+from .academic_calendar import calendar, working_days
+from .directory import directory, warm_directory
+from .dashboards import reviewer_history_page, student_history_page
+from .db import immediate_atomic, retry_on_busy
+from . import auth, metrics, replicas
+from .bench import capture_statements
+from .management.commands.provision_accounts import PROFILE_FIELDS, Command as ProvisionAccountsCommand
+
+
+def make_user(email, role=Profile.ROLE_STUDENT, first_name="Test", password=None):
+    # Run the commit hooks that refresh the staff directory.
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        user = User.objects.create_user(username=email, email=email, password=password, first_name=first_name)
+        profile = user.profile
+        profile.role = role
+        profile.save()
+    return user
+
+
+def make_leave(student, approver, status=LeaveRequest.STATUS_PENDING, start=None, days=1):
+    start = start or date(2025, 1, 6)
+    # Fixtures stack a student's leaves on the same days, so overlaps are allowed here.
+    leave = services.submit_leave(LeaveRequest(
+        student=student,
+        approver=approver,
+        leave_type=LeaveRequest.LEAVE_PERSONAL,
+        start_date=start,
+        end_date=start + timedelta(days=days - 1),
+        reason="Family function out of town",
+    ), check_overlap=False)
+    if status != LeaveRequest.STATUS_PENDING:
+        services.review_leave(leave, status)
+    return leave
+
+
+class ReviewerDashboardQueryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["fragments"].clear()
+        self.mentor = make_user("mentor@suranacollege.edu.in", Profile.ROLE_MENTOR, "Mentor")
+        self.director = make_user("director@suranacollege.edu.in", Profile.ROLE_DIRECTOR, "Director")
+
+    def seed(self, approver, per_status):
+        offset = LeaveRequest.objects.filter(approver=approver).count()
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(offset, offset + per_status):
+                student = make_user(f"s{approver.pk}x{i}.mca23@suranacollege.edu.in", first_name=f"Student{i}")
+                for status, _ in LeaveRequest.STATUS_CHOICES:
+                    make_leave(student, approver, status)
+
+    def dashboard_queries(self, user, url_name):
+        self.client.force_login(user)
+        self.client.get(reverse(url_name))
+        # Warm identity cache: only the session, user, counters and pending rows remain.
+        caches["fragments"].clear()
+        with self.assertNumQueries(4) as ctx:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        # The pending rows are then served from the fragment cache.
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get(reverse(url_name)).context["pending_rows"], response.context["pending_rows"])
+        return response, ctx
+
+    def test_mentor_dashboard_query_count_is_constant(self):
+        self.seed(self.mentor, 2)
+        response, _ = self.dashboard_queries(self.mentor, "mentor_dashboard")
+        self.assertEqual(response.context["stats"], {"pending": 2, "approved": 2, "rejected": 2})
+
+        self.seed(self.mentor, 25)
+        response, _ = self.dashboard_queries(self.mentor, "mentor_dashboard")
+        self.assertEqual(response.context["stats"], {"pending": 27, "approved": 27, "rejected": 27})
+        self.assertContains(response, "Student26")
+
+    def test_director_dashboard_query_count_is_constant(self):
+        self.seed(self.director, 30)
+        response, _ = self.dashboard_queries(self.director, "director_dashboard")
+        self.assertEqual(response.context["stats"]["pending"], 30)
+
+    def test_history_pages_walk_the_whole_history_without_repeats(self):
+        self.seed(self.mentor, 7)
+        seen, cursor = [], None
+        while True:
+            rows, cursor = reviewer_history_page(self.mentor, LeaveRequest.STATUS_APPROVED, cursor, page_size=3)
+            seen.extend(leave.pk for leave in rows)
+            if cursor is None:
+                break
+        expected = LeaveRequest.objects.filter(
+            approver=self.mentor, status=LeaveRequest.STATUS_APPROVED
+        ).order_by("-reviewed_at", "-id").values_list("pk", flat=True)
+        self.assertEqual(seen, list(expected))
+
+    def test_history_fragment(self):
+        self.seed(self.mentor, 2)
+        self.client.force_login(self.mentor)
+        response = self.client.get(reverse("reviewer_history", args=["rejected"]))
+        self.assertContains(response, "<tr>", count=2)
+        self.assertEqual(self.client.get(reverse("reviewer_history", args=["pending"])).status_code, 404)
+        self.assertEqual(self.client.get(reverse("reviewer_history", args=["approved"]), {"after": "x"}).status_code, 400)
+
+
+class IdentityCacheTests(TestCase):
+    def test_role_is_cached_and_invalidated_on_profile_change(self):
+        user = make_user("mentor@suranacollege.edu.in", Profile.ROLE_MENTOR, "Mentor")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(reverse("mentor_dashboard")).status_code, 200)
+
+        profile = Profile.objects.get(user=user)
+        profile.role = Profile.ROLE_DIRECTOR
+        profile.save()
+        self.assertRedirects(self.client.get(reverse("mentor_dashboard")), reverse("index"))
+        self.assertEqual(self.client.get(reverse("director_dashboard")).status_code, 200)
+
+    def test_unsignalled_changes_age_out_and_logout_is_shared(self):
+        user = make_user("mentor@suranacollege.edu.in", Profile.ROLE_MENTOR, "Mentor")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(reverse("mentor_dashboard")).status_code, 200)
+
+        # update() sends no signal, so the entry is only refreshed once it ages out.
+        Profile.objects.filter(user=user).update(role=Profile.ROLE_DIRECTOR)
+        self.assertEqual(self.client.get(reverse("mentor_dashboard")).status_code, 200)
+        later = time.time() + auth.IDENTITY_CACHE_TIMEOUT + 1
+        with mock.patch("time.time", return_value=later):
+            self.assertRedirects(self.client.get(reverse("mentor_dashboard")), reverse("index"))
+
+        # A flush elsewhere deletes the session row, which every worker reads.
+        Session.objects.all().delete()
+        response = self.client.get(reverse("director_dashboard"))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("next=", response["Location"])
+
+    def test_anonymous_users_are_sent_to_login(self):
+        response = self.client.get(reverse("student_dashboard"))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("next=", response["Location"])
+
+    def test_main_dashboard_redirects_by_role(self):
+        self.client.force_login(make_user("director@suranacollege.edu.in", Profile.ROLE_DIRECTOR, "Director"))
+        self.assertRedirects(self.client.get(reverse("main_dashboard")), reverse("director_dashboard"))
+
+
+class LeaveCounterTests(TestCase):
+    def setUp(self):
+        self.mentor = make_user("bharathi.mca@suranacollege.edu.in", Profile.ROLE_MENTOR, "Bharathi")
+        self.student = make_user("asha.mca23@suranacollege.edu.in", first_name="Asha")
+
+    def test_submit_and_review_keep_counters_in_step(self):
+        self.client.force_login(self.student)
+        response = self.client.post(reverse("request_leave"), {
+            "leave_type": LeaveRequest.LEAVE_SICK,
+            "start_date": "2025-01-06",
+            "end_date": "2025-01-06",
+            "reason": "Fever and doctor visit",
+            "mentor": self.mentor.pk,
+        })
+        self.assertRedirects(response, reverse("student_dashboard"))
+        self.assertEqual(counters.get_stats(self.student, LeaveCounter.ROLE_STUDENT)["pending"], 1)
+        self.assertEqual(counters.get_stats(self.mentor, LeaveCounter.ROLE_APPROVER)["pending"], 1)
+
+        leave = LeaveRequest.objects.get()
+        self.client.force_login(self.mentor)
+        self.client.post(reverse("review_leave", args=[leave.pk]), {"action": "approve", "comments": "ok"})
+        self.assertEqual(
+            counters.get_stats(self.mentor, LeaveCounter.ROLE_APPROVER),
+            {"pending": 0, "approved": 1, "rejected": 0},
+        )
+        self.assertEqual(counters.reconcile([self.student.pk, self.mentor.pk], repair=False), {})
+
+    def test_rebuild_repairs_drift(self):
+        make_leave(self.student, self.mentor, LeaveRequest.STATUS_REJECTED)
+        LeaveCounter.objects.filter(user=self.student).update(count=7)
+        LeaveCounter.objects.filter(user=self.mentor).delete()
+        call_command("rebuild_leave_counters", chunk_size=1, stdout=StringIO())
+        self.assertEqual(counters.get_stats(self.student, LeaveCounter.ROLE_STUDENT)["rejected"], 1)
+        self.assertEqual(counters.get_stats(self.student, LeaveCounter.ROLE_STUDENT)["pending"], 0)
+        self.assertEqual(counters.get_stats(self.mentor, LeaveCounter.ROLE_APPROVER)["rejected"], 1)
+
+
+class StaffDirectoryTests(TestCase):
+    def setUp(self):
+        directory.invalidate()
+        self.student = make_user("asha.mca23@suranacollege.edu.in", first_name="Asha")
+        self.mentor = make_user("chandan.mca@suranacollege.edu.in", Profile.ROLE_MENTOR, "chandan")
+        self.director = make_user("director@suranacollege.edu.in", Profile.ROLE_DIRECTOR, "Director")
+
+    def test_form_choices_come_from_the_directory(self):
+        directory.load()
+        self.client.force_login(self.student)
+        self.client.get(reverse("request_leave"))
+        with self.assertNumQueries(2):  # the session and user; role and roster are cached
+            response = self.client.get(reverse("request_leave"))
+        self.assertContains(response, "Chandan")
+
+    def test_unlisted_and_renamed_staff(self):
+        profile = Profile.objects.get(user=self.mentor)
+        profile.accepts_requests = False
+        self.assertEqual(len(directory.mentors()), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+            # No version bump before the commit, so no worker reloads the
+            # roster while the change is still invisible to it.
+            self.assertEqual(len(directory.mentors()), 1)
+        self.assertEqual(directory.mentors(), [])
+
+        self.director.first_name = "Principal"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.director.save()
+        self.assertEqual(directory.directors()[0].name, "Principal")
+
+    def test_a_change_saved_by_another_worker_reaches_this_one(self):
+        self.assertEqual(len(directory.mentors()), 1)
+        Profile.objects.filter(user=self.mentor).update(accepts_requests=False)
+        # The other worker's commit hook runs in its own process.
+        other_worker = multiprocessing.get_context("fork").Process(target=directory.invalidate)
+        other_worker.start()
+        other_worker.join()
+        self.assertEqual(other_worker.exitcode, 0)
+        self.assertEqual(directory.mentors(), [])
+
+    def test_long_leave_routes_to_director_from_directory(self):
+        self.client.force_login(self.student)
+        self.client.post(reverse("request_leave"), {
+            "leave_type": LeaveRequest.LEAVE_PERSONAL,
+            "start_date": "2025-01-06",
+            "end_date": "2025-01-10",
+            "reason": "Sister's wedding in hometown",
+        })
+        self.assertEqual(LeaveRequest.objects.get().approver, self.director)
+
+
+class ProvisionAccountsTests(TestCase):
+    def setUp(self):
+        directory.invalidate()
+        make_user("asha.mca23@suranacollege.edu.in", first_name="Asha")
+        make_user("chandan.mca@suranacollege.edu.in", Profile.ROLE_MENTOR, "chandan")
+
+    def test_provision_accounts_is_idempotent(self):
+        fh = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False)
+        self.addCleanup(os.unlink, fh.name)
+        with fh:
+            fh.write(
+                "email,first_name,role,password,phone,ussn,semester,year,course,specialization\n"
+                "Ravi.MCA24@suranacollege.edu.in,Ravi,,s3cret-pass,98450,U24MCA07,1,2024,MCA,\n"
+                "dinesh.mca@suranacollege.edu.in,Dinesh,mentor,,,,,,,\n"
+                "asha.mca23@suranacollege.edu.in,Asha,,,,,,,,\n"
+                "no-role@suranacollege.edu.in,Nobody,DEAN,,,,,,,\n"
+            )
+        self.assertEqual(directory.mentors()[0].name, "chandan")
+        for created, skipped in ((2, 1), (0, 3)):
+            out, err = StringIO(), StringIO()
+            call_command("provision_accounts", fh.name, "--workers", "1", stdout=out, stderr=err)
+            self.assertIn(f"Created {created}, skipped {skipped} existing, 1 invalid rows", out.getvalue())
+            self.assertIn("no-role@suranacollege.edu.in (DEAN)", err.getvalue())
+
+        self.assertEqual(User.objects.count(), 4)
+        self.assertEqual(Profile.objects.count(), 4)
+        ravi = User.objects.get(username="ravi.mca24@suranacollege.edu.in")
+        self.assertTrue(ravi.check_password("s3cret-pass"))
+        self.assertEqual(
+            Profile.objects.filter(user=ravi).values_list("role", "phone", "ussn", "semester", "course").get(),
+            (Profile.ROLE_STUDENT, "98450", "U24MCA07", 1, "MCA"),
+        )
+        dinesh = User.objects.get(username="dinesh.mca@suranacollege.edu.in")
+        self.assertFalse(dinesh.has_usable_password())
+        self.assertEqual(dinesh.profile.role, Profile.ROLE_MENTOR)
+        # The bulk inserts skip the save signals, so the command refreshes the roster itself.
+        self.assertEqual([entry.name for entry in directory.mentors()], ["chandan", "Dinesh"])
+
+    def test_accounts_created_by_an_overlapping_run_are_skipped(self):
+        account = {
+            "email": "ravi.mca24@suranacollege.edu.in", "first_name": "Ravi", "role": Profile.ROLE_STUDENT,
+            "password": "!", "semester": 1, **dict.fromkeys(PROFILE_FIELDS, ""),
+        }
+        # Both runs passed the existence check before either inserted.
+        command = ProvisionAccountsCommand()
+        self.assertEqual(command.insert([dict(account)]), 1)
+        self.assertEqual(command.insert([dict(account)]), 0)
+        self.assertEqual(User.objects.filter(username=account["email"]).count(), 1)
+
+
+class ApproverRoutingTests(TestCase):
+    def setUp(self):
+        directory.invalidate()
+        self.student = make_user("asha.mca23@suranacollege.edu.in", first_name="Asha")
+        self.directors = [
+            make_user(f"director{i}@suranacollege.edu.in", Profile.ROLE_DIRECTOR, f"Director{i}") for i in range(2)
+        ]
+        make_leave(self.student, self.directors[0])  # one already waiting on the first director
+
+    def submit(self, start, end):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("request_leave"), {
+                "leave_type": LeaveRequest.LEAVE_PERSONAL,
+                "start_date": start,
+                "end_date": end,
+                "reason": "Travelling home for a festival",
+            })
+
+    def test_least_pending_spreads_long_leaves_across_directors(self):
+        self.client.force_login(self.student)
+        for n in range(5):
+            start = date(2025, 2, 3) + timedelta(weeks=n)  # Monday to Thursday
+            self.submit(start.isoformat(), (start + timedelta(days=3)).isoformat())
+        pending = [
+            LeaveRequest.objects.filter(approver=d, status=LeaveRequest.STATUS_PENDING).count()
+            for d in self.directors
+        ]
+        self.assertEqual(pending, [3, 3])
+
+    def test_least_pending_reads_counts_written_by_other_workers(self):
+        self.client.force_login(self.student)
+        self.submit("2025-02-03", "2025-02-06")
+        self.assertEqual(LeaveRequest.objects.latest("pk").approver, self.directors[1])
+        # Leaves routed by another process only show up in the counters.
+        LeaveCounter.objects.filter(
+            user=self.directors[1], role=LeaveCounter.ROLE_APPROVER, status=LeaveRequest.STATUS_PENDING
+        ).update(count=5)
+        self.submit("2025-02-10", "2025-02-13")
+        self.assertEqual(LeaveRequest.objects.latest("pk").approver, self.directors[0])
+        self.submit("2025-02-17", "2025-02-20")
+        self.assertEqual(LeaveRequest.objects.latest("pk").approver, self.directors[0])
+
+
+class BulkReviewTests(TestCase):
+    def setUp(self):
+        self.mentor = make_user("mentor@suranacollege.edu.in", Profile.ROLE_MENTOR, "Mentor")
+        self.other = make_user("other@suranacollege.edu.in", Profile.ROLE_MENTOR, "Other")
+        self.student = make_user("asha.mca23@suranacollege.edu.in", first_name="Asha")
+        self.mine = [make_leave(self.student, self.mentor) for _ in range(3)]
+        self.done = make_leave(self.student, self.mentor, LeaveRequest.STATUS_REJECTED)
+        self.theirs = make_leave(self.student, self.other)
+
+    def test_bulk_approve_reports_per_id_results(self):
+        self.client.force_login(self.mentor)
+        ids = [leave.pk for leave in self.mine] + [self.done.pk, self.theirs.pk, 999999]
+        response = self.client.post(
+            reverse("bulk_review_leave"),
+            {"ids": ids, "action": "approve", "comments": "Exam week"},
+            HTTP_ACCEPT="application/json",
+        )
+        results = response.json()["results"]
+        self.assertEqual([results[str(leave.pk)] for leave in self.mine], ["updated"] * 3)
+        self.assertEqual(results[str(self.done.pk)], "already_reviewed")
+        self.assertEqual(results[str(self.theirs.pk)], "not_authorized")
+        self.assertEqual(results["999999"], "not_found")
+
+        self.assertEqual(
+            LeaveRequest.objects.filter(approver=self.mentor, status=LeaveRequest.STATUS_APPROVED).count(), 3
+        )
+        self.assertEqual(LeaveRequest.objects.get(pk=self.theirs.pk).status, LeaveRequest.STATUS_PENDING)
+        self.assertEqual(
+            counters.get_stats(self.mentor, LeaveCounter.ROLE_APPROVER),
+            {"pending": 0, "approved": 3, "rejected": 1},
+        )
+
+    def test_bulk_review_from_dashboard_form_redirects(self):
+        self.client.force_login(self.mentor)
+        response = self.client.post(reverse("bulk_review_leave"), {"ids": [self.mine[0].pk], "action": "reject"})
+        self.assertRedirects(response, reverse("mentor_dashboard"))
+        self.assertEqual(LeaveRequest.objects.get(pk=self.mine[0].pk).status, LeaveRequest.STATUS_REJECTED)
+
+
+class LeaveExportTests(TestCase):
+    def setUp(self):
+        self.director = make_user("director@suranacollege.edu.in", Profile.ROLE_DIRECTOR, "Director")
+        self.student = make_user("asha.mca23@suranacollege.edu.in", first_name="Asha")
+        make_leave(self.student, self.director, LeaveRequest.STATUS_APPROVED)
+        make_leave(self.student, self.director)
+
+    def test_director_streams_filtered_csv(self):
+        self.client.force_login(self.director)
+        response = self.client.get(reverse("export_leaves"), {"status": LeaveRequest.STATUS_APPROVED})
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith("id,student_email"))
+        self.assertIn("asha.mca23@suranacollege.edu.in", lines[1])
+
+    def test_csv_cells_never_open_as_formulas(self):
+        LeaveRequest.objects.update(reason='=HYPERLINK("http://evil.example","Click")', review_comments="-2+3")
+        self.client.force_login(self.director)
+        response = self.client.get(reverse("export_leaves"), {"status": LeaveRequest.STATUS_APPROVED})
+        row = b"".join(response.streaming_content).decode().splitlines()[1]
+        self.assertIn('"\'=HYPERLINK(""http://evil.example"",""Click"")"', row)
+        self.assertIn(",'-2+3,", row)
+        response = self.client.get(reverse("export_leaves"), {"format": "jsonl"})
+        self.assertEqual(json.loads(next(iter(response.streaming_content)))["review_comments"], "-2+3")
+
+    def test_course_and_semester_come_from_the_leave(self):
+        LeaveRequest.objects.update(course="MCA", semester=3)
+        Profile.objects.filter(user=self.student).update(course="MBA", semester=1)
+        self.client.force_login(self.director)
+        response = self.client.get(reverse("export_leaves"), {"format": "jsonl"})
+        row = json.loads(next(iter(response.streaming_content)))
+        self.assertEqual((row["course"], row["semester"]), ("MCA", 3))
+
+    def test_students_cannot_export(self):
+        self.client.force_login(self.student)
+        self.assertRedirects(self.client.get(reverse("export_leaves")), reverse("index"))
+
+
+class OverlapDetectionTests(TestCase):
+    def setUp(self):
+        self.mentor = make_user("mentor@suranacollege.edu.in", Profile.ROLE_MENTOR, "Mentor")
+        self.student = make_user("asha.mca23@suranacollege.edu.in", first_name="Asha")
+        self.pending = make_leave(self.student, self.mentor, start=date(2025, 1, 6), days=3)
+        make_leave(self.student, self.mentor, LeaveRequest.STATUS_REJECTED, start=date(2025, 1, 13), days=2)
+
+    def form(self, start, end):
+        return LeaveRequestForm({
+            "leave_type": LeaveRequest.LEAVE_SICK,
+            "start_date": start,
+            "end_date": end,
+            "reason": "Fever and doctor visit",
+        }, student=self.student)
+
+    def test_overlap_with_pending_leave_is_rejected(self):
+        form = self.form("2025-01-08", "2025-01-08")
+        self.assertFalse(form.is_valid())
+        self.assertIn(f"#{self.pending.pk}", form.non_field_errors()[0])
+
+    def test_adjacent_and_rejected_ranges_are_allowed(self):
+        self.assertTrue(self.form("2025-01-09", "2025-01-10").is_valid())
+        self.assertTrue(self.form("2025-01-13", "2025-01-14").is_valid())
+
+    def test_submission_rechecks_overlaps_under_the_write_lock(self):
+        # A racing submission landed after this one passed the form's check.
+        self.client.force_login(self.student)
+        with mock.patch("core.forms.check_overlaps"):
+            response = self.client.post(reverse("request_leave"), {
+                "leave_type": LeaveRequest.LEAVE_SICK,
+                "start_date": "2025-01-08",
+                "end_date": "2025-01-09",
+                "reason": "Fever and doctor visit",
+                "mentor": self.mentor.pk,
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f"Overlaps your pending leave #{self.pending.pk}")
+        self.assertEqual(LeaveRequest.objects.filter(student=self.student).count(), 2)
+
+    def test_overlap_query_uses_span_index(self):
+        plan = LeaveRequest.overlapping(self.student, date(2025, 1, 1), date(2025, 1, 2)).explain()
+        self.assertIn("leave_student_span_idx", plan)
+
+
+class AbsenceIndexTests(TestCase):
+    def setUp(self):
+        self.director = make_user("director@suranacollege.edu.in", Profile.ROLE_DIRECTOR, "Director")
+        self.asha = make_user("asha.mca23@suranacollege.edu.in", first_name="Asha")
+        self.ravi = make_user("ravi.mca23@suranacollege.edu.in", first_name="Ravi")
+        Profile.objects.filter(user=self.asha).update(course="MCA", semester=3)
+        Profile.objects.filter(user=self.ravi).update(course="MBA", semester=1)
+        make_leave(self.asha, self.director, LeaveRequest.STATUS_APPROVED, start=date(2025, 1, 6), days=3)
+        self.ravi_leave = make_leave(self.ravi, self.director, LeaveRequest.STATUS_APPROVED,
+                                     start=date(2025, 1, 7), days=3)
+        make_leave(self.ravi, self.director, start=date(2025, 1, 20))
+
+    def counts(self, **filters):
+        return [n for _, n in absence.daily_counts(date(2025, 1, 5), date(2025, 1, 10), **filters)]
+
+    def test_approvals_update_daily_counts(self):
+        self.assertEqual(self.counts(), [0, 1, 2, 2, 1, 0])
+        self.assertEqual(self.counts(course="MCA"), [0, 1, 1, 1, 0, 0])
+        services.review_leave(self.ravi_leave, LeaveRequest.STATUS_REJECTED)
+        self.assertEqual(self.counts(), [0, 1, 1, 1, 0, 0])
+
+    def test_reversal_after_profile_edit_leaves_the_original_bucket(self):
+        Profile.objects.filter(user=self.ravi).update(course="MCA", semester=3)
+        services.review_leave(self.ravi_leave, LeaveRequest.STATUS_REJECTED)
+        self.assertEqual(self.counts(course="MBA"), [0] * 6)
+        self.assertEqual(self.counts(course="MCA"), [0, 1, 1, 1, 0, 0])
+        self.assertFalse(DailyAbsence.objects.filter(count__lt=0).exists())
+
+    def test_rebuild_matches_incremental_index(self):
+        incremental = self.counts()
+        call_command("rebuild_absence_index", stdout=StringIO())
+        self.assertEqual(self.counts(), incremental)
+
+    def test_director_drills_down_to_a_day(self):
+        self.client.force_login(self.director)
+        response = self.client.get(reverse("absence_calendar"),
+                                    {"start": "2025-01-06", "end": "2025-01-07", "format": "json"})
+        self.assertEqual(response.json()["days"], [
+            {"date": "2025-01-06", "absent": 1},
+            {"date": "2025-01-07", "absent": 2},
+        ])
+        response = self.client.get(reverse("absence_day"), {"date": "2025-01-07", "semester": 1})
+        self.assertEqual([leave.student for leave in response.context["leaves"]], [self.ravi])
+
+
+class AcademicCalendarTests(TestCase):
+    def setUp(self):
+        calendar.invalidate()
+        directory.invalidate()
+        self.student = make_user("asha.mca23@suranacollege.edu.in", first_name="Asha")
+        self.mentor = make_user("mentor@suranacollege.edu.in", Profile.ROLE_MENTOR, "Mentor")
+        self.director = make_user("director@suranacollege.edu.in", Profile.ROLE_DIRECTOR, "Director")
+
+    def test_weekends_and_closures_are_not_working_days(self):
+        friday, monday = date(2025, 1, 10), date(2025, 1, 13)
+        self.assertEqual(working_days(friday, monday), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            CalendarClosure.objects.create(name="Sankranti", start_date=date(2025, 1, 14), end_date=date(2025, 1, 15))
+        self.assertEqual(working_days(friday, date(2025, 1, 17)), 4)
+        # Spans the June academic-year boundary.
+        self.assertEqual(working_days(date(2025, 5, 30), date(2025, 6, 2)), 2)
+
+    def test_a_closure_added_by_another_worker_reaches_this_one(self):
+        friday, monday = date(2025, 1, 10), date(2025, 1, 13)
+        self.assertEqual(working_days(friday, monday), 2)
+        CalendarClosure.objects.bulk_create([CalendarClosure(name="Bandh", start_date=monday, end_date=monday)])
+        other_worker = multiprocessing.get_context("fork").Process(target=calendar.invalidate)
+        other_worker.start()
+        other_worker.join()
+        self.assertEqual(other_worker.exitcode, 0)
+        self.assertEqual(working_days(friday, monday), 1)
+
+    def test_dates_at_the_limits_and_wide_ranges(self):
+        self.assertEqual(working_days(date(9999, 12, 27), date.max), 5)
+        self.assertEqual(working_days(date.min, date(1, 1, 7)), 5)
+        self.client.force_login(self.student)
+        url = reverse("leave_working_days")
+        self.assertEqual(self.client.get(url, {"start": "9999-12-01", "end": "9999-12-01"}).json()["working_days"], 1)
+        self.assertEqual(self.client.get(url, {"start": "0001-01-01", "end": "9999-12-31"}).status_code, 400)
+        response = self.client.post(reverse("request_leave"), {
+            "leave_type": LeaveRequest.LEAVE_PERSONAL,
+            "start_date": "2025-01-06",
+            "end_date": "2027-01-06",
+            "reason": "Travelling abroad for two years",
+        })
+        self.assertFormError(response.context["form"], None, "A leave can span at most 366 days.")
+        response = self.client.post(reverse("request_leave"), {
+            "leave_type": LeaveRequest.LEAVE_PERSONAL,
+            "start_date": "9999-12-01",
+            "end_date": "9999-12-01",
+            "reason": "Travelling home for a festival",
+        })
+        self.assertRedirects(response, reverse("student_dashboard"), fetch_redirect_response=False)
+
+    def test_friday_to_monday_leave_goes_to_a_mentor(self):
+        self.client.force_login(self.student)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("request_leave"), {
+                "leave_type": LeaveRequest.LEAVE_PERSONAL,
+                "start_date": "2025-01-10",
+                "end_date": "2025-01-13",
+                "reason": "Travelling home for a festival",
+            })
+        self.assertEqual(LeaveRequest.objects.get(student=self.student).approver, self.mentor)
+
+    def test_import_holidays_is_idempotent(self):
+        path = self.tmp_csv("name,date,end_date,kind\nRepublic Day,2025-01-27,,\nSemester exams,2025-01-28,2025-01-31,EXAM\n")
+        for _ in range(2):
+            call_command("import_holidays", path, stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(CalendarClosure.objects.count(), 2)
+        self.assertEqual(working_days(date(2025, 1, 27), date(2025, 2, 3)), 1)
+
+    def tmp_csv(self, content):
+        fh = tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False)
+        self.addCleanup(os.unlink, fh.name)
+        with fh:
+            fh.write(content)
+        return fh.name
+
+
+class LeaveRollupTests(TestCase):
+    def setUp(self):
+        calendar.invalidate()
+        self.director = make_user("director@suranacollege.edu.in", Profile.ROLE_DIRECTOR, "Director")
+        self.student = make_user("asha.mca23@suranacollege.edu.in", first_name="Asha")
+        Profile.objects.filter(user=self.student).update(course="MCA", semester=3)
+        self.approved = make_leave(self.student, self.director, LeaveRequest.STATUS_APPROVED, days=3)
+        make_leave(self.student, self.director, LeaveRequest.STATUS_REJECTED, start=date(2025, 1, 13))
+        self.pending = make_leave(self.student, self.director, start=date(2025, 1, 20))
+
+    def snapshot(self):
+        fields = ("month", "leave_type", "course", "semester", "approver_id", "submitted", "pending",
+                  "approved", "rejected", "reviewed", "turnaround_seconds", "days_lost")
+        return sorted(LeaveRollup.objects.values_list(*fields))
+
+    def test_incremental_rollups_match_rebuild(self):
+        services.review_leave(self.approved, LeaveRequest.STATUS_REJECTED, "Changed my mind")
+        incremental = self.snapshot()
+        call_command("rebuild_leave_rollups", "--chunk-size", "2", stdout=StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_profile_edit_between_submit_and_review_keeps_the_bucket(self):
+        self.client.force_login(self.student)
+        self.client.post(reverse("edit_profile"), {"course": "MBA", "semester": 1})
+        self.assertEqual(Profile.objects.get(user=self.student).course, "MBA")
+        services.review_leave(self.pending, LeaveRequest.STATUS_APPROVED)
+        incremental = self.snapshot()
+        self.assertEqual([row[2:4] for row in incremental], [("MCA", 3)])
+        self.assertTrue(all(n >= 0 for row in incremental for n in row[5:]))
+        call_command("rebuild_leave_rollups", stdout=StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_trends_by_course(self):
+        [row] = rollups.trends(date(2000, 1, 1), "course")
+        self.assertEqual(row["group"], "MCA")
+        self.assertEqual((row["submitted"], row["pending"], row["days_lost"]), (3, 1, 3))
+        self.assertEqual(row["approval_rate"], 50.0)
+
+    def test_analytics_page_reads_rollups_only(self):
+        self.client.force_login(self.director)
+        self.client.get(reverse("leave_analytics"))
+        with self.assertNumQueries(3):  # session, auth user, rollups
+            response = self.client.get(reverse("leave_analytics"), {"by": "approver", "months": 60})
+        self.assertEqual(response.status_code, 200)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["fragments"].clear()
+        self.mentor = make_user("mentor@suranacollege.edu.in", Profile.ROLE_MENTOR, "Mentor")
+        self.student = make_user("asha.mca23@suranacollege.edu.in", first_name="Asha")
+        self.leave = make_leave(self.student, self.mentor)
+        # AsyncClient fires request_started off the test's connection, where
+        # the one-shot roster load would hit SQLite's table lock.
+        warm_directory(sender=None)
+
+    async def test_async_dashboards_match_sync(self):
+        await sync_to_async(self.async_client.force_login)(self.mentor)
+        response = await self.async_client.get(reverse("async_mentor_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f'data-leave="{self.leave.pk}"')
+        self.assertEqual(response.context["stats"], {"pending": 1, "approved": 0, "rejected": 0})
+
+        await sync_to_async(self.async_client.force_login)(self.student)
+        response = await self.async_client.get(reverse("async_mentor_dashboard"))
+        self.assertRedirects(response, reverse("index"), fetch_redirect_response=False)
+
+    async def test_async_review_leave(self):
+        await sync_to_async(self.async_client.force_login)(self.mentor)
+        response = await self.async_client.post(
+            reverse("async_review_leave", args=[self.leave.pk]), {"action": "approve"}
+        )
+        self.assertRedirects(response, reverse("async_mentor_dashboard"), fetch_redirect_response=False)
+        leave = await LeaveRequest.objects.aget(pk=self.leave.pk)
+        self.assertEqual(leave.status, LeaveRequest.STATUS_APPROVED)
+
+
+class SQLiteConcurrencyTests(TransactionTestCase):
+    def test_immediate_atomic_takes_the_write_lock_up_front(self):
+        with capture_statements() as statements:
+            with immediate_atomic():
+                with immediate_atomic():  # nested: a plain savepoint
+                    pass
+            with immediate_atomic():
+                pass
+        begins = [sql for sql, _ in statements if sql.startswith("BEGIN")]
+        self.assertEqual(begins, ["BEGIN IMMEDIATE", "BEGIN IMMEDIATE"])
+
+    def test_rebuilds_read_under_the_write_lock(self):
+        # A delta written between a rebuild's reads and its replace would be lost.
+        rebuilds = {
+            "rollups": rollups.rebuild,
+            "absence": absence.rebuild,
+            "counters": lambda: counters.reconcile([1]),
+        }
+        for name, rebuild in rebuilds.items():
+            with self.subTest(name):
+                with capture_statements() as statements:
+                    rebuild()
+                self.assertEqual(statements[0][0], "BEGIN IMMEDIATE")
+
+    def test_retry_on_busy_retries_only_lock_errors(self):
+        calls = []
+
+        @retry_on_busy(base_delay=0)
+        def flaky(error):
+            calls.append(error)
+            if len(calls) < 3:
+                raise OperationalError(error)
+            return "ok"
+
+        self.assertEqual(flaky("database is locked"), "ok")
+        self.assertEqual(len(calls), 3)
+        calls.clear()
+        with self.assertRaises(OperationalError):
+            flaky("no such table: core_leaverequest")
+        self.assertEqual(len(calls), 1)
+
+
+@mock.patch("core.replicas.replica_configured", return_value=True)
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        directory.invalidate()
+        self.student = make_user("asha.mca23@suranacollege.edu.in", first_name="Asha")
+        self.router = replicas.PrimaryReplicaRouter()
+
+    def request(self, method="get", session=None):
+        request = getattr(RequestFactory(), method)("/")
+        request.session = session or {}
+        return request
+
+    def test_reads_go_to_replica_only_inside_replica_scope(self, _):
+        self.assertIsNone(self.router.db_for_read(LeaveRequest))
+        with replicas.reading_from(replicas.read_alias_for(self.request())):
+            self.assertEqual(self.router.db_for_read(LeaveRequest), replicas.REPLICA)
+            self.assertEqual(self.router.db_for_write(LeaveRequest), "default")
+        self.assertIsNone(replicas.read_alias_for(self.request("post")))
+
+    async def test_pinning_middleware_stays_async_under_asgi(self, _):
+        async def view(request):
+            return HttpResponse()
+
+        middleware = replicas.ReadYourWritesMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = self.request("post")
+        request.user = self.student
+        await middleware(request)
+        self.assertGreater(request.session[replicas.PIN_SESSION_KEY], 0)
+
+    def test_version_keyed_fragments_are_rendered_from_the_primary(self, _):
+        caches["fragments"].clear()
+        with replicas.reading_from(replicas.REPLICA):
+            alias = freshness.fragment(self.student.pk, "probe", lambda: self.router.db_for_read(LeaveRequest))
+        self.assertIsNone(alias)
+
+    def test_writes_pin_the_session_to_the_primary(self, _):
+        self.client.force_login(self.student)
+        self.client.post(reverse("request_leave"), {
+            "leave_type": LeaveRequest.LEAVE_SICK,
+            "start_date": "2025-01-06",
+            "end_date": "2025-01-06",
+            "reason": "Fever and doctor visit",
+        })
+        session = self.client.session
+        self.assertGreater(session[replicas.PIN_SESSION_KEY], 0)
+        self.assertIsNone(replicas.read_alias_for(self.request(session=session)))
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.mentor = make_user("mentor@suranacollege.edu.in", Profile.ROLE_MENTOR, "Mentor")
+        make_leave(make_user("asha.mca23@suranacollege.edu.in", first_name="Asha"), self.mentor)
+
+    def test_requests_are_recorded_per_view(self):
+        self.client.force_login(self.mentor)
+        self.assertEqual(self.client.get(reverse("mentor_dashboard")).status_code, 200)
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 302)
+
+        self.mentor.is_staff = True
+        self.mentor.save()
+        body = self.client.get(reverse("metrics")).content.decode()
+        self.assertIn('leave_requests_total{view="mentor_dashboard",method="GET",status="200"} 1', body)
+        self.assertIn('leave_request_duration_seconds_count{view="mentor_dashboard"} 1', body)
+        self.assertIn('leave_request_queries_bucket{view="mentor_dashboard",le="0"} 0', body)
+        self.assertRegex(body, r'leave_response_bytes_total\{view="mentor_dashboard"\} [1-9]')
+
+    def test_streamed_responses_are_recorded_when_sent(self):
+        self.mentor.is_staff = True
+        self.mentor.save()
+        self.client.force_login(self.mentor)
+        response = self.client.get(reverse("export_leaves"), {"format": "jsonl"})
+        self.assertNotIn('view="export_leaves"', metrics.registry.render())
+        size = len(b"".join(response.streaming_content))
+        self.assertIn(f'leave_response_bytes_total{{view="export_leaves"}} {size}', metrics.registry.render())
+
+    async def test_async_views_are_recorded_on_an_async_chain(self):
+        # No middleware is adapted to sync, so async views stay on the event loop.
+        with self.assertNoLogs("django.request", "DEBUG"):
+            ASGIHandler()
+        # The test's connection predates the handler; a server loads it first.
+        await sync_to_async(metrics.install)()
+        await sync_to_async(warm_directory)(sender=None)
+        await sync_to_async(self.async_client.force_login)(self.mentor)
+        response = await self.async_client.get(reverse("async_mentor_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        body = metrics.registry.render()
+        self.assertIn('leave_requests_total{view="async_mentor_dashboard",method="GET",status="200"} 1', body)
+        # Queries run in sync_to_async threads are still counted.
+        self.assertIn('leave_request_queries_bucket{view="async_mentor_dashboard",le="0"} 0', body)
+
+
+@override_settings(NOTIFICATION_DIGEST_SECONDS=0)
+class NotificationTests(TestCase):
+    def setUp(self):
+        self.mentor = make_user("mentor@suranacollege.edu.in", Profile.ROLE_MENTOR, "Mentor")
+        self.students = [make_user(f"s{i}.mca23@suranacollege.edu.in", first_name=f"Student{i}") for i in range(2)]
+
+    def test_submissions_are_digested_and_reviews_sent_to_students(self):
+        calendar.invalidate()
+        leaves = [make_leave(student, self.mentor, days=7) for student in self.students]
+        self.assertEqual(NotificationJob.objects.count(), 2)
+        self.assertEqual(mail.outbox, [])
+
+        call_command("send_notifications", once=True, stdout=StringIO())
+        self.assertEqual([m.to for m in mail.outbox], [[self.mentor.email]])
+        self.assertIn("Student0", mail.outbox[0].body)
+        self.assertIn("Student1", mail.outbox[0].body)
+        self.assertIn("Jan. 6, 2025 to Jan. 12, 2025 (5 working days)", mail.outbox[0].body)
+
+        services.review_leave(leaves[0], LeaveRequest.STATUS_REJECTED, "Clashes with exams")
+        notifications.enqueue_reviews([leaves[0]], LeaveRequest.STATUS_PENDING)  # duplicate event
+        call_command("send_notifications", once=True, stdout=StringIO())
+        self.assertEqual([m.to for m in mail.outbox[1:]], [[self.students[0].email]])
+        self.assertIn("Clashes with exams", mail.outbox[1].body)
+        self.assertFalse(NotificationJob.objects.exclude(status=NotificationJob.STATUS_SENT).exists())
+
+    def test_failed_sends_are_retried_later(self):
+        make_leave(self.students[0], self.mentor)
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=OSError("down")):
+            call_command("send_notifications", once=True, stdout=StringIO())
+        job = NotificationJob.objects.get()
+        self.assertEqual((job.status, job.attempts), (NotificationJob.STATUS_PENDING, 1))
+        self.assertIn("down", job.last_error)
+        self.assertEqual(notifications.claim(), {})
+
+    @override_settings(NOTIFICATION_MAX_ATTEMPTS=1)
+    def test_emails_that_fail_to_build_end_up_failed(self):
+        make_leave(self.students[0], self.mentor)
+        with mock.patch("core.notifications.render_to_string", side_effect=ValueError("bad template")):
+            call_command("send_notifications", once=True, stdout=StringIO())
+        job = NotificationJob.objects.get()
+        self.assertEqual((job.status, job.attempts), (NotificationJob.STATUS_FAILED, 1))
+        self.assertIn("bad template", job.last_error)
+        self.assertEqual(mail.outbox, [])
+
+
+class ReviewerEventTests(TestCase):
+    def setUp(self):
+        self.mentor = make_user("mentor@suranacollege.edu.in", Profile.ROLE_MENTOR, "Mentor")
+        self.student = make_user("asha.mca23@suranacollege.edu.in", first_name="Asha")
+        warm_directory(sender=None)
+
+    def test_wsgi_requests_get_no_stream(self):
+        self.client.force_login(self.mentor)
+        self.assertEqual(self.client.get(reverse("reviewer_events")).status_code, 204)
+
+    def test_submissions_are_published_after_commit_to_listening_approvers(self):
+        with mock.patch.object(events.broker, "publish") as publish:
+            make_leave(self.student, self.mentor)
+            with mock.patch.object(events.broker, "listening", return_value=True):
+                with self.captureOnCommitCallbacks(execute=True):
+                    leave = make_leave(self.student, self.mentor, start=date(2025, 2, 3))
+                    publish.assert_not_called()
+        approver_id, event = publish.call_args.args
+        self.assertEqual((approver_id, event["pending"]), (self.mentor.pk, 2))
+        self.assertIn(f'data-leave="{leave.pk}"', event["rows"])
+
+    async def test_stream_starts_with_the_count_and_relays_published_events(self):
+        await sync_to_async(self.async_client.force_login)(self.mentor)
+        response = await self.async_client.get(reverse("reviewer_events"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = aiter(response.streaming_content)
+        self.assertIn(b'{"pending": 0}', await anext(chunks))
+
+        events.broker.publish(self.mentor.pk, {"pending": 0, "removed": [7]})
+        self.assertIn(b'"removed": [7]', await anext(chunks))
+
+    async def test_closing_a_stream_unsubscribes_it(self):
+        stream = events.stream(self.mentor.pk)
+        await anext(stream)
+        self.assertTrue(events.broker.listening(self.mentor.pk))
+        await stream.aclose()
+        self.assertFalse(events.broker.listening(self.mentor.pk))
+
+    async def test_router_refuses_streams_without_a_reviewer_session(self):
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        router = events.EventStreamRouter(app=None)
+        await router({"type": "http", "path": reverse("reviewer_events"), "headers": []}, receive, send)
+        self.assertEqual(sent[0]["status"], 403)
+
+
+class ConditionalDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["fragments"].clear()
+        freshness.reset_stats()
+        self.mentor = make_user("mentor@suranacollege.edu.in", Profile.ROLE_MENTOR, "Mentor")
+        self.student = make_user("asha.mca23@suranacollege.edu.in", first_name="Asha")
+        self.client.force_login(self.student)
+
+    def get(self, etag=None):
+        headers = {"If-None-Match": etag} if etag else {}
+        return self.client.get(reverse("student_dashboard"), headers=headers)
+
+    def test_unchanged_dashboard_is_not_modified_without_leave_queries(self):
+        etag = self.get()["ETag"]
+        with self.assertNumQueries(1):  # the session
+            response = self.get(etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertIn("private", response["Cache-Control"])
+
+    def test_per_process_caches_turn_etags_and_fragments_off(self):
+        local = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        with override_settings(CACHES={"default": local, "fragments": {**local, "LOCATION": "fragments"}}):
+            self.assertNotIn("ETag", self.get())
+            self.get()
+        self.assertEqual(freshness.stats(), {})
+
+    def test_leave_changes_refresh_student_and_approver(self):
+        student_etag = self.get()["ETag"]
+        self.client.force_login(self.mentor)
+        mentor_etag = self.client.get(reverse("mentor_dashboard"))["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            leave = make_leave(self.student, self.mentor)
+        response = self.client.get(reverse("mentor_dashboard"), headers={"If-None-Match": mentor_etag})
+        self.assertContains(response, f'data-leave="{leave.pk}"')
+
+        self.client.force_login(self.student)
+        self.get()
+        self.assertEqual(self.get(student_etag).status_code, 200)
+        self.assertEqual(freshness.stats()["fragment_miss"], 4)  # once per user and version
+
+    def test_submitting_through_the_form_refreshes_the_dashboard(self):
+        warm_directory(sender=None)
+        etag = self.get()["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("request_leave"), {
+                "leave_type": LeaveRequest.LEAVE_SICK,
+                "start_date": "2025-01-06",
+                "end_date": "2025-01-06",
+                "reason": "Fever and doctor visit",
+                "mentor": self.mentor.pk,
+            })
+        response = self.get(etag)
+        self.assertContains(response, "Fever and doctor visit")
+        self.assertNotEqual(self.get()["ETag"], etag)
+
+    def test_flash_messages_are_not_swallowed_by_a_304(self):
+        self.client.force_login(self.mentor)
+        etag = self.client.get(reverse("mentor_dashboard"))["ETag"]
+        # A no-op bulk review changes no version but leaves an error to show.
+        self.client.post(reverse("bulk_review_leave"), {"action": "approve"}, headers={"Accept": "text/html"})
+        response = self.client.get(reverse("mentor_dashboard"), headers={"If-None-Match": etag})
+        self.assertContains(response, "Select at least one request and an action.")
+        self.assertNotIn("ETag", response)
+        self.assertEqual(self.client.get(reverse("mentor_dashboard"), headers={"If-None-Match": etag}).status_code, 304)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["fragments"].clear()
+        self.director = make_user("director@suranacollege.edu.in", Profile.ROLE_DIRECTOR, "Director")
+        self.student = make_user("asha.mca23@suranacollege.edu.in", first_name="Asha")
+        self.old = [
+            make_leave(self.student, self.director, LeaveRequest.STATUS_APPROVED, start=date(2021, 1, 4 + i))
+            for i in range(3)
+        ]
+        LeaveRequest.objects.filter(pk__in=[leave.pk for leave in self.old]).update(
+            created_at=datetime(2021, 1, 1), reviewed_at=datetime(2021, 1, 2),
+        )
+        self.recent = make_leave(self.student, self.director, LeaveRequest.STATUS_REJECTED)
+        self.pending = make_leave(self.student, self.director, start=date(2021, 2, 1))
+        NotificationJob.objects.update(status=NotificationJob.STATUS_SENT)
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command("archive_leaves", "--before", "2022-06-01", *args, stdout=out)
+        return out.getvalue()
+
+    def test_moves_only_old_reviewed_leaves_in_batches(self):
+        self.assertIn("Would archive 3 of 5", self.archive("--dry-run"))
+        self.assertEqual(ArchivedLeaveRequest.objects.count(), 0)
+
+        self.assertIn("2 batches", self.archive("--batch-size", "2"))
+        self.assertEqual(set(LeaveRequest.objects.values_list("pk", flat=True)), {self.recent.pk, self.pending.pk})
+        self.assertEqual(sorted(ArchivedLeaveRequest.objects.values_list("pk", flat=True)),
+                         [leave.pk for leave in self.old])
+        self.assertIn("Archived 0 leaves", self.archive())
+        # Totals still cover the archive.
+        self.assertEqual(counters.reconcile([self.student.pk, self.director.pk]), {})
+
+    def test_history_and_exports_union_the_archive_when_asked(self):
+        self.archive()
+        self.client.force_login(self.director)
+        url = reverse("reviewer_history", args=["approved"])
+        self.assertNotContains(self.client.get(url), "Family function")
+        self.assertContains(self.client.get(url, {"archive": 1}), "Family function", count=3)
+
+        rows, cursor = student_history_page(self.student, page_size=2, include_archive=True)
+        rest, _ = student_history_page(self.student, cursor, include_archive=True)
+        self.assertEqual([leave.pk for leave in rows + rest],
+                         [self.pending.pk, self.recent.pk, *reversed([leave.pk for leave in self.old])])
+
+        response = self.client.get(reverse("export_leaves"), {"format": "jsonl", "archive": "on"})
+        ids = [json.loads(line)["id"] for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(ids, sorted(leave.pk for leave in [*self.old, self.recent, self.pending]))
+
+
+class LeaveSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.director = make_user("director@suranacollege.edu.in", Profile.ROLE_DIRECTOR, "Director")
+        self.mentor = make_user("mentor@suranacollege.edu.in", Profile.ROLE_MENTOR, "Mentor")
+        self.student = make_user("asha.mca23@suranacollege.edu.in", first_name="Asha")
+        self.wedding = make_leave(self.student, self.director, LeaveRequest.STATUS_APPROVED)
+        self.function = make_leave(self.student, self.mentor, LeaveRequest.STATUS_REJECTED, start=date(2025, 2, 3))
+        self.fever = make_leave(self.student, self.director, start=date(2025, 3, 3))
+        # Plain UPDATEs: the triggers keep the index current without the ORM.
+        LeaveRequest.objects.filter(pk=self.wedding.pk).update(reason="Attending my sister's wedding in Mysore")
+        LeaveRequest.objects.filter(pk=self.function.pk).update(review_comments="Wedding <b>season</b> again?")
+        LeaveRequest.objects.filter(pk=self.fever.pk).update(reason="Fever and cold")
+
+    def found(self, text, **filters):
+        return [leave.pk for leave in search.search(text, **filters)[0]]
+
+    def test_ranked_filtered_and_kept_in_sync(self):
+        # Stemmed, and a match in the reason outranks one in the comments.
+        self.assertEqual(self.found("Weddings"), [self.wedding.pk, self.function.pk])
+        self.assertEqual(self.found("wedding mysore"), [self.wedding.pk])
+        self.assertEqual(self.found("wedding", status=LeaveRequest.STATUS_REJECTED), [self.function.pk])
+        self.assertEqual(self.found("wedding", approver=self.director.pk), [self.wedding.pk])
+        self.assertEqual(self.found("wedding", start=date(2025, 2, 1), end=date(2025, 2, 28)), [self.function.pk])
+        self.assertEqual(self.found("wedding", course="MBA"), [])
+        # Course and semester are the leave's snapshot, whatever the profile says now.
+        LeaveRequest.objects.filter(pk=self.wedding.pk).update(course="MCA", semester=3)
+        Profile.objects.filter(user=self.student).update(course="MBA", semester=1)
+        self.assertEqual(self.found("wedding", course="MCA", semester=3), [self.wedding.pk])
+        self.assertEqual(self.found("wedding", course="MBA"), [])
+        self.assertEqual(self.found('wedding" OR fever'), [])  # words only, never FTS5 syntax
+        self.assertEqual(self.found("   "), [])
+
+        leaves, has_next = search.search("wedding", page_size=1)
+        self.assertTrue(has_next)
+        self.assertEqual(str(search.search("wedding", page=2, page_size=1)[0][0].snippet),
+                         "<mark>Wedding</mark> &lt;b&gt;season&lt;/b&gt; again?")
+
+        # Only the newest matches are ranked.
+        with mock.patch.object(search, "RANK_WINDOW", 1):
+            self.assertEqual(self.found("wedding"), [self.function.pk])
+
+        # Archiving keeps the leave findable; deleting drops it.
+        LeaveRequest.objects.filter(pk=self.wedding.pk).update(reviewed_at=datetime(2021, 1, 2))
+        NotificationJob.objects.update(status=NotificationJob.STATUS_SENT)
+        archive.archive_batch(date(2022, 6, 1))
+        leaves, _ = search.search("wedding")
+        self.assertEqual([(leave.pk, leave.archived) for leave in leaves],
+                         [(self.wedding.pk, True), (self.function.pk, False)])
+        self.function.delete()
+        self.assertEqual(self.found("wedding"), [self.wedding.pk])
+
+    def test_backfill_view_and_admin(self):
+        search.clear_index()
+        self.assertEqual(self.found("fever"), [])
+        out = StringIO()
+        call_command("rebuild_search_index", "--batch-size", "2", stdout=out)
+        self.assertIn("Indexed 3 leaves", out.getvalue())
+        self.assertEqual(self.found("fever"), [self.fever.pk])
+
+        self.client.force_login(self.director)
+        response = self.client.get(reverse("leave_search"), {"q": "wedding", "status": "APPROVED"})
+        self.assertContains(response, f'data-leave="{self.wedding.pk}"')
+        self.assertContains(response, "<mark>wedding</mark>")
+        self.assertNotContains(response, f'data-leave="{self.function.pk}"')
+
+        admin = User.objects.create_superuser("admin", "admin@suranacollege.edu.in", "x")
+        self.client.force_login(admin)
+        response = self.client.get(reverse("admin:core_leaverequest_changelist"), {"q": "fever"})
+        self.assertEqual(list(response.context["cl"].result_list), [self.fever])
+
+
+class AdminScaleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["fragments"].clear()
+        self.admin = User.objects.create_superuser("admin", "admin@suranacollege.edu.in", "x")
+        self.director = make_user("director@suranacollege.edu.in", Profile.ROLE_DIRECTOR, "Director")
+        self.mentor = make_user("mentor@suranacollege.edu.in", Profile.ROLE_MENTOR, "Mentor")
+        self.student = make_user("asha.mca23@suranacollege.edu.in", first_name="Asha")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pending = [make_leave(self.student, approver, start=date(2025, 1, 6 + i))
+                            for i, approver in enumerate([self.director, self.mentor, self.director])]
+            self.approved = make_leave(self.student, self.mentor, LeaveRequest.STATUS_APPROVED, start=date(2024, 3, 4))
+        self.client.force_login(self.admin)
+        self.url = reverse("admin:core_leaverequest_changelist")
+
+    def test_changelist_estimates_counts_and_dates_by_index(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.context["cl"].result_count, 4)
+        self.assertContains(response, "?start_date__year=2024")
+        self.assertContains(response, "?start_date__year=2025")
+        self.assertContains(self.client.get(self.url, {"start_date__year": 2025}), "start_date__month=1")
+
+        # With statistics the unfiltered count is SQLite's estimate; filters count exactly.
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        make_leave(self.student, self.director, start=date(2025, 2, 3))
+        self.assertEqual(self.client.get(self.url).context["cl"].result_count, 4)
+        response = self.client.get(self.url, {"status__exact": "PENDING", "approver": self.director.pk})
+        self.assertEqual(response.context["cl"].result_count, 3)
+
+        # No per-row queries for the student and approver columns (the date
+        # hierarchy costs a query per day in the span, which stays the same).
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url, {"status__exact": "PENDING"})
+        for i in range(5):
+            make_leave(self.student, self.mentor, start=date(2025, 1, 6 + i % 3))
+        with CaptureQueriesContext(connection) as more:
+            self.client.get(self.url, {"status__exact": "PENDING"})
+        self.assertEqual(len(few), len(more))
+
+    def test_bulk_actions_go_through_services_in_chunks(self):
+        self.assertEqual(services.review_queryset(LeaveRequest.objects.filter(pk=self.pending[0].pk),
+                                                  LeaveRequest.STATUS_REJECTED, chunk_size=1), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {
+                "action": "approve_selected", "select_across": "1", "index": "0", "_selected_action": [self.pending[1].pk],
+            })
+        self.assertRedirects(response, self.url)
+        self.assertEqual(
+            sorted(LeaveRequest.objects.values_list("status", flat=True)),
+            ["APPROVED", "APPROVED", "APPROVED", "REJECTED"],
+        )
+        self.assertEqual(counters.reconcile([self.director.pk, self.mentor.pk, self.student.pk]), {})
+
+        pending = make_leave(self.student, self.director, start=date(2025, 2, 3))
+        archive_all = {
+            "action": "archive_selected", "select_across": "1", "index": "0", "_selected_action": [pending.pk],
+        }
+        # The decision emails just queued keep their leaves hot until they go out.
+        decisions = NotificationJob.objects.filter(
+            kind=NotificationJob.KIND_REVIEWED, status=NotificationJob.STATUS_PENDING,
+        )
+        self.assertEqual(decisions.count(), 4)
+        self.client.post(self.url, archive_all)
+        self.assertEqual(ArchivedLeaveRequest.objects.count(), 0)
+        self.assertEqual(decisions.count(), 4)
+        NotificationJob.objects.update(status=NotificationJob.STATUS_SENT)
+        self.client.post(self.url, archive_all)
+        self.assertEqual(list(LeaveRequest.objects.values_list("pk", flat=True)), [pending.pk])
+        self.assertEqual(ArchivedLeaveRequest.objects.count(), 4)
+        self.assertNotIn("delete_selected", self.client.get(self.url).context["action_form"].fields["action"].choices)
+
+    def test_change_form_cannot_bypass_the_services(self):
+        leave = self.pending[0]
+        url = reverse("admin:core_leaverequest_change", args=[leave.pk])
+        response = self.client.post(url, {
+            "reason": "Edited by the office", "review_comments": "", "status": "APPROVED", "approver": self.mentor.pk,
+        })
+        self.assertRedirects(response, self.url)
+        leave.refresh_from_db()
+        self.assertEqual((leave.reason, leave.status, leave.approver), ("Edited by the office", "PENDING", self.director))
+        self.assertEqual(self.client.post(reverse("admin:core_leaverequest_delete", args=[leave.pk])).status_code, 403)
+        self.assertEqual(self.client.get(reverse("admin:core_leaverequest_add")).status_code, 403)
+        self.assertEqual(counters.reconcile([self.director.pk, self.mentor.pk, self.student.pk]), {})
@@ -1,6 +1,6 @@
 # core/urls.py
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     #  Main pages
@@ -11,16 +11,35 @@ urlpatterns = [
     path("student/signin/", views.student_signin, name="student_signin"),
     path("student/register/", views.student_register, name="student_register"),
     path("student/dashboard/", views.student_dashboard, name="student_dashboard"),
+    path("student/history/", views.student_history, name="student_history"),
     path("student/profile/edit/", views.edit_profile, name="edit_profile"),
     path("student/leave/request/", views.request_leave, name="request_leave"),
+    path("student/leave/working-days/", views.leave_working_days, name="leave_working_days"),
 
     #  Staff authentication
     path("staff/signin/", views.staff_signin, name="staff_signin"),
     path("mentor/dashboard/", views.mentor_dashboard, name="mentor_dashboard"),
     path("director/dashboard/", views.director_dashboard, name="director_dashboard"),
+    path("reviewer/history/<str:status>/", views.reviewer_history, name="reviewer_history"),
+    path("director/absences/", views.absence_calendar, name="absence_calendar"),
+    path("director/absences/day/", views.absence_day, name="absence_day"),
+    path("director/analytics/", views.leave_analytics, name="leave_analytics"),
+    path("director/search/", views.leave_search, name="leave_search"),
 
     #  Leave review (mentor/director)
     path("leave/<int:pk>/review/", views.review_leave, name="review_leave"),
+    path("leave/bulk-review/", views.bulk_review_leave, name="bulk_review_leave"),
+    path("leave/export/", views.export_leaves, name="export_leaves"),
+
+    #  Async (ASGI) variants of the dashboards and review page
+    path("async/student/dashboard/", async_views.student_dashboard, name="async_student_dashboard"),
+    path("async/mentor/dashboard/", async_views.mentor_dashboard, name="async_mentor_dashboard"),
+    path("async/director/dashboard/", async_views.director_dashboard, name="async_director_dashboard"),
+    path("async/leave/<int:pk>/review/", async_views.review_leave, name="async_review_leave"),
+    path("reviewer/events/", async_views.reviewer_events, name="reviewer_events"),
+
+    #  Prometheus metrics for admin staff
+    path("metrics", views.metrics_view, name="metrics"),
 
     # Logout
     path("logout/", views.logout_view, name="logout"),
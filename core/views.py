@@ -2,11 +2,26 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from .forms import StudentRegistrationForm, LoginForm, ProfileForm, LeaveRequestForm, StaffLoginForm
-from django.contrib.auth.models import User
-from .models import Profile, LeaveRequest
+from .forms import (
+    StudentRegistrationForm, LoginForm, ProfileForm, LeaveRequestForm, StaffLoginForm, LeaveExportForm,
+    AbsenceCalendarForm, LeaveSearchForm,
+)
+from .models import Profile, LeaveRequest, LeaveCounter
+from .dashboards import (
+    history_context, reviewer_dashboard_context, reviewer_history_page, student_history_page, student_rows_fragment,
+)
+from . import absence, counters, exports, metrics, rollups, search, services
+from .auth import cache_identity, get_identity, role_required
+from .replicas import read_alias_for, replica_reads
+from .directory import directory
+from .freshness import conditional_dashboard
+from .routing import needs_director
+from .academic_calendar import working_days
 from django.contrib import messages
-from django.utils import timezone
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+from datetime import date
 
 def index(request):
     return render(request, "core/index.html")
@@ -21,6 +36,7 @@ def student_signin(request):
             user = authenticate(request, username=email, password=pwd)
             if user and hasattr(user, 'profile') and user.profile.role == Profile.ROLE_STUDENT:
                 login(request, user)
+                cache_identity(user)
                 return redirect('student_dashboard')
             messages.error(request, "Invalid student credentials.")
     else:
@@ -38,6 +54,7 @@ def staff_signin(request):
             user = authenticate(request, username=email, password=pwd)
             if user and hasattr(user, 'profile') and user.profile.role == role:
                 login(request, user)
+                cache_identity(user)
                 if role == Profile.ROLE_MENTOR:
                     return redirect('mentor_dashboard')
                 elif role == Profile.ROLE_DIRECTOR:
@@ -57,12 +74,7 @@ def student_register(request):
             mobile = form.cleaned_data['mobile']
             password = form.cleaned_data['password']
 
-            user = User.objects.create_user(username=email, email=email, password=password, first_name=full_name)
-            profile = user.profile
-            profile.phone = mobile
-            profile.role = Profile.ROLE_STUDENT
-            profile.save()
-
+            user = services.register_student(email, full_name, mobile, password)
             login(request, user)
             messages.success(request, "Account created and logged in.")
             return redirect('student_dashboard')
@@ -78,24 +90,31 @@ def logout_view(request):
     return redirect('index')
 
 
-@login_required
+@conditional_dashboard
+@role_required(Profile.ROLE_STUDENT)
 def student_dashboard(request):
-    if request.user.profile.role != Profile.ROLE_STUDENT:
-        return redirect('index')
-    profile = request.user.profile
-    leaves = request.user.leaves.order_by('-created_at')[:10]
-    stats = {
-        "pending": request.user.leaves.filter(status=LeaveRequest.STATUS_PENDING).count(),
-        "approved": request.user.leaves.filter(status=LeaveRequest.STATUS_APPROVED).count(),
-        "rejected": request.user.leaves.filter(status=LeaveRequest.STATUS_REJECTED).count(),
-    }
-    return render(request, "core/student_dashboard.html", {"profile": profile, "leaves": leaves, "stats": stats})
+    stats = counters.get_stats(request.user, LeaveCounter.ROLE_STUDENT)
+    return render(request, "core/student_dashboard.html", {
+        "leave_rows": student_rows_fragment(request.user.pk), "stats": stats,
+    })
 
 
-@login_required
+@role_required(Profile.ROLE_STUDENT)
+@replica_reads
+def student_history(request):
+    """Older rows of the student dashboard table, one keyset page at a time; ?archive=1 adds archived leaves."""
+    cursor, include_archive = request.GET.get("after"), request.GET.get("archive") == "1"
+    try:
+        page = student_history_page(request.user, cursor, include_archive=include_archive)
+        offset = int(request.GET.get("n", 0))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor.")
+    return render(request, "core/student_leave_rows.html",
+                  history_context(page, cursor, include_archive, "created_at", offset))
+
+
+@role_required(Profile.ROLE_STUDENT)
 def edit_profile(request):
-    if request.user.profile.role != Profile.ROLE_STUDENT:
-        return redirect('index')
     profile = request.user.profile
     if request.method == "POST":
         form = ProfileForm(request.POST, instance=profile)
@@ -108,136 +127,266 @@ def edit_profile(request):
     return render(request, "core/edit_profile.html", {"form": form, "profile": profile})
 
 
-@login_required
+@role_required(Profile.ROLE_STUDENT)
 def request_leave(request):
-    if request.user.profile.role != Profile.ROLE_STUDENT:
-        return redirect('index')
-
     if request.method == "POST":
-        form = LeaveRequestForm(request.POST)
+        form = LeaveRequestForm(request.POST, student=request.user)
         if form.is_valid():
             lr = form.save(commit=False)
             lr.student = request.user
-
-            # Calculate duration
-            duration = (lr.end_date - lr.start_date).days + 1
-
-            if duration > 2:
-                # Route directly to Director
-                lr.mentor = None
-                director_profile = Profile.objects.filter(role=Profile.ROLE_DIRECTOR).first()
-                if director_profile:
-                    lr.approver = director_profile.user
+            try:
+                services.submit_leave(lr)
+            except ValidationError as exc:  # a leave submitted meanwhile overlaps
+                form.add_error(None, exc)
             else:
-                # Assign to selected Mentor
-                if lr.mentor:
-                    lr.approver = lr.mentor
-
-            lr.save()
-            messages.success(request, "Leave request submitted.")
-            return redirect('student_dashboard')
+                messages.success(request, "Leave request submitted.")
+                return redirect('student_dashboard')
     else:
         form = LeaveRequestForm()
 
-    mentors = User.objects.filter(profile__role=Profile.ROLE_MENTOR)
+    mentors = directory.mentors()
     return render(request, "core/request_leave.html", {"form": form, "mentors": mentors})
 
 
+@role_required(Profile.ROLE_STUDENT)
+def leave_working_days(request):
+    """Working-day count for the request form, so it can hide the mentor picker."""
+    try:
+        start = date.fromisoformat(request.GET.get("start", ""))
+        end = date.fromisoformat(request.GET.get("end", ""))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid date.")
+    if start > end:
+        return HttpResponseBadRequest("End date is before start date.")
+    if (end - start).days >= LeaveRequestForm.MAX_DAYS:
+        return HttpResponseBadRequest(f"A leave can span at most {LeaveRequestForm.MAX_DAYS} days.")
+    return JsonResponse({
+        "working_days": working_days(start, end),
+        "needs_director": needs_director(start, end),
+    })
+
+
 
 
+@conditional_dashboard
+@role_required(Profile.ROLE_MENTOR)
 def mentor_dashboard(request):
-    if request.user.profile.role != Profile.ROLE_MENTOR:
-        return redirect('index')
+    return render(request, "core/mentor_dashboard.html", reviewer_dashboard_context(request.user))
+
 
-    pending = LeaveRequest.objects.filter(
-        approver=request.user,
-        status=LeaveRequest.STATUS_PENDING
-    ).order_by('-created_at')
-
-    approved = LeaveRequest.objects.filter(
-        approver=request.user,
-        status=LeaveRequest.STATUS_APPROVED
-    ).order_by('-reviewed_at')
-
-    rejected = LeaveRequest.objects.filter(
-        approver=request.user,
-        status=LeaveRequest.STATUS_REJECTED
-    ).order_by('-reviewed_at')
-
-    stats = {
-        "pending": pending.count(),
-        "approved": approved.count(),
-        "rejected": rejected.count(),
-    }
-
-    return render(request, "core/mentor_dashboard.html", {
-        "pending": pending,
-        "approved": approved,
-        "rejected": rejected,
-        "stats": stats,
+@conditional_dashboard
+@role_required(Profile.ROLE_DIRECTOR)
+def director_dashboard(request):
+    return render(request, "core/director_dashboard.html", reviewer_dashboard_context(request.user))
+
+
+HISTORY_STATUSES = {
+    "approved": LeaveRequest.STATUS_APPROVED,
+    "rejected": LeaveRequest.STATUS_REJECTED,
+}
+
+
+@role_required(Profile.ROLE_MENTOR, Profile.ROLE_DIRECTOR)
+@replica_reads
+def reviewer_history(request, status):
+    """Table rows for the Approved/Rejected dashboard tabs, one keyset page at a time."""
+    if status not in HISTORY_STATUSES:
+        raise Http404
+    cursor, include_archive = request.GET.get("after"), request.GET.get("archive") == "1"
+    try:
+        page = reviewer_history_page(request.user, HISTORY_STATUSES[status], cursor, include_archive=include_archive)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor.")
+    return render(request, "core/reviewer_history_rows.html", {
+        **history_context(page, cursor, include_archive, "reviewed_at"),
+        "status": status,
     })
 
 
+REVIEW_ACTIONS = {
+    "approve": LeaveRequest.STATUS_APPROVED,
+    "reject": LeaveRequest.STATUS_REJECTED,
+}
 
-def director_dashboard(request):
-    if request.user.profile.role != Profile.ROLE_DIRECTOR:
-        return redirect('index')
 
-    pending = LeaveRequest.objects.filter(
-        approver=request.user,
-        status=LeaveRequest.STATUS_PENDING
-    ).order_by('-created_at')
-
-    approved = LeaveRequest.objects.filter(
-        approver=request.user,
-        status=LeaveRequest.STATUS_APPROVED
-    ).order_by('-reviewed_at')
-
-    rejected = LeaveRequest.objects.filter(
-        approver=request.user,
-        status=LeaveRequest.STATUS_REJECTED
-    ).order_by('-reviewed_at')
-
-    stats = {
-        "pending": pending.count(),
-        "approved": approved.count(),
-        "rejected": rejected.count(),
-    }
-
-    return render(
-        request,
-        "core/director_dashboard.html",
-        {"pending": pending, "approved": approved, "rejected": rejected, "stats": stats}
-    )
+def _reviewer_dashboard(request):
+    return redirect('mentor_dashboard' if request.role == Profile.ROLE_MENTOR else 'director_dashboard')
 
 
-@login_required
+@role_required(Profile.ROLE_MENTOR, Profile.ROLE_DIRECTOR)
+@require_POST
+def bulk_review_leave(request):
+    """Approve or reject every selected row of the pending table at once."""
+    status = REVIEW_ACTIONS.get(request.POST.get("action"))
+    try:
+        ids = [int(pk) for pk in request.POST.getlist("ids")]
+    except ValueError:
+        ids = None
+    if status is None or not ids:
+        if request.accepts("text/html"):
+            messages.error(request, "Select at least one request and an action.")
+            return _reviewer_dashboard(request)
+        return HttpResponseBadRequest("Missing ids or action.")
+
+    comments = request.POST.get("comments", "").strip()
+    results = services.bulk_review_leaves(request.user, ids, status, comments)
+
+    if not request.accepts("text/html"):
+        return JsonResponse({"results": {str(pk): outcome for pk, outcome in results.items()}})
+    updated = sum(outcome == services.BULK_UPDATED for outcome in results.values())
+    messages.success(request, f"{updated} leave request(s) {status.lower()}.")
+    skipped = len(results) - updated
+    if skipped:
+        messages.warning(request, f"{skipped} request(s) were skipped (already reviewed or not assigned to you).")
+    return _reviewer_dashboard(request)
+
+
+@role_required(Profile.ROLE_MENTOR, Profile.ROLE_DIRECTOR)
 def review_leave(request, pk):
-    lr = get_object_or_404(LeaveRequest, pk=pk)
-    if request.user != lr.approver:
+    lr = get_object_or_404(LeaveRequest.objects.select_related("student"), pk=pk)
+    if lr.approver_id != request.user.pk:
         messages.error(request, "You are not authorized to review this request.")
         return redirect('index')
 
     if request.method == "POST":
         action = request.POST.get("action")
         comments = request.POST.get("comments", "").strip()
-        if action == "approve":
-            lr.status = LeaveRequest.STATUS_APPROVED
-            lr.review_comments = comments
-            lr.reviewed_at = timezone.now()
-            lr.save()
-            messages.success(request, "Leave approved.")
-        elif action == "reject":
-            lr.status = LeaveRequest.STATUS_REJECTED
-            lr.review_comments = comments
-            lr.reviewed_at = timezone.now()
-            lr.save()
-            messages.success(request, "Leave rejected.")
-        return redirect('mentor_dashboard' if request.user.profile.role == Profile.ROLE_MENTOR else 'director_dashboard')
+        if action in REVIEW_ACTIONS:
+            services.review_leave(lr, REVIEW_ACTIONS[action], comments)
+            messages.success(request, f"Leave {REVIEW_ACTIONS[action].lower()}.")
+        return _reviewer_dashboard(request)
 
     return render(request, "core/review_leave.html", {"lr": lr})
 
 
+@login_required
+def export_leaves(request):
+    """Stream leave history as CSV or JSONL for directors and admin staff."""
+    if not (request.user.is_staff or get_identity(request)["role"] == Profile.ROLE_DIRECTOR):
+        return redirect('index')
+    form = LeaveExportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+    data = form.cleaned_data
+    fmt = data["format"] or "csv"
+    querysets = exports.export_querysets(data["start"], data["end"], data["status"], data["approver"],
+                                         data["archive"])
+    # Rows are read while the response streams, after this view returns, so
+    # the replica is bound to the querysets themselves rather than via replica_reads.
+    querysets = [qs.using(read_alias_for(request)) for qs in querysets]
+    response = StreamingHttpResponse(
+        exports.render(exports.export_rows(*querysets), fmt),
+        content_type="text/csv" if fmt == "csv" else "application/x-ndjson",
+    )
+    response["Content-Disposition"] = f'attachment; filename="leaves.{fmt}"'
+    return response
+
+
+@login_required
+def metrics_view(request):
+    """Per-view request metrics of this worker process, in the Prometheus text format."""
+    if not request.user.is_staff:
+        return redirect('index')
+    return HttpResponse(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
+@role_required(Profile.ROLE_DIRECTOR)
+@replica_reads
+def absence_calendar(request):
+    """Students on approved leave per day, from the precomputed absence index."""
+    form = AbsenceCalendarForm(request.GET)
+    days = []
+    if form.is_valid():
+        data = form.cleaned_data
+        days = absence.daily_counts(data["start"], data["end"], data["course"], data["semester"])
+        if request.GET.get("format") == "json":
+            return JsonResponse({"days": [{"date": day.isoformat(), "absent": n} for day, n in days]})
+    elif request.GET.get("format") == "json":
+        return JsonResponse({"errors": form.errors}, status=400)
+    filters = request.GET.copy()
+    filters.pop("start", None)
+    filters.pop("end", None)
+    return render(request, "core/absence_calendar.html", {
+        "form": form,
+        "days": days,
+        "filters": filters.urlencode(),
+    })
+
+
+@role_required(Profile.ROLE_DIRECTOR)
+@replica_reads
+def absence_day(request):
+    """Drill-down: who is on approved leave on ?date=, with the same course/semester filters."""
+    try:
+        day = date.fromisoformat(request.GET.get("date", ""))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid date.")
+    form = AbsenceCalendarForm(request.GET)
+    course = semester = None
+    if form.is_valid():
+        course, semester = form.cleaned_data["course"], form.cleaned_data["semester"]
+    leaves = absence.absent_on(day, course, semester)
+    return render(request, "core/absence_day.html", {"day": day, "leaves": leaves})
+
+@role_required(Profile.ROLE_DIRECTOR)
+@replica_reads
+def leave_analytics(request):
+    """Monthly leave trends, rendered from the LeaveRollup tables only."""
+    dimension = request.GET.get("by", "leave_type")
+    if dimension not in rollups.DIMENSIONS:
+        return HttpResponseBadRequest("Unknown grouping.")
+    try:
+        months = min(max(int(request.GET.get("months", 12)), 1), 60)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid number of months.")
+    today = date.today()
+    first_month = today.year * 12 + today.month - months  # months since year 0, zero-based
+    first = date(first_month // 12, first_month % 12 + 1, 1)
+    rows = rollups.trends(first, dimension)
+    if request.GET.get("format") == "json":
+        return JsonResponse({"by": dimension, "since": first.isoformat(), "rows": [
+            {**row, "month": row["month"].strftime("%Y-%m")} for row in rows
+        ]})
+    return render(request, "core/leave_analytics.html", {
+        "rows": rows,
+        "dimension": dimension,
+        "dimensions": [(name, name.replace("_", " ").capitalize()) for name in rollups.DIMENSIONS],
+        "months": months,
+    })
+
 
+@role_required(Profile.ROLE_DIRECTOR)
+@replica_reads
+def leave_search(request):
+    """Leaves, hot and archived, whose reason or review comments match ?q=, best match first."""
+    form = LeaveSearchForm(request.GET)
+    leaves, has_next, page = [], False, 1
+    if form.is_valid() and form.cleaned_data["q"]:
+        data = form.cleaned_data
+        page = min(data["page"] or 1, search.MAX_PAGE)
+        leaves, has_next = search.search(
+            data["q"], data["status"], data["approver"], data["course"], data["semester"], data["start"], data["end"],
+            page,
+        )
+    filters = request.GET.copy()
+    filters.pop("page", None)
+    return render(request, "core/leave_search.html", {
+        "form": form,
+        "leaves": leaves,
+        "page": page,
+        "offset": (page - 1) * search.PAGE_SIZE,
+        "has_next": has_next,
+        "filters": filters.urlencode(),
+    })
+
+
+ROLE_DASHBOARDS = {
+    Profile.ROLE_STUDENT: 'student_dashboard',
+    Profile.ROLE_MENTOR: 'mentor_dashboard',
+    Profile.ROLE_DIRECTOR: 'director_dashboard',
+}
+
+
+@login_required
 def main_dashboard(request):
-    return render(request, "core/main_dashboard.html")
\ No newline at end of file
+    """Send the signed-in user to the dashboard for their role."""
+    return redirect(ROLE_DASHBOARDS.get(get_identity(request)["role"], 'index'))
\ No newline at end of file
@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'leave_project.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Reviewer dashboard event streams are served without Django's per-request
+# thread, so thousands of idle ones stay cheap (see core/events.py).
+from core.events import EventStreamRouter  # noqa: E402  (needs the app registry)
+
+application = EventStreamRouter(django_application)
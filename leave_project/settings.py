@@ -1,4 +1,9 @@
 # leave_project/settings.py (relevant parts)
+import atexit
+import os
+import shutil
+import sys
+import tempfile
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -18,12 +23,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
+    "core.replicas.ReadYourWritesMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
@@ -47,13 +54,120 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "leave_project.wsgi.application"
 
+# SQLite with WAL journaling and busy waits (core/backends/sqlite3), kept
+# open between requests. Extra pragmas go in OPTIONS["init_pragmas"].
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "ENGINE": "core.backends.sqlite3",
+        "NAME": os.environ.get("LEAVE_DB_PATH", BASE_DIR / "db.sqlite3"),
+        "CONN_MAX_AGE": int(os.environ.get("LEAVE_DB_CONN_MAX_AGE", 600)),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "init_pragmas": {"busy_timeout": 5000},
+        },
     }
 }
 
+# Optional read replica (core/replicas.py): a copy of the primary refreshed
+# by `manage.py sync_replica`, read by the history pages, exports and analytics.
+# Leave it unset for `manage.py test`: TestCase's open transaction on the
+# primary isn't visible through the replica's separate connection.
+if os.environ.get("LEAVE_DB_REPLICA_PATH"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": os.environ["LEAVE_DB_REPLICA_PATH"],
+        "OPTIONS": {"init_pragmas": {"busy_timeout": 5000, "query_only": 1}},
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["core.replicas.PrimaryReplicaRouter"]
+
+# Seconds a user's reads stay on the primary after they write; should exceed
+# the replica's sync interval.
+REPLICA_STICKY_SECONDS = 15
+
+# Dashboard ETags and fragments (core/freshness.py), the staff directory and
+# the working-day calendar are all keyed on version tokens in these caches,
+# and every worker has to see the same tokens. Both therefore live on disk
+# under LEAVE_CACHE_DIR, shared by all processes on the host. A
+# local-memory cache is per process: with one configured, dashboards are
+# served without ETags or fragment caching. `manage.py test` gets an empty
+# directory of its own.
+CACHE_DIR = Path(os.environ.get("LEAVE_CACHE_DIR", BASE_DIR / "cache"))
+if sys.argv[1:2] == ["test"]:
+    CACHE_DIR = Path(tempfile.mkdtemp(prefix="leave-test-cache-"))
+    atexit.register(shutil.rmtree, CACHE_DIR, True)
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": CACHE_DIR / "default",
+    },
+    # Rendered dashboard rows (core.freshness.fragment), keyed by user and
+    # leave data version. Rows of outdated versions are never read again;
+    # they expire or are culled once MAX_ENTRIES is reached.
+    "fragments": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": CACHE_DIR / "fragments",
+        "TIMEOUT": 24 * 60 * 60,
+        "OPTIONS": {"MAX_ENTRIES": 5000, "CULL_FREQUENCY": 10},
+    },
+}
+
+# Sessions live in the database only, so a logout or flush handled by one
+# worker takes effect in all of them at once.
+SESSION_ENGINE = "django.contrib.sessions.backends.db"
+
+# Working-day calendar (core.academic_calendar): academic years start in
+# June; Saturday (5) and Sunday (6) are weekends.
+ACADEMIC_YEAR_START_MONTH = 6
+LEAVE_WEEKEND_DAYS = (5, 6)
+
+# Approver selection per reviewer pool: least_pending, round_robin or
+# sticky_by_student (see core/routing.py).
+LEAVE_ROUTING_POLICIES = {
+    "DIRECTOR": "least_pending",
+    "MENTOR": "least_pending",
+}
+
+# Hot/archive split (core/archive.py): `manage.py archive_leaves` moves
+# leaves reviewed before the start of the oldest of this many academic years
+# (the current one included) into the archive table.
+LEAVE_ARCHIVE_KEEP_YEARS = 2
+
+# Outgoing mail. Leave notifications are queued by the request path and sent
+# by `manage.py send_notifications`. By default each message is written to a
+# file under sent_emails/. Set EMAIL_BACKEND to
+# django.core.mail.backends.smtp.EmailBackend, plus EMAIL_HOST/EMAIL_PORT, for
+# a real server or a local stand-in (`python -m aiosmtpd -n -l localhost:1025`).
+EMAIL_BACKEND = os.environ.get("EMAIL_BACKEND", "django.core.mail.backends.filebased.EmailBackend")
+EMAIL_FILE_PATH = BASE_DIR / "sent_emails"
+EMAIL_HOST = os.environ.get("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.environ.get("EMAIL_PORT", 25))
+DEFAULT_FROM_EMAIL = "Leave Portal <leave-portal@suranacollege.edu.in>"
+
+# Notification queue (core/notifications.py): reviewers get one digest of
+# the requests submitted within this window; sends are capped per worker.
+NOTIFICATION_DIGEST_SECONDS = 600
+NOTIFICATION_RATE_PER_MINUTE = 120
+NOTIFICATION_MAX_ATTEMPTS = 5
+
+# Reviewer dashboard live updates (core/events.py, ASGI only): keep-alive
+# period, how often each process looks for leaves submitted elsewhere, and
+# how long one event stream lasts before the browser reconnects.
+EVENTS_KEEPALIVE_SECONDS = 15
+EVENTS_POLL_SECONDS = 5
+EVENTS_MAX_STREAM_SECONDS = 300
+
+# Per-view request metrics at /metrics (core/metrics.py). Requests still
+# running after METRICS_PROFILE_THRESHOLD_MS get their stacks sampled into
+# METRICS_PROFILE_DIR; unset to turn the sampler off.
+METRICS_PROFILE_THRESHOLD_MS = (
+    float(os.environ["METRICS_PROFILE_THRESHOLD_MS"]) if os.environ.get("METRICS_PROFILE_THRESHOLD_MS") else None
+)
+METRICS_PROFILE_INTERVAL_MS = 5
+METRICS_PROFILE_DIR = os.environ.get("METRICS_PROFILE_DIR", BASE_DIR / "profiles")
+
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 